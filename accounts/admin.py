@@ -1,14 +1,39 @@
+import ipaddress
+
 from django.contrib import admin
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.contrib.auth.admin import UserAdmin
+from .changelists import DateRangeFilter, KeysetPaginationMixin, prefix_filter
+from .exports import export_response
 from .models import CustomUser, LoginAttempt, UserSession
 
 
+def parse_ip(term):
+    """Return term as a normalised IP address string, or None"""
+    try:
+        return str(ipaddress.ip_address(term))
+    except ValueError:
+        return None
+
+
+@admin.action(description='Export selected as CSV')
+def export_csv(modeladmin, request, queryset):
+    return export_response(queryset, 'csv')
+
+
+@admin.action(description='Export selected as JSON lines (gzip)')
+def export_jsonl(modeladmin, request, queryset):
+    return export_response(queryset, 'jsonl')
+
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     """Custom user admin with security fields"""
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'is_active', 'failed_login_attempts', 'last_login')
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'two_factor_enabled')
     search_fields = ('username', 'first_name', 'last_name', 'email')
+    search_help_text = 'Start of a username, email, first or last name (case-insensitive)'
     ordering = ('-date_joined',)
 
     fieldsets = UserAdmin.fieldsets + (
@@ -21,16 +46,51 @@ class CustomUserAdmin(UserAdmin):
         ('Additional Info', {'fields': ('email', 'first_name', 'last_name', 'phone')}),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Case-insensitive prefix search, each branch a range scan on one of the
+        LOWER(...) indexes instead of four icontains table scans
+        """
+        term = search_term.strip().lower()
+        if not term:
+            return queryset, False
+        queryset = queryset.alias(
+            username_ci=Lower('username'), email_ci=Lower('email'), last_name_ci=Lower('last_name'),
+        )
+        # The email index skips blank emails, so say so for it to be usable
+        email = prefix_filter('email_ci', term) & ~Q(email='')
+        if '@' in term:
+            return queryset.filter(email), False
+        if ' ' in term:
+            return queryset.filter(prefix_filter('search_name', ' '.join(term.split()))), False
+        return queryset.filter(
+            prefix_filter('username_ci', term) | email
+            | prefix_filter('search_name', term) | prefix_filter('last_name_ci', term)
+        ), False
+
 
 @admin.register(LoginAttempt)
-class LoginAttemptAdmin(admin.ModelAdmin):
-    """Login attempt admin"""
+class LoginAttemptAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    """Login attempt admin, paged by timestamp for very large tables"""
     list_display = ('username', 'ip_address', 'success', 'timestamp', 'failure_reason')
-    list_filter = ('success', 'timestamp')
+    list_filter = ('success', ('timestamp', DateRangeFilter))
     search_fields = ('username', 'ip_address')
-    ordering = ('-timestamp',)
+    search_help_text = 'Exact IP address, or the start of a username (case-sensitive)'
+    ordering = ('-timestamp', '-id')
+    keyset_field = 'timestamp'
+    actions = [export_csv, export_jsonl]
     readonly_fields = ('username', 'ip_address', 'user_agent', 'success', 'timestamp', 'failure_reason')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Exact IP or username prefix, both served by the (field, -timestamp) indexes"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        ip_address = parse_ip(term)
+        if ip_address:
+            return queryset.filter(ip_address=ip_address), False
+        return queryset.filter(prefix_filter('username', term)), False
+
     def has_add_permission(self, request):
         return False
 
@@ -39,13 +99,27 @@ class LoginAttemptAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserSession)
-class UserSessionAdmin(admin.ModelAdmin):
-    """User session admin"""
+class UserSessionAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    """User session admin, paged by last activity for very large tables"""
     list_display = ('user', 'ip_address', 'is_active', 'created_at', 'last_activity')
-    list_filter = ('is_active', 'created_at')
+    list_filter = ('is_active', ('last_activity', DateRangeFilter))
+    list_select_related = ('user',)
     search_fields = ('user__username', 'ip_address')
-    ordering = ('-last_activity',)
+    search_help_text = 'Exact IP address or session key, or the start of a username (case-sensitive)'
+    ordering = ('-last_activity', '-id')
+    keyset_field = 'last_activity'
+    actions = [export_csv, export_jsonl]
     readonly_fields = ('user', 'session_key', 'ip_address', 'user_agent', 'created_at', 'last_activity')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Exact IP or session key, or username prefix via the unique username index"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        ip_address = parse_ip(term)
+        if ip_address:
+            return queryset.filter(ip_address=ip_address), False
+        return queryset.filter(prefix_filter('user__username', term) | Q(session_key=term)), False
+
     def has_add_permission(self, request):
         return False
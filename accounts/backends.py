@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+
+from .user_cache import cache_user, enabled, get_user_cache_version, get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the session user from the versioned user cache,
+    so authenticated requests do not query CustomUser by primary key
+    """
+
+    def get_user(self, user_id):
+        if not enabled():
+            return super().get_user(user_id)
+        # The version is read before the row: if a save() lands in between,
+        # the row is stored under a version that is already obsolete.
+        version = get_user_cache_version(user_id)
+        user = get_cached_user(user_id, version)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache_user(user, version)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
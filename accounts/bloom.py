@@ -0,0 +1,116 @@
+"""
+Memory-mapped bloom filter for password lists.
+
+The filter file is a small header followed by the raw bit array. Opening it
+only maps the file, so it is ready immediately, and the pages are shared
+through the OS page cache by every worker process on the host instead of
+each one loading its own copy of the list.
+
+Entries are normalised like CommonPasswordValidator (lowercased and stripped)
+and located with double hashing over one BLAKE2b digest, so a lookup is k
+byte reads whatever the size of the list. Build files offline with
+manage.py build_password_bloom.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+
+MAGIC = b'PWBLOOM1'
+# magic, number of bits, number of hashes, number of entries
+HEADER = struct.Struct('<8sQIQ')
+
+
+def normalise(password):
+    return password.lower().strip()
+
+
+def _positions(value, num_bits, num_hashes):
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+    h1, h2 = struct.unpack('<QQ', digest)
+    h2 |= 1  # odd, so the probe sequence never collapses onto one bit
+    return ((h1 + i * h2) % num_bits for i in range(num_hashes))
+
+
+def optimal_size(capacity, error_rate):
+    """(bits, hashes) for capacity entries at the given false positive rate"""
+    capacity = max(capacity, 1)
+    num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    num_bits = max(8, (num_bits + 7) // 8 * 8)
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class BloomFilter:
+    """Read-only bloom filter backed by a memory-mapped file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_bits, self.num_hashes, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) < HEADER.size + self.num_bits // 8:
+            self._map.close()
+            raise ValueError(f'{path} is not a password bloom filter')
+        self.path = path
+
+    def __contains__(self, password):
+        bits = self._map
+        for position in _positions(normalise(password), self.num_bits, self.num_hashes):
+            if not bits[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def close(self):
+        self._map.close()
+
+
+def build(path, passwords, capacity, error_rate=0.001):
+    """
+    Write a filter for passwords (an iterable of str) to path and return the
+    number of entries added.
+
+    The bit array is built in a memory-mapped temporary file and renamed into
+    place, so running workers never see a half-written filter.
+    """
+    num_bits, num_hashes = optimal_size(capacity, error_rate)
+    tmp_path = f'{path}.tmp'
+    count = 0
+    with open(tmp_path, 'w+b') as fh:
+        fh.truncate(HEADER.size + num_bits // 8)
+        with mmap.mmap(fh.fileno(), 0) as bits:
+            for password in passwords:
+                value = normalise(password)
+                if not value:
+                    continue
+                for position in _positions(value, num_bits, num_hashes):
+                    bits[HEADER.size + (position >> 3)] |= 1 << (position & 7)
+                count += 1
+            HEADER.pack_into(bits, 0, MAGIC, num_bits, num_hashes, count)
+            bits.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+def get_filter(path):
+    """
+    The BloomFilter for path, opened once per process; None if the file does
+    not exist. A rebuilt file (new inode) is picked up on the next call.
+    """
+    path = os.fspath(path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (stat.st_ino, stat.st_mtime_ns)
+    with _filters_lock:
+        cached = _filters.get(path)
+        if cached is None or cached[0] != key:
+            _filters[path] = cached = (key, BloomFilter(path))
+        return cached[1]
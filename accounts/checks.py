@@ -0,0 +1,42 @@
+"""
+Deploy checks for the caches that must be shared by every worker.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose contents only the current process can see
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def per_process(alias):
+    """Whether the cache alias keeps its entries inside each process"""
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PER_PROCESS_BACKENDS
+
+
+def shared_cache_aliases():
+    """(alias, what needs it) pairs that must not be per-process"""
+    aliases = []
+    if settings.SESSION_ENGINE in ('accounts.sessions', 'django.contrib.sessions.backends.cache',
+                                   'django.contrib.sessions.backends.cached_db'):
+        aliases.append((settings.SESSION_CACHE_ALIAS, 'sessions'))
+    return aliases
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    return [
+        Error(
+            f'CACHES[{alias!r}] is per-process, but {purpose} are read from it.',
+            hint='Each worker would keep its own copy, so changes made in one worker (a logout, a '
+                 'revoked session) would not reach the others. Use a shared backend such as Redis '
+                 'or FileBasedCache.',
+            id='accounts.E001',
+        )
+        for alias, purpose in shared_cache_aliases()
+        if per_process(alias)
+    ]
@@ -0,0 +1,112 @@
+"""
+Streaming CSV / gzip JSONL export of the security log tables.
+
+Rows are read with values_list() projections through QuerySet.iterator(), and
+encoded one chunk at a time, so memory use is flat whatever the export size.
+"""
+import csv
+import datetime
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import LoginAttempt, UserSession
+
+# Exported columns per model; related lookups are written under the header
+# given here
+EXPORT_COLUMNS = {
+    LoginAttempt: (
+        ('id', 'id'),
+        ('timestamp', 'timestamp'),
+        ('username', 'username'),
+        ('ip_address', 'ip_address'),
+        ('success', 'success'),
+        ('failure_reason', 'failure_reason'),
+        ('user_agent', 'user_agent__value'),
+    ),
+    UserSession: (
+        ('id', 'id'),
+        ('username', 'user__username'),
+        ('session_key', 'session_key'),
+        ('ip_address', 'ip_address'),
+        ('is_active', 'is_active'),
+        ('created_at', 'created_at'),
+        ('last_activity', 'last_activity'),
+        ('user_agent', 'user_agent__value'),
+    ),
+}
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/gzip', 'jsonl.gz'),
+}
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() hands the value straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    # Usernames and failure reasons are attacker-controlled; stop spreadsheet
+    # software from evaluating them as formulas
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+
+def _rows(queryset, chunk_size):
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS[queryset.model]]
+    return queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(queryset, chunk_size=CHUNK_SIZE):
+    """Yield the export as CSV text, one row per chunk"""
+    headers = [header for header, _ in EXPORT_COLUMNS[queryset.model]]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in _rows(queryset, chunk_size):
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def iter_jsonl_gzip(queryset, chunk_size=CHUNK_SIZE):
+    """Yield the export as gzip-compressed JSON lines"""
+    headers = [header for header, _ in EXPORT_COLUMNS[queryset.model]]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    buffer = []
+    for count, row in enumerate(_rows(queryset, chunk_size), 1):
+        buffer.append(encoder.encode(dict(zip(headers, row))))
+        if count % chunk_size == 0:
+            data = compressor.compress(('\n'.join(buffer) + '\n').encode('utf-8'))
+            buffer.clear()
+            if data:
+                yield data
+    if buffer:
+        yield compressor.compress(('\n'.join(buffer) + '\n').encode('utf-8'))
+    yield compressor.flush()
+
+
+def iter_export(queryset, fmt, chunk_size=CHUNK_SIZE):
+    if fmt == 'csv':
+        return (chunk.encode('utf-8') for chunk in iter_csv(queryset, chunk_size))
+    if fmt == 'jsonl':
+        return iter_jsonl_gzip(queryset, chunk_size)
+    raise ValueError(f'Unknown export format: {fmt}')
+
+
+def export_response(queryset, fmt):
+    """StreamingHttpResponse that downloads queryset in the given format"""
+    content_type, extension = FORMATS[fmt]
+    filename = f'{queryset.model._meta.model_name}-{timezone.now():%Y%m%d-%H%M%S}.{extension}'
+    response = StreamingHttpResponse(iter_export(queryset, fmt), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
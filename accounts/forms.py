@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Lower
 from .models import CustomUser
 import re
 
@@ -93,7 +94,7 @@ class SecureUserCreationForm(UserCreationForm):
     def clean_email(self):
         """Ensure email is unique"""
         email = self.cleaned_data.get('email')
-        if CustomUser.objects.filter(email=email).exists():
+        if CustomUser.objects.alias(email_ci=Lower('email')).filter(email_ci=email.lower()).exists():
             raise ValidationError('This email address is already registered.')
         return email
 
@@ -110,7 +111,7 @@ class SecureUserCreationForm(UserCreationForm):
             raise ValidationError('Username must be at least 3 characters long.')
 
         # Check if username exists
-        if CustomUser.objects.filter(username=username).exists():
+        if CustomUser.objects.alias(username_ci=Lower('username')).filter(username_ci=username.lower()).exists():
             raise ValidationError('This username is already taken.')
 
         return username
@@ -237,6 +238,6 @@ class UserProfileForm(forms.ModelForm):
     def clean_email(self):
         """Ensure email is unique (excluding current user)"""
         email = self.cleaned_data.get('email')
-        if CustomUser.objects.filter(email=email).exclude(pk=self.instance.pk).exists():
+        if email and CustomUser.objects.alias(email_ci=Lower('email')).filter(email_ci=email.lower()).exclude(pk=self.instance.pk).exists():
             raise ValidationError('This email address is already in use by another account.')
         return email
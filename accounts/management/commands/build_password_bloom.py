@@ -0,0 +1,64 @@
+"""
+Build the password bloom filter used by BreachedPasswordValidator.
+
+Reads one password per line from each corpus file (plain text or .gz) plus,
+unless --no-django-common is given, Django's bundled common password list.
+Files are read twice when --capacity is not given: once to count entries and
+once to add them.
+"""
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.password_validation import CommonPasswordValidator
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.bloom import build
+
+
+def read_passwords(path):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as fh:
+        for line in fh:
+            line = line.rstrip('\r\n')
+            if line:
+                yield line
+
+
+class Command(BaseCommand):
+    help = 'Build a memory-mapped bloom filter of breached/common passwords from local corpus files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', nargs='*', help='Password list files, one password per line (.gz allowed)')
+        parser.add_argument(
+            '-o', '--output',
+            default=getattr(settings, 'PASSWORD_BLOOM_FILTER_PATH', settings.BASE_DIR / 'data' / 'passwords.bloom'),
+            help='Filter file to write (default: PASSWORD_BLOOM_FILTER_PATH)',
+        )
+        parser.add_argument('--error-rate', type=float, default=0.001, help='Target false positive rate')
+        parser.add_argument('--capacity', type=int, help='Expected number of passwords (default: count the input)')
+        parser.add_argument('--no-django-common', action='store_true', help="Leave out Django's common password list")
+
+    def handle(self, *args, **options):
+        if not 0 < options['error_rate'] < 1:
+            raise CommandError('--error-rate must be between 0 and 1')
+        sources = [Path(path) for path in options['corpus']]
+        for path in sources:
+            if not path.is_file():
+                raise CommandError(f'No such file: {path}')
+        if not options['no_django_common']:
+            sources.append(CommonPasswordValidator().DEFAULT_PASSWORD_LIST_PATH)
+        if not sources:
+            raise CommandError('Nothing to build from')
+
+        capacity = options['capacity']
+        if capacity is None:
+            capacity = sum(1 for path in sources for _ in read_passwords(path))
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        passwords = (password for path in sources for password in read_passwords(path))
+        count = build(output, passwords, capacity, options['error_rate'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {output} ({output.stat().st_size:,} bytes, {count:,} passwords)'
+        ))
@@ -0,0 +1,67 @@
+import datetime
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from accounts.exports import CHUNK_SIZE, FORMATS, iter_export
+from accounts.models import LoginAttempt, UserSession
+
+# table name -> (model, date field used by --since/--until)
+TABLES = {
+    'login_attempts': (LoginAttempt, 'timestamp'),
+    'user_sessions': (UserSession, 'last_activity'),
+}
+
+
+def parse_moment(value):
+    """Accept an ISO date or datetime; bare dates mean local midnight"""
+    moment = parse_datetime(value)
+    if moment is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'Invalid date: {value}')
+        moment = datetime.datetime.combine(date, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = 'Stream LoginAttempt or UserSession history as CSV or gzip JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(TABLES))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--since', help='Only rows at or after this date/datetime')
+        parser.add_argument('--until', help='Only rows before this date/datetime')
+        parser.add_argument('--username', help='Only rows for this username')
+        parser.add_argument('--ip', help='Only rows from this IP address')
+        parser.add_argument('--output', '-o', help='Write to this file instead of stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        model, date_field = TABLES[options['table']]
+        queryset = model.objects.all()
+        if options['since']:
+            queryset = queryset.filter(**{f'{date_field}__gte': parse_moment(options['since'])})
+        if options['until']:
+            queryset = queryset.filter(**{f'{date_field}__lt': parse_moment(options['until'])})
+        if options['username']:
+            username_field = 'username' if model is LoginAttempt else 'user__username'
+            queryset = queryset.filter(**{username_field: options['username']})
+        if options['ip']:
+            queryset = queryset.filter(ip_address=options['ip'])
+
+        chunks = iter_export(queryset, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'wb') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+        else:
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
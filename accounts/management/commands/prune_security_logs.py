@@ -0,0 +1,233 @@
+"""
+Archive and delete old LoginAttempt and UserSession rows.
+
+Rows older than the retention window are archived and then deleted in small
+primary-key ordered chunks, so no single statement holds a write lock for
+long. Each chunk is written to its own gzip JSONL file per day, named by the
+chunk's primary-key range:
+
+    <archive-dir>/<table>/YYYY/MM/YYYY-MM-DD.<first pk>-<last pk>.jsonl.gz
+
+The range is checkpointed in <archive-dir>/state.json before anything is
+written, and files are written to a temporary name and renamed into place.
+An interrupted run redoes that chunk first: it rewrites the same files with
+the same rows (or skips them if the delete already went through), so no row
+is archived twice and no archive is left half-written. zcat over a day's
+files gives the day's rows.
+
+LoginAttempt rows are only pruned once rollup_login_stats has folded them
+into LoginStatHourly (see accounts.rollups).
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from accounts.models import LoginAttempt, UserSession
+from accounts.rollups import rolled_up_id
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# table name -> (model, date field used for retention and partitioning,
+#                extra filter, archived columns)
+# Lookups that span relations are written to the archive under a plain name
+ARCHIVE_NAMES = {'user_agent__value': 'user_agent'}
+TABLES = {
+    'login_attempts': (
+        LoginAttempt, 'timestamp', {},
+        ('id', 'username', 'ip_address', 'user_agent__value', 'success', 'timestamp', 'failure_reason'),
+    ),
+    'user_sessions': (
+        UserSession, 'last_activity', {'is_active': False},
+        ('id', 'user_id', 'session_key', 'ip_address', 'user_agent__value', 'created_at', 'last_activity'),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = 'Archive LoginAttempt/UserSession rows past the retention window and delete them in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            default=getattr(settings, 'SECURITY_LOG_RETENTION_DAYS', 90),
+            help='Keep rows newer than this many days (default: SECURITY_LOG_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=getattr(settings, 'SECURITY_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'archive'),
+            help='Directory for the compressed JSONL archives',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows archived and deleted per statement')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to pause between chunks')
+        parser.add_argument('--skip-reconcile', action='store_true', help='Do not retire UserSession rows whose session has expired')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        self.archive_dir = Path(options['archive_dir'])
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = options['chunk_size']
+        self.pause = options['sleep']
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        with self._lock():
+            if not options['skip_reconcile']:
+                retired = self.reconcile_sessions()
+                self.stdout.write(f'Retired {retired} UserSession rows with expired sessions')
+
+            for table in TABLES:
+                archived, deleted = self.prune(table, cutoff)
+                self.stdout.write(self.style.SUCCESS(
+                    f'{table}: archived {archived}, deleted {deleted} rows older than {cutoff:%Y-%m-%d %H:%M}'
+                ))
+
+    def reconcile_sessions(self):
+        """Mark active UserSession rows inactive when their Django session is gone or expired"""
+        retired = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                UserSession.objects.filter(is_active=True, pk__gt=last_pk)
+                .order_by('pk').values_list('pk', 'session_key')[:self.chunk_size]
+            )
+            if not chunk:
+                return retired
+            last_pk = chunk[-1][0]
+            keys = [key for _, key in chunk]
+            live = set(
+                Session.objects.filter(session_key__in=keys, expire_date__gt=timezone.now())
+                .values_list('session_key', flat=True)
+            )
+            dead = [pk for pk, key in chunk if key not in live]
+            if dead:
+                retired += UserSession.objects.filter(pk__in=dead, is_active=True).update(is_active=False)
+            self._pause()
+
+    def prune(self, table, cutoff):
+        model, date_field, extra, columns = TABLES[table]
+        archived = deleted = 0
+        queryset = model.objects.filter(**{f'{date_field}__lt': cutoff}, **extra)
+        if model is LoginAttempt:
+            # Rows the hourly rollup has not reached yet are kept for it
+            queryset = queryset.filter(pk__lte=rolled_up_id())
+
+        # A previous run stopped partway through a chunk; redo it with the
+        # rows it picked, whatever the cutoff is now. If its delete went
+        # through there is nothing left to write.
+        pending = self._read_state().get(table)
+        if pending:
+            chunk_archived, chunk_deleted = self._prune_chunk(
+                table, model.objects.filter(**extra), pending[0], pending[-1],
+            )
+            archived += chunk_archived
+            deleted += chunk_deleted
+
+        last_pk = 0
+        while True:
+            ids = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:self.chunk_size])
+            if not ids:
+                return archived, deleted
+            last_pk = ids[-1]
+            chunk_archived, chunk_deleted = self._prune_chunk(table, queryset, ids[0], last_pk)
+            archived += chunk_archived
+            deleted += chunk_deleted
+            self._pause()
+
+    def _prune_chunk(self, table, queryset, first_pk, last_pk):
+        """Archive and delete the rows of queryset in [first_pk, last_pk]; returns (archived, deleted)"""
+        model, date_field, extra, columns = TABLES[table]
+        self._write_state(table, [first_pk, last_pk])
+        chunk = queryset.filter(pk__gte=first_pk, pk__lte=last_pk)
+        rows = list(chunk.order_by('pk').values(*columns))
+        if rows:
+            self._archive(table, date_field, rows, first_pk, last_pk)
+        deleted = model.objects.filter(pk__in=[row['id'] for row in rows]).delete()[0] if rows else 0
+        self._write_state(table, None)
+        return len(rows), deleted
+
+    def _archive(self, table, date_field, rows, first_pk, last_pk):
+        partitions = {}
+        for row in rows:
+            day = timezone.localtime(row[date_field]).date()
+            partitions.setdefault(day, []).append(row)
+
+        for day, day_rows in partitions.items():
+            path = self.archive_dir / table / f'{day:%Y}' / f'{day:%m}' / f'{day:%Y-%m-%d}.{first_pk}-{last_pk}.jsonl.gz'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lines = ''.join(
+                json.dumps(
+                    {ARCHIVE_NAMES.get(key, key): value for key, value in row.items()},
+                    cls=DjangoJSONEncoder, ensure_ascii=False,
+                ) + '\n'
+                for row in day_rows
+            )
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as fh:
+                    fh.write(lines.encode('utf-8'))
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, path)
+
+    def _read_state(self):
+        try:
+            with open(self.archive_dir / 'state.json', encoding='utf-8') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+
+    def _write_state(self, table, pending_range):
+        state = self._read_state()
+        state[table] = pending_range
+        tmp_path = self.archive_dir / 'state.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(state, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self.archive_dir / 'state.json')
+
+    def _pause(self):
+        if self.pause:
+            time.sleep(self.pause)
+
+    def _lock(self):
+        return _RunLock(self.archive_dir / '.lock')
+
+
+class _RunLock:
+    """Non-blocking exclusive lock so overlapping cron runs exit instead of racing"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fh = None
+
+    def __enter__(self):
+        self.fh = open(self.path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self.fh.close()
+                raise CommandError('Another prune_security_logs run is in progress')
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.fh, fcntl.LOCK_UN)
+        self.fh.close()
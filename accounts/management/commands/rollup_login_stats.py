@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from accounts.rollups import rollup_login_attempts
+
+
+class Command(BaseCommand):
+    help = 'Fold new LoginAttempt rows into the hourly LoginStatHourly rollup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Attempts folded per transaction')
+        parser.add_argument('--lag', type=int, default=60, help='Seconds to wait before rolling up an attempt')
+
+    def handle(self, *args, **options):
+        processed = rollup_login_attempts(
+            batch_size=options['batch_size'],
+            lag=timedelta(seconds=options['lag']),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {processed} login attempts'))
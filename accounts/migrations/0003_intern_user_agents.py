@@ -0,0 +1,70 @@
+import hashlib
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+def digest(value):
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def intern_user_agents(apps, schema_editor):
+    """
+    Point every LoginAttempt/UserSession row at an interned UserAgent.
+
+    Rows are converted in primary-key batches, each in its own transaction,
+    so large audit tables are never locked for the whole migration.
+    """
+    UserAgent = apps.get_model('accounts', 'UserAgent')
+    ids = dict(UserAgent.objects.values_list('hash', 'id'))
+
+    for model_name in ('LoginAttempt', 'UserSession'):
+        model = apps.get_model('accounts', model_name)
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk, agent__isnull=True)
+                .exclude(user_agent='')
+                .order_by('pk').only('pk', 'user_agent')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            with transaction.atomic():
+                missing = {}
+                for row in batch:
+                    key = digest(row.user_agent)
+                    if key not in ids:
+                        missing[key] = row.user_agent
+                if missing:
+                    UserAgent.objects.bulk_create(
+                        [UserAgent(hash=key, value=value) for key, value in missing.items()],
+                        ignore_conflicts=True,
+                    )
+                    ids.update(UserAgent.objects.filter(hash__in=missing).values_list('hash', 'id'))
+                for row in batch:
+                    row.agent_id = ids[digest(row.user_agent)]
+                model.objects.bulk_update(batch, ['agent'])
+
+
+def restore_user_agents(apps, schema_editor):
+    UserAgent = apps.get_model('accounts', 'UserAgent')
+    for model_name in ('LoginAttempt', 'UserSession'):
+        model = apps.get_model('accounts', model_name)
+        for agent in UserAgent.objects.iterator():
+            model.objects.filter(agent=agent).update(user_agent=agent.value)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0002_useragent'),
+    ]
+
+    operations = [
+        migrations.RunPython(intern_user_agents, restore_user_agents),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_intern_user_agents'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='loginattempt',
+            name='user_agent',
+        ),
+        migrations.RemoveField(
+            model_name='usersession',
+            name='user_agent',
+        ),
+        migrations.RenameField(
+            model_name='loginattempt',
+            old_name='agent',
+            new_name='user_agent',
+        ),
+        migrations.RenameField(
+            model_name='usersession',
+            old_name='agent',
+            new_name='user_agent',
+        ),
+    ]
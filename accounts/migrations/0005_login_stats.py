@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_remove_user_agent_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup Watermark',
+                'verbose_name_plural': 'Rollup Watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='LoginStatHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Start of the hour (UTC)')),
+                ('username', models.CharField(max_length=150)),
+                ('ip_address', models.GenericIPAddressField()),
+                ('success_count', models.PositiveIntegerField(default=0)),
+                ('failure_count', models.PositiveIntegerField(default=0)),
+                ('failure_reasons', models.JSONField(blank=True, default=dict, help_text='Failure count per reason')),
+                ('top_failure_reason', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'verbose_name': 'Hourly Login Statistic',
+                'verbose_name_plural': 'Hourly Login Statistics',
+                'ordering': ['-bucket'],
+                'indexes': [models.Index(fields=['-bucket'], name='accounts_lo_bucket_8d8e98_idx'), models.Index(fields=['ip_address', '-bucket'], name='accounts_lo_ip_addr_630650_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'username', 'ip_address'), name='unique_login_stat_bucket')],
+            },
+        ),
+    ]
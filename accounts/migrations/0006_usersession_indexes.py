@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_login_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['-last_activity'], name='accounts_us_last_ac_8d8f08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['ip_address', '-last_activity'], name='accounts_us_ip_addr_846bb5_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_search_name(apps, schema_editor):
+    """Populate search_name for existing users, in primary-key batches"""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    last_pk = 0
+    while True:
+        batch = list(
+            CustomUser.objects.filter(pk__gt=last_pk)
+            .order_by('pk').only('pk', 'first_name', 'last_name')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        for user in batch:
+            user.search_name = f"{user.first_name} {user.last_name}".strip().lower()
+        CustomUser.objects.bulk_update(batch, ['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_usersession_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='search_name',
+            field=models.CharField(blank=True, editable=False, help_text="Lowercased 'first last' name", max_length=301),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-date_joined'], name='accounts_cu_date_jo_36131c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['search_name'], name='accounts_cu_search__7bdbea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='customuser_last_name_ci_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='unique_username_ci', violation_error_message='A user with that username already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='unique_email_ci', violation_error_message='This email address is already in use by another account.'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:03
+
+import healthcenter.uploads
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_customuser_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_picture',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='profile_pics/'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:08
+
+import healthcenter.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_safe_image_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_picture_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_picture_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_picture_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_picture',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='profile_picture_height', null=True, placeholder_field='profile_picture_placeholder', upload_to='profile_pics/', width_field='profile_picture_width'),
+        ),
+    ]
@@ -1,7 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 from django.utils import timezone
 from datetime import timedelta
+from collections import OrderedDict
+import hashlib
+import threading
+from healthcenter.uploads import SafeImageField
+from .user_cache import bump_user_cache_version
 
 
 class CustomUser(AbstractUser):
@@ -11,7 +17,10 @@ class CustomUser(AbstractUser):
     # Additional fields
     phone = models.CharField(max_length=20, blank=True, help_text="Contact phone number")
     date_of_birth = models.DateField(null=True, blank=True)
-    profile_picture = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
+    profile_picture = SafeImageField(upload_to='profile_pics/', null=True, blank=True, width_field='profile_picture_width', height_field='profile_picture_height', placeholder_field='profile_picture_placeholder')
+    profile_picture_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    profile_picture_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
 
     # Security fields
     failed_login_attempts = models.IntegerField(default=0, help_text="Number of failed login attempts")
@@ -28,14 +37,52 @@ class CustomUser(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalised for admin search, kept in sync by save()
+    search_name = models.CharField(max_length=301, blank=True, editable=False, help_text="Lowercased 'first last' name")
+
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
         ordering = ['-date_joined']
+        constraints = [
+            models.UniqueConstraint(
+                Lower('username'), name='unique_username_ci',
+                violation_error_message='A user with that username already exists.',
+            ),
+            models.UniqueConstraint(
+                Lower('email'), condition=~models.Q(email=''), name='unique_email_ci',
+                violation_error_message='This email address is already in use by another account.',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['-date_joined']),
+            models.Index(fields=['search_name']),
+            models.Index(Lower('last_name'), name='customuser_last_name_ci_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.get_full_name() or self.email})"
 
+    def save(self, *args, **kwargs):
+        self.search_name = self.build_search_name()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+        # Drop cached copies used by CachedModelBackend once the new row is
+        # visible to other connections
+        pk = self.pk
+        transaction.on_commit(lambda: bump_user_cache_version(pk))
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(lambda: bump_user_cache_version(pk))
+        return result
+
+    def build_search_name(self):
+        return f"{self.first_name} {self.last_name}".strip().lower()
+
     def is_account_locked(self):
         """Check if account is currently locked"""
         if self.account_locked_until:
@@ -75,13 +122,75 @@ class CustomUser(AbstractUser):
         return self.require_password_change or self.password_age_days() > max_age_days
 
 
+class UserAgentManager(models.Manager):
+    """
+    Interns user-agent strings, remembering hash -> id for recent values
+    so repeat visitors do not cost a lookup per insert
+    """
+    lru_size = 1024
+
+    def __init__(self):
+        super().__init__()
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def intern(self, value):
+        """Return the UserAgent id for value, creating the row if needed"""
+        if not value:
+            return None
+        digest = UserAgent.digest(value)
+        with self._lock:
+            pk = self._ids.get(digest)
+            if pk is not None:
+                self._ids.move_to_end(digest)
+                return pk
+
+        # get_or_create() recovers from a concurrent insert of the same hash
+        pk = self.get_or_create(hash=digest, defaults={'value': value})[0].pk
+        # A row created in a transaction that rolls back must not be
+        # remembered; on_commit() runs at once outside a transaction
+        transaction.on_commit(lambda: self._remember(digest, pk), using=self.db)
+        return pk
+
+    def _remember(self, digest, pk):
+        with self._lock:
+            self._ids[digest] = pk
+            if len(self._ids) > self.lru_size:
+                self._ids.popitem(last=False)
+
+    def clear_lru(self):
+        with self._lock:
+            self._ids.clear()
+
+
+class UserAgent(models.Model):
+    """
+    Distinct user-agent strings shared by LoginAttempt and UserSession
+    """
+    hash = models.CharField(max_length=32, unique=True, help_text="BLAKE2b-128 hex digest of value")
+    value = models.TextField()
+
+    objects = UserAgentManager()
+
+    class Meta:
+        verbose_name = "User Agent"
+        verbose_name_plural = "User Agents"
+
+    def __str__(self):
+        return self.value
+
+    @staticmethod
+    def digest(value):
+        return hashlib.blake2b(value.encode('utf-8'), digest_size=16).hexdigest()
+
+
 class LoginAttempt(models.Model):
     """
     Track all login attempts for security monitoring
     """
     username = models.CharField(max_length=150)
     ip_address = models.GenericIPAddressField()
-    user_agent = models.TextField(blank=True)
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     success = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
     failure_reason = models.CharField(max_length=255, blank=True)
@@ -108,7 +217,7 @@ class UserSession(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='sessions')
     session_key = models.CharField(max_length=40, unique=True)
     ip_address = models.GenericIPAddressField()
-    user_agent = models.TextField(blank=True)
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     created_at = models.DateTimeField(auto_now_add=True)
     last_activity = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
@@ -117,6 +226,54 @@ class UserSession(models.Model):
         verbose_name = "User Session"
         verbose_name_plural = "User Sessions"
         ordering = ['-last_activity']
+        indexes = [
+            models.Index(fields=['-last_activity']),
+            models.Index(fields=['ip_address', '-last_activity']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.ip_address} ({self.created_at})"
+
+
+class LoginStatHourly(models.Model):
+    """
+    Hourly login counts per username and IP, rolled up from LoginAttempt
+    """
+    bucket = models.DateTimeField(help_text="Start of the hour (UTC)")
+    username = models.CharField(max_length=150)
+    ip_address = models.GenericIPAddressField()
+    success_count = models.PositiveIntegerField(default=0)
+    failure_count = models.PositiveIntegerField(default=0)
+    failure_reasons = models.JSONField(default=dict, blank=True, help_text="Failure count per reason")
+    top_failure_reason = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        verbose_name = "Hourly Login Statistic"
+        verbose_name_plural = "Hourly Login Statistics"
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'username', 'ip_address'], name='unique_login_stat_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['-bucket']),
+            models.Index(fields=['ip_address', '-bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket:%Y-%m-%d %H:00} {self.username} from {self.ip_address}: {self.success_count}/{self.failure_count}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Highest source primary key already folded into a rollup table
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Rollup Watermark"
+        verbose_name_plural = "Rollup Watermarks"
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
@@ -0,0 +1,38 @@
+"""
+Password validators for AUTH_PASSWORD_VALIDATORS.
+"""
+from django.conf import settings
+from django.contrib.auth.password_validation import CommonPasswordValidator
+from django.core.exceptions import ValidationError
+
+from .bloom import get_filter
+
+
+class BreachedPasswordValidator:
+    """
+    Reject passwords found in the bloom filter built by build_password_bloom.
+
+    Falls back to Django's CommonPasswordValidator while the filter file does
+    not exist, so a fresh checkout still refuses common passwords.
+    """
+
+    def __init__(self, filter_path=None):
+        self.filter_path = filter_path or getattr(
+            settings, 'PASSWORD_BLOOM_FILTER_PATH', settings.BASE_DIR / 'data' / 'passwords.bloom'
+        )
+        self._fallback = None
+
+    def validate(self, password, user=None):
+        bloom = get_filter(self.filter_path)
+        if bloom is None:
+            if self._fallback is None:
+                self._fallback = CommonPasswordValidator()
+            return self._fallback.validate(password, user)
+        if password in bloom:
+            raise ValidationError(
+                'This password is too common or has appeared in a data breach.',
+                code='password_too_common',
+            )
+
+    def get_help_text(self):
+        return "Your password can't be a commonly used or previously breached password."
@@ -0,0 +1,52 @@
+"""
+Cached, database-backed session engine that mirrors sessions into UserSession.
+
+Reads are served from the cache and only fall back to ``django_session`` on a
+miss; writes go through to the database whenever the session changes. Deleting
+a session (logout, flush, revocation) also retires its UserSession row, so the
+audit table never lists a session that can no longer be used.
+"""
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+from .models import UserSession
+
+
+class SessionStore(CachedDBStore):
+    """
+    cached_db session store that keeps UserSession in sync on cycle and delete
+    """
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        if session_key:
+            UserSession.objects.filter(session_key=session_key).update(is_active=False)
+
+    async def adelete(self, session_key=None):
+        session_key = session_key or self.session_key
+        await super().adelete(session_key)
+        if session_key:
+            await UserSession.objects.filter(session_key=session_key).aupdate(is_active=False)
+
+    def cycle_key(self):
+        old_key = self.session_key
+        super().cycle_key()
+        if old_key:
+            # The session lives on under a new key (e.g. password change),
+            # so carry its UserSession across instead of retiring it.
+            UserSession.objects.filter(session_key=old_key).update(
+                session_key=self.session_key, is_active=True
+            )
+
+    async def acycle_key(self):
+        old_key = self.session_key
+        await super().acycle_key()
+        if old_key:
+            await UserSession.objects.filter(session_key=old_key).aupdate(
+                session_key=self.session_key, is_active=True
+            )
+
+
+def revoke_session(session_key):
+    """Delete the real session behind session_key, logging its owner out"""
+    SessionStore().delete(session_key)
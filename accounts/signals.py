@@ -0,0 +1,32 @@
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import UserAgent, UserSession
+
+
+@receiver(user_logged_in)
+def track_user_session(sender, request, user, **kwargs):
+    """
+    Mirror every new login into UserSession, whichever view performed it
+    """
+    if request is None:
+        return
+    # accounts.views pulls in the forms; not worth it at startup
+    from .views import get_client_ip
+
+    session_key = request.session.session_key
+    ip_address = get_client_ip(request)
+    if not session_key or not ip_address:
+        return
+    # Use update_or_create to avoid duplicate session_key errors
+    UserSession.objects.update_or_create(
+        session_key=session_key,
+        defaults={
+            'user': user,
+            'ip_address': ip_address,
+            'user_agent_id': UserAgent.objects.intern(request.META.get('HTTP_USER_AGENT', '')),
+            'is_active': True,
+            'last_activity': timezone.now(),
+        }
+    )
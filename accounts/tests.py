@@ -1,3 +1,514 @@
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.checks import Error
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models.query import QuerySet
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .backends import CachedModelBackend
+from .changelists import EstimatedCountPaginator, prefix_filter
+from .checks import check_shared_caches
+from .models import LoginAttempt, LoginStatHourly, RollupWatermark, UserAgent, UserSession
+from .rollups import WATERMARK_NAME, hour_bucket, rolled_up_id, rollup_login_attempts
+from .sessions import SessionStore
+
+PASSWORD = 'Correct-Horse-7'
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def shared_cache_settings(location):
+    return {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+
+
+class UserAgentInternTests(TestCase):
+    """Ids from a transaction that rolls back must not outlive it"""
+
+    def test_first_test_interns(self):
+        LoginAttempt.objects.create(
+            username='a', ip_address='10.0.0.1',
+            user_agent_id=UserAgent.objects.intern('Mozilla/5.0 test'),
+        )
+
+    def test_second_test_interns_again(self):
+        LoginAttempt.objects.create(
+            username='a', ip_address='10.0.0.1',
+            user_agent_id=UserAgent.objects.intern('Mozilla/5.0 test'),
+        )
+        self.assertTrue(UserAgent.objects.filter(value='Mozilla/5.0 test').exists())
+
+
+class UserAgentLruTests(TransactionTestCase):
+
+    def setUp(self):
+        UserAgent.objects.clear_lru()
+
+    def tearDown(self):
+        # The table is flushed after this test
+        UserAgent.objects.clear_lru()
+
+    def test_committed_id_is_remembered(self):
+        pk = UserAgent.objects.intern('Mozilla/5.0 committed')
+        with self.assertNumQueries(0):
+            self.assertEqual(UserAgent.objects.intern('Mozilla/5.0 committed'), pk)
+
+
+class SessionRevocationTests(TestCase):
+    """
+    Sessions live in a cache shared by every worker; a second
+    FileBasedCache on the same directory stands in for another worker
+    """
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        override = override_settings(CACHES=shared_cache_settings(self.cache_dir), PASSWORD_HASHERS=FAST_HASHERS)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.other_worker = FileBasedCache(self.cache_dir, {})
+        self.user = get_user_model().objects.create_user('nurse', 'nurse@example.com', PASSWORD)
+
+    def login(self, user_agent):
+        client = Client(HTTP_USER_AGENT=user_agent)
+        response = client.post(reverse('accounts:login'), {'username': 'nurse', 'password': PASSWORD})
+        self.assertEqual(response.status_code, 302)
+        return client, client.session.session_key
+
+    def assertLoggedOut(self, client, session_key):
+        response = client.get(reverse('accounts:profile'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(self.other_worker.get(KEY_PREFIX + session_key))
+        self.assertFalse(SessionStore().exists(session_key))
+        self.assertFalse(UserSession.objects.get(session_key=session_key).is_active)
+
+    def test_login_is_visible_to_other_workers(self):
+        client, session_key = self.login('Browser A')
+        self.assertIsNotNone(self.other_worker.get(KEY_PREFIX + session_key))
+        self.assertEqual(client.get(reverse('accounts:profile')).status_code, 200)
+
+    def test_terminate_session_logs_the_other_device_out(self):
+        phone, phone_key = self.login('Phone')
+        desktop, _ = self.login('Desktop')
+        session = UserSession.objects.get(session_key=phone_key)
+        desktop.post(reverse('accounts:terminate_session', args=[session.pk]))
+        self.assertLoggedOut(phone, phone_key)
+        self.assertEqual(desktop.get(reverse('accounts:profile')).status_code, 200)
+
+    def test_terminate_session_of_another_user_is_refused(self):
+        phone, phone_key = self.login('Phone')
+        get_user_model().objects.create_user('other', 'other@example.com', PASSWORD)
+        other = Client()
+        other.post(reverse('accounts:login'), {'username': 'other', 'password': PASSWORD})
+        session = UserSession.objects.get(session_key=phone_key)
+        other.post(reverse('accounts:terminate_session', args=[session.pk]))
+        self.assertEqual(phone.get(reverse('accounts:profile')).status_code, 200)
+
+    def test_logout_revokes_the_session(self):
+        client, session_key = self.login('Browser A')
+        cookie = client.cookies['sessionid'].value
+        client.get(reverse('accounts:logout'))
+        # Replaying the old cookie must not log back in
+        client.cookies['sessionid'] = cookie
+        self.assertLoggedOut(client, session_key)
+
+
+class UserCacheInvalidationTests(TestCase):
+    """
+    A save() in one worker must reach the cached row every other worker
+    reads through CachedModelBackend
+    """
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        override = override_settings(CACHES=shared_cache_settings(self.cache_dir), PASSWORD_HASHERS=FAST_HASHERS)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = get_user_model().objects.create_user('nurse', 'nurse@example.com', PASSWORD)
+        # Prime the cache, then check it is really used
+        CachedModelBackend().get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            CachedModelBackend().get_user(self.user.pk)
+
+    def save(self, user=None, **kwargs):
+        user = user or get_user_model().objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in kwargs.items():
+                setattr(user, name, value)
+            user.save()
+        return user
+
+    def test_deactivation_is_seen(self):
+        self.save(is_active=False)
+        self.assertIsNone(CachedModelBackend().get_user(self.user.pk))
+
+    def test_lockout_is_seen(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                user.increment_failed_login()
+        self.assertTrue(CachedModelBackend().get_user(self.user.pk).is_account_locked())
+
+    def test_password_change_logs_other_sessions_out(self):
+        client = Client()
+        client.post(reverse('accounts:login'), {'username': 'nurse', 'password': PASSWORD})
+        self.assertEqual(client.get(reverse('accounts:profile')).status_code, 200)
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.set_password('Another-Horse-8')
+        self.save(user)
+        self.assertEqual(client.get(reverse('accounts:profile')).status_code, 302)
+
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_reads_the_database(self):
+        CachedModelBackend().get_user(self.user.pk)
+        with self.assertNumQueries(1):
+            CachedModelBackend().get_user(self.user.pk)
+        # Seen at once, before (and without) any version bump
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(CachedModelBackend().get_user(self.user.pk))
+
+
+class SharedCacheCheckTests(TestCase):
+
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_fails_deploy_check(self):
+        errors = check_shared_caches(None)
+        self.assertTrue(errors)
+        self.assertIsInstance(errors[0], Error)
+        self.assertEqual(errors[0].id, 'accounts.E001')
+
+    @override_settings(DEBUG=False, CACHES=shared_cache_settings('/tmp/unused'))
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_caches(None), [])
+
+    @override_settings(DEBUG=True, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_debug_allows_per_process_cache(self):
+        self.assertEqual(check_shared_caches(None), [])
+
+
+class PruneSecurityLogsTests(TestCase):
+
+    def setUp(self):
+        self.archive_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+
+    def attempts(self, count, days_ago):
+        ids = [
+            LoginAttempt.objects.create(username=f'user{i}', ip_address='10.0.0.1', failure_reason='Bad password').pk
+            for i in range(count)
+        ]
+        LoginAttempt.objects.filter(pk__in=ids).update(timestamp=timezone.now() - timedelta(days=days_ago))
+        return ids
+
+    def rolled_up_to(self, last_id):
+        RollupWatermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'last_id': last_id})
+
+    def prune(self):
+        call_command(
+            'prune_security_logs', archive_dir=str(self.archive_dir), days=90, chunk_size=2, sleep=0,
+            skip_reconcile=True, stdout=io.StringIO(),
+        )
+
+    def archived(self):
+        rows = []
+        for path in sorted((self.archive_dir / 'login_attempts').rglob('*.jsonl.gz')):
+            with gzip.open(path, 'rt', encoding='utf-8') as fh:
+                rows += [json.loads(line) for line in fh]
+        return rows
+
+    def state(self):
+        return json.loads((self.archive_dir / 'state.json').read_text())
+
+    def test_old_rows_are_archived_then_deleted(self):
+        old = self.attempts(5, days_ago=100)
+        recent = self.attempts(2, days_ago=1)
+        self.rolled_up_to(recent[-1])
+        self.prune()
+
+        rows = self.archived()
+        self.assertEqual([row['id'] for row in rows], old)
+        self.assertEqual(rows[0]['username'], 'user0')
+        self.assertEqual(rows[0]['failure_reason'], 'Bad password')
+        self.assertIn('user_agent', rows[0])
+        self.assertEqual(list(LoginAttempt.objects.order_by('pk').values_list('pk', flat=True)), recent)
+        self.assertIsNone(self.state()['login_attempts'])
+        # One file per chunk of two rows, named by its pk range
+        names = sorted(path.name.split('.')[1] for path in self.archive_dir.rglob('*.jsonl.gz'))
+        self.assertEqual(names, sorted([f'{old[0]}-{old[1]}', f'{old[2]}-{old[3]}', f'{old[4]}-{old[4]}']))
+
+    def test_rows_past_the_rollup_watermark_are_kept(self):
+        old = self.attempts(4, days_ago=100)
+        self.rolled_up_to(old[1])
+        self.prune()
+        self.assertEqual([row['id'] for row in self.archived()], old[:2])
+        self.assertEqual(list(LoginAttempt.objects.order_by('pk').values_list('pk', flat=True)), old[2:])
+
+    def test_nothing_is_pruned_before_the_first_rollup(self):
+        self.attempts(2, days_ago=100)
+        self.prune()
+        self.assertEqual(LoginAttempt.objects.count(), 2)
+        self.assertEqual(self.archived(), [])
+
+    def test_crash_before_delete_resumes_without_duplicates(self):
+        old = self.attempts(3, days_ago=100)
+        self.rolled_up_to(old[-1])
+        with mock.patch.object(QuerySet, 'delete', side_effect=RuntimeError('killed')):
+            with self.assertRaises(RuntimeError):
+                self.prune()
+        self.assertEqual(self.state()['login_attempts'], [old[0], old[1]])
+        self.assertEqual([row['id'] for row in self.archived()], old[:2])
+
+        self.prune()
+        self.assertEqual([row['id'] for row in self.archived()], old)
+        self.assertFalse(LoginAttempt.objects.exists())
+        self.assertEqual(list(self.archive_dir.rglob('*.tmp')), [])
+
+    def test_crash_after_delete_keeps_the_archive(self):
+        old = self.attempts(2, days_ago=100)
+        self.rolled_up_to(old[-1])
+        self.prune()
+        before = self.archived()
+        # As if the run died after the delete but before clearing the checkpoint
+        (self.archive_dir / 'state.json').write_text(json.dumps({'login_attempts': [old[0], old[1]]}))
+        self.prune()
+        self.assertEqual(self.archived(), before)
+        self.assertIsNone(self.state()['login_attempts'])
+
+
+class LoginRollupTests(TestCase):
+    HOUR = datetime(2026, 3, 1, 10, tzinfo=dt_timezone.utc)
+
+    def attempt(self, at, username='nurse', success=False, reason='Bad password'):
+        pk = LoginAttempt.objects.create(
+            username=username, ip_address='10.0.0.1', success=success, failure_reason='' if success else reason,
+        ).pk
+        LoginAttempt.objects.filter(pk=pk).update(timestamp=at)
+        return pk
+
+    def stats(self):
+        return {
+            (stat.bucket, stat.username): (stat.success_count, stat.failure_count, stat.failure_reasons, stat.top_failure_reason)
+            for stat in LoginStatHourly.objects.all()
+        }
+
+    def test_attempts_are_counted_per_hour(self):
+        self.attempt(self.HOUR)
+        self.attempt(self.HOUR + timedelta(minutes=30), reason='Locked')
+        self.attempt(self.HOUR + timedelta(minutes=40), reason='Locked')
+        last = self.attempt(self.HOUR + timedelta(minutes=59, seconds=59), success=True)
+        self.assertEqual(rollup_login_attempts(), 4)
+        self.assertEqual(self.stats(), {
+            (self.HOUR, 'nurse'): (1, 3, {'Bad password': 1, 'Locked': 2}, 'Locked'),
+        })
+        self.assertEqual(rolled_up_id(), last)
+
+    def test_hour_edges(self):
+        self.attempt(self.HOUR - timedelta(microseconds=1))
+        self.attempt(self.HOUR)
+        rollup_login_attempts()
+        self.assertEqual(set(self.stats()), {(self.HOUR - timedelta(hours=1), 'nurse'), (self.HOUR, 'nurse')})
+
+    def test_bucket_is_utc(self):
+        bangkok = dt_timezone(timedelta(hours=7))
+        self.assertEqual(hour_bucket(datetime(2026, 3, 1, 17, 45, tzinfo=bangkok)), self.HOUR)
+
+    def test_rerun_is_idempotent(self):
+        self.attempt(self.HOUR)
+        rollup_login_attempts()
+        before = self.stats()
+        self.assertEqual(rollup_login_attempts(), 0)
+        self.assertEqual(self.stats(), before)
+
+    def test_new_attempts_merge_into_existing_buckets(self):
+        self.attempt(self.HOUR)
+        rollup_login_attempts()
+        self.attempt(self.HOUR + timedelta(minutes=5), reason='Locked')
+        self.attempt(self.HOUR + timedelta(minutes=6), reason='Locked')
+        self.assertEqual(rollup_login_attempts(), 2)
+        self.assertEqual(self.stats(), {
+            (self.HOUR, 'nurse'): (0, 3, {'Bad password': 1, 'Locked': 2}, 'Locked'),
+        })
+
+    def test_batches_advance_the_watermark(self):
+        ids = [self.attempt(self.HOUR + timedelta(minutes=i)) for i in range(5)]
+        self.assertEqual(rollup_login_attempts(batch_size=2), 5)
+        self.assertEqual(rolled_up_id(), ids[-1])
+        self.assertEqual(self.stats()[(self.HOUR, 'nurse')][1], 5)
+
+    def test_recent_attempts_wait_for_the_next_run(self):
+        old = self.attempt(self.HOUR)
+        self.attempt(timezone.now())
+        self.attempt(self.HOUR + timedelta(minutes=1))
+        self.assertEqual(rollup_login_attempts(lag=timedelta(minutes=1)), 1)
+        # The watermark stops before the young row, so the row after it waits too
+        self.assertEqual(rolled_up_id(), old)
+        self.assertEqual(rollup_login_attempts(lag=timedelta(0)), 2)
+
+    def test_command(self):
+        self.attempt(self.HOUR)
+        out = io.StringIO()
+        call_command('rollup_login_stats', lag=0, stdout=out)
+        self.assertIn('Rolled up 1 login attempts', out.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, TIME_ZONE='Asia/Bangkok')
+@skipUnless(apps.is_installed('django.contrib.admin'), 'admin is not installed')
+class LoginAttemptChangeListTests(TestCase):
+    """Keyset pages, prefix search and date ranges on the LoginAttempt changelist"""
+    DAY = datetime(2026, 3, 1, tzinfo=dt_timezone(timedelta(hours=7)))
+
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser('root', 'root@example.com', PASSWORD)
+        self.client.force_login(admin)
+        self.url = reverse('admin:accounts_loginattempt_changelist')
+
+    def attempt(self, at, username='nurse'):
+        pk = LoginAttempt.objects.create(username=username, ip_address='10.0.0.1').pk
+        LoginAttempt.objects.filter(pk=pk).update(timestamp=at)
+        return pk
+
+    def shown(self, response):
+        return [obj.pk for obj in response.context['cl'].result_list]
+
+    def all_pages(self, params=None):
+        pages = []
+        url = self.url
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.shown(response))
+            next_url = response.context['cl'].next_page_url
+            if next_url is None:
+                return pages
+            response = self.client.get(self.url + next_url)
+
+    def test_pages_across_ties(self):
+        newest = self.attempt(self.DAY + timedelta(hours=2))
+        ties = [self.attempt(self.DAY + timedelta(hours=1)) for _ in range(5)]
+        oldest = self.attempt(self.DAY)
+        with mock.patch('accounts.admin.LoginAttemptAdmin.list_per_page', 2):
+            pages = self.all_pages()
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), [newest, *reversed(ties), oldest])
+
+    def test_page_size_equal_to_rows_has_no_next_page(self):
+        self.attempt(self.DAY)
+        self.attempt(self.DAY)
+        with mock.patch('accounts.admin.LoginAttemptAdmin.list_per_page', 2):
+            self.assertEqual(len(self.all_pages()), 1)
+
+    def test_bad_cursor_starts_from_the_top(self):
+        pk = self.attempt(self.DAY)
+        self.assertEqual(self.shown(self.client.get(self.url, {'cursor': 'nonsense'})), [pk])
+
+    def test_username_prefix_search(self):
+        nurse = self.attempt(self.DAY, 'nurse')
+        nurse2 = self.attempt(self.DAY, 'nurse2')
+        self.attempt(self.DAY, 'anurse')
+        self.attempt(self.DAY, 'Nurse')
+        self.assertEqual(sorted(self.shown(self.client.get(self.url, {'q': 'nurse'}))), [nurse, nurse2])
+
+    def test_prefix_filter_treats_wildcards_literally(self):
+        literal = self.attempt(self.DAY, 'a%b')
+        self.attempt(self.DAY, 'axb')
+        self.attempt(self.DAY, 'a_b')
+        self.assertEqual(list(LoginAttempt.objects.filter(prefix_filter('username', 'a%')).values_list('pk', flat=True)), [literal])
+
+    def test_date_range_is_local_days(self):
+        self.attempt(self.DAY - timedelta(microseconds=1))
+        first = self.attempt(self.DAY)
+        last = self.attempt(self.DAY + timedelta(hours=23, minutes=59))
+        self.attempt(self.DAY + timedelta(days=1))
+        response = self.client.get(self.url, {'timestamp__gte': '2026-03-01', 'timestamp__lt': '2026-03-02'})
+        self.assertEqual(sorted(self.shown(response)), [first, last])
+
+    def test_date_range_links(self):
+        today = self.attempt(timezone.now())
+        self.attempt(timezone.now() - timedelta(days=100))
+        response = self.client.get(self.url)
+        spec = next(spec for spec in response.context['cl'].filter_specs if spec.field_path == 'timestamp')
+        links = dict(spec.links)
+        self.assertEqual(set(links), {'Any date', 'Today', 'Past 7 days', 'Past 30 days', 'Past 90 days', 'Older than 90 days'})
+        params = {key: value.isoformat() for key, value in links['Today'].items()}
+        self.assertEqual(self.shown(self.client.get(self.url, params)), [today])
+
+    def test_count_is_capped(self):
+        for _ in range(5):
+            self.attempt(self.DAY)
+        paginator = EstimatedCountPaginator(LoginAttempt.objects.filter(username='nurse'), 2)
+        paginator.count_cap = 3
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.is_estimate)
+        paginator = EstimatedCountPaginator(LoginAttempt.objects.filter(username='nurse'), 2)
+        self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.is_estimate)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class CaseInsensitiveUserTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'Nurse', 'Nurse@Example.com', PASSWORD, first_name='Jane', last_name='Doe',
+        )
+
+    def assertDuplicate(self, **kwargs):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            get_user_model().objects.create_user(password=PASSWORD, **kwargs)
+
+    def test_username_differing_in_case_is_rejected(self):
+        self.assertDuplicate(username='nURSE', email='other@example.com')
+
+    def test_email_differing_in_case_is_rejected(self):
+        self.assertDuplicate(username='other', email='nurse@example.COM')
+
+    def test_blank_emails_may_repeat(self):
+        get_user_model().objects.create_user('a', '', PASSWORD)
+        get_user_model().objects.create_user('b', '', PASSWORD)
+
+    def test_validation_reports_the_constraint_message(self):
+        user = get_user_model()(username='NURSE', email='x@example.com')
+        with self.assertRaisesMessage(ValidationError, 'A user with that username already exists.'):
+            user.validate_constraints()
+
+    def test_search_name_is_kept_in_sync(self):
+        self.assertEqual(self.user.search_name, 'jane doe')
+        self.user.last_name = 'Smith'
+        self.user.save()
+        self.user.first_name = 'Janet'
+        self.user.save(update_fields=['first_name'])
+        self.assertEqual(get_user_model().objects.get(pk=self.user.pk).search_name, 'janet smith')
+        self.user.first_name = self.user.last_name = ''
+        self.user.save()
+        self.assertEqual(get_user_model().objects.get(pk=self.user.pk).search_name, '')
+
+    def test_migration_fills_search_name(self):
+        get_user_model().objects.update(search_name='')
+        migration = importlib.import_module('accounts.migrations.0007_customuser_search')
+        migration.fill_search_name(apps, None)
+        self.assertEqual(get_user_model().objects.get(pk=self.user.pk).search_name, 'jane doe')
+
+    @skipUnless(apps.is_installed('django.contrib.admin'), 'admin is not installed')
+    def test_admin_search_by_full_name(self):
+        admin = get_user_model().objects.create_superuser('root', 'root@example.com', PASSWORD)
+        self.client.force_login(admin)
+        url = reverse('admin:accounts_customuser_changelist')
+        for term in ('jane d', 'DOE', 'nur', 'nurse@ex'):
+            with self.subTest(term=term):
+                shown = self.client.get(url, {'q': term}).context['cl'].result_list
+                self.assertEqual([user.pk for user in shown], [self.user.pk])
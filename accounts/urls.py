@@ -15,4 +15,7 @@ urlpatterns = [
 
     # Session Management
     path('terminate-session/<int:session_id>/', views.terminate_session, name='terminate_session'),
+
+    # Security monitoring
+    path('security/', views.SecurityDashboardView.as_view(), name='security_dashboard'),
 ]
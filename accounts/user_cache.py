@@ -0,0 +1,66 @@
+"""
+Versioned cache of CustomUser rows for per-request authentication.
+
+Each user has a version token in the cache; cached rows are keyed by pk and
+that token. CustomUser.save() replaces the token once the transaction commits,
+so lockouts, password changes and is_active flips are never served stale.
+Bulk QuerySet.update() calls bypass save() and must call
+bump_user_cache_version() themselves.
+
+The token is only trustworthy when every worker reads the same cache; with a
+per-process backend outside DEBUG, enabled() is False and callers go to the
+database instead.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .checks import per_process
+
+VERSION_KEY = 'accounts:user-version:{pk}'
+USER_KEY = 'accounts:user:{pk}:{version}'
+
+
+def _alias():
+    return getattr(settings, 'ACCOUNTS_USER_CACHE_ALIAS', 'default')
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def _timeout():
+    return getattr(settings, 'ACCOUNTS_USER_CACHE_TIMEOUT', 300)
+
+
+def enabled():
+    """Whether a version bump in one worker is seen by all of them"""
+    return settings.DEBUG or not per_process(_alias())
+
+
+def get_user_cache_version(pk):
+    """Return the current version token for pk, creating one if missing"""
+    cache = _cache()
+    key = VERSION_KEY.format(pk=pk)
+    version = cache.get(key)
+    if version is None:
+        # A fresh random token (rather than restarting a counter) means an
+        # evicted version can never line up with a stale cached row.
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_user_cache_version(pk):
+    """Invalidate every cached copy of user pk"""
+    _cache().set(VERSION_KEY.format(pk=pk), uuid.uuid4().hex, None)
+
+
+def get_cached_user(pk, version):
+    return _cache().get(USER_KEY.format(pk=pk, version=version))
+
+
+def cache_user(user, version):
+    _cache().set(USER_KEY.format(pk=user.pk, version=version), user, _timeout())
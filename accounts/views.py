@@ -3,11 +3,16 @@ from django.contrib.auth import login, logout, authenticate, update_session_auth
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.views.generic import CreateView, UpdateView
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import CreateView, UpdateView, TemplateView
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncHour
 from django.utils import timezone
+from datetime import timedelta
 from .forms import SecureLoginForm, SecureUserCreationForm, SecurePasswordChangeForm, UserProfileForm
-from .models import CustomUser, LoginAttempt, UserSession
+from .models import CustomUser, LoginAttempt, LoginStatHourly, RollupWatermark, UserAgent, UserSession
+from .rollups import WATERMARK_NAME, hour_bucket
+from .sessions import revoke_session
 
 
 def get_client_ip(request):
@@ -34,7 +39,7 @@ def user_login(request):
         remember_me = request.POST.get('remember_me')
 
         ip_address = get_client_ip(request)
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        user_agent_id = UserAgent.objects.intern(request.META.get('HTTP_USER_AGENT', ''))
 
         try:
             user = CustomUser.objects.get(username=username)
@@ -44,7 +49,7 @@ def user_login(request):
                 LoginAttempt.objects.create(
                     username=username,
                     ip_address=ip_address,
-                    user_agent=user_agent,
+                    user_agent_id=user_agent_id,
                     success=False,
                     failure_reason='Account locked'
                 )
@@ -56,7 +61,7 @@ def user_login(request):
             LoginAttempt.objects.create(
                 username=username,
                 ip_address=ip_address,
-                user_agent=user_agent,
+                user_agent_id=user_agent_id,
                 success=False,
                 failure_reason='User does not exist'
             )
@@ -75,7 +80,7 @@ def user_login(request):
             LoginAttempt.objects.create(
                 username=username,
                 ip_address=ip_address,
-                user_agent=user_agent,
+                user_agent_id=user_agent_id,
                 success=True
             )
 
@@ -85,22 +90,10 @@ def user_login(request):
             else:
                 request.session.set_expiry(1209600)  # 2 weeks
 
+            # Session tracking is recorded by the user_logged_in receiver
+            # in accounts.signals
             login(request, user)
 
-            # Create session tracking after login (when session_key is guaranteed to exist)
-            # Use update_or_create to avoid duplicate session_key errors
-            if request.session.session_key:
-                UserSession.objects.update_or_create(
-                    session_key=request.session.session_key,
-                    defaults={
-                        'user': user,
-                        'ip_address': ip_address,
-                        'user_agent': user_agent,
-                        'is_active': True,
-                        'last_activity': timezone.now()
-                    }
-                )
-
             # Check if password change is required
             if user.needs_password_change():
                 messages.warning(request, 'Your password has expired. Please change it.')
@@ -117,7 +110,7 @@ def user_login(request):
                 LoginAttempt.objects.create(
                     username=username,
                     ip_address=ip_address,
-                    user_agent=user_agent,
+                    user_agent_id=user_agent_id,
                     success=False,
                     failure_reason='Invalid credentials'
                 )
@@ -138,11 +131,8 @@ def user_login(request):
 @login_required
 def user_logout(request):
     """Logout view with session cleanup"""
-    # Mark session as inactive
-    session_key = request.session.session_key
-    if session_key:
-        UserSession.objects.filter(session_key=session_key).update(is_active=False)
-
+    # logout() flushes the session; the session engine deletes it from the
+    # cache and database and marks the matching UserSession inactive
     logout(request)
     messages.success(request, 'You have been logged out successfully.')
     return redirect('healthcenter:home')
@@ -218,7 +208,7 @@ def user_profile(request):
     active_sessions = UserSession.objects.filter(
         user=request.user,
         is_active=True
-    ).order_by('-last_activity')
+    ).select_related('user_agent').order_by('-last_activity')
 
     context = {
         'form': form,
@@ -235,10 +225,74 @@ def terminate_session(request, session_id):
     """Terminate a specific session"""
     try:
         session = UserSession.objects.get(id=session_id, user=request.user)
-        session.is_active = False
-        session.save()
+        # Delete the real session so the terminated device is logged out
+        revoke_session(session.session_key)
         messages.success(request, 'Session terminated successfully.')
     except UserSession.DoesNotExist:
         messages.error(request, 'Session not found.')
 
     return redirect('accounts:profile')
+
+
+class SecurityDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """
+    Login activity dashboard for staff - reads only the LoginStatHourly
+    rollups (see manage.py rollup_login_stats), never LoginAttempt itself
+    """
+    template_name = 'accounts/security_dashboard.html'
+    login_url = '/secure-admin/login/'
+    max_days = 90
+
+    def test_func(self):
+        """Only allow staff and superuser"""
+        return self.request.user.is_staff or self.request.user.is_superuser
+
+    def get_days(self):
+        try:
+            days = int(self.request.GET.get('days', 7))
+        except ValueError:
+            days = 7
+        return min(max(days, 1), self.max_days)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        days = self.get_days()
+        since = hour_bucket(timezone.now()) - timedelta(days=days)
+        stats = LoginStatHourly.objects.filter(bucket__gte=since)
+
+        # Hourly bars for short windows, daily bars beyond two days
+        period = TruncHour('bucket') if days <= 2 else TruncDay('bucket')
+        series = list(
+            stats.annotate(period=period).values('period')
+            .annotate(successes=Sum('success_count'), failures=Sum('failure_count'))
+            .order_by('period')
+        )
+        peak = max((row['successes'] + row['failures'] for row in series), default=0)
+        for row in series:
+            row['success_pct'] = round(100 * row['successes'] / peak, 1) if peak else 0
+            row['failure_pct'] = round(100 * row['failures'] / peak, 1) if peak else 0
+
+        top_ips = (
+            stats.values('ip_address')
+            .annotate(failures=Sum('failure_count'), successes=Sum('success_count'))
+            .filter(failures__gt=0).order_by('-failures')[:10]
+        )
+        top_usernames = (
+            stats.values('username')
+            .annotate(failures=Sum('failure_count'), successes=Sum('success_count'))
+            .filter(failures__gt=0).order_by('-failures')[:10]
+        )
+        totals = stats.aggregate(successes=Sum('success_count'), failures=Sum('failure_count'))
+
+        context.update({
+            'days': days,
+            'day_choices': [1, 7, 30, self.max_days],
+            'hourly': days <= 2,
+            'series': series,
+            'top_ips': top_ips,
+            'top_usernames': top_usernames,
+            'total_successes': totals['successes'] or 0,
+            'total_failures': totals['failures'] or 0,
+            'watermark': RollupWatermark.objects.filter(name=WATERMARK_NAME).first(),
+        })
+        return context
@@ -14,3 +14,15 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Prime URLs, templates, connections and the main pages before taking
+# traffic (see core.warmup)
+from core.warmup import warmup_on_startup  # noqa: E402
+
+warmup_on_startup()
+
+# 103 Early Hints with the preload hints learned per page, on servers that
+# support them (see healthcenter.preload)
+from healthcenter.preload import early_hints  # noqa: E402
+
+application = early_hints(application)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,11 +48,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'healthcenter.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'healthcenter.middleware.PreloadHintsMiddleware',
+    'healthcenter.middleware.PageCacheMiddleware',
+    'healthcenter.middleware.HtmlMinifyMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -97,13 +102,17 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        # Bloom filter built by manage.py build_password_bloom; uses Django's
+        # CommonPasswordValidator until that file exists
+        'NAME': 'accounts.password_validation.BreachedPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
 ]
 
+PASSWORD_BLOOM_FILTER_PATH = BASE_DIR / 'data' / 'passwords.bloom'
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -124,6 +133,18 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# Link the hashed bundles from manage.py build_assets instead of the source
+# files (see healthcenter.assets); defaults to not DEBUG
+# ASSET_BUNDLES_ENABLED = True
+
+# Classes manage.py purge_css must keep although no template, script or stored
+# rich text mentions them; "re:<pattern>" entries are regular expressions
+CSS_PURGE_SAFELIST = []
+
+# Source .ttf/.otf files for manage.py build_web_fonts, which writes subsetted
+# WOFF2 files and fonts.css to static/fonts/web/
+WEB_FONTS_SOURCE_DIR = BASE_DIR / 'fonts'
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -137,21 +158,93 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 # Authentication Settings
+# The session user is loaded from a versioned cache that CustomUser.save()
+# invalidates (see accounts.user_cache)
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+ACCOUNTS_USER_CACHE_TIMEOUT = 300  # seconds
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'healthcenter:home'
 LOGOUT_REDIRECT_URL = 'accounts:login'
 
+# Cache
+# Sessions and other hot lookups are served from here, so every worker must
+# share it: a logout or revoked session held in one worker's memory would
+# stay valid in the others. REDIS_URL selects Redis (needs the redis
+# package); otherwise a file-based cache, shared by the workers of one host.
+# The per-process LocMemCache is only used with DEBUG (runserver), and
+# manage.py check --deploy rejects it (see accounts.checks).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'saireecmpo',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache',
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
+# Static snapshots of the public pages (see healthcenter.publisher), refreshed
+# on save; set to None to stop publishing
+STATIC_PUBLISH_ROOT = BASE_DIR / 'publish'
+
+# Public page cache (see healthcenter.page_cache): whole pages per audience,
+# invalidated when the models they show are saved or deleted
+PAGE_CACHE_TIMEOUT = 600  # seconds
+
+# Worker warmup (see core.warmup), run by core/wsgi.py and core/asgi.py
+WARMUP_ON_STARTUP = True
+WARMUP_PATHS = ['/', '/about/', '/portfolio/']
+
 # Session Security Settings
+# Sessions are read from the cache and written through to the database;
+# the engine also keeps accounts.UserSession in sync.
+SESSION_ENGINE = 'accounts.sessions'
+SESSION_CACHE_ALIAS = 'default'
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
 SESSION_COOKIE_SAMESITE = 'Lax'
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 
+# Security log retention (see manage.py prune_security_logs)
+SECURITY_LOG_RETENTION_DAYS = 90
+SECURITY_LOG_ARCHIVE_DIR = BASE_DIR / 'archive'
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = 'DENY'
 SECURE_CONTENT_TYPE_NOSNIFF = True
 
+# Uploads
+# MaxSizeUploadHandler stops storing a file once it passes
+# UPLOAD_MAX_FILE_SIZE; images are also checked against the pixel limits
+# from their header alone (see healthcenter.uploads)
+FILE_UPLOAD_HANDLERS = [
+    'healthcenter.uploads.MaxSizeUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_FILE_SIZE = 10 * 1024 * 1024  # bytes
+UPLOAD_MAX_IMAGE_PIXELS = 40_000_000
+UPLOAD_MAX_IMAGE_DIMENSION = 10000  # pixels, either side
+
+# Home page video facade: callable (provider, video_id) -> poster image
+# bytes or None, run by manage.py fetch_video_posters (never by a save). Use
+# 'healthcenter.video.fetch_poster' where outbound requests are allowed.
+VIDEO_POSTER_FETCHER = 'healthcenter.video.no_poster'
+
 # CKEditor 5 Configuration
 CKEDITOR_5_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
 CKEDITOR_5_UPLOAD_PATH = "uploads/"
@@ -0,0 +1,19 @@
+"""
+Lean settings for public-only web workers and short-lived CLI jobs.
+
+The same as core.settings, minus the admin and the editing apps
+(django_ckeditor_5 and crispy-forms), so Django neither imports them nor
+autodiscovers the admin modules at startup. Use it with
+DJANGO_SETTINGS_MODULE=core.settings_lean or manage.py --settings.
+
+Keep staff traffic (/secure-admin/, the create/update/delete pages and
+CKEditor uploads) on workers running core.settings: the edit forms need
+crispy-forms. So do jobs that delete content, because django_ckeditor_5's
+signals remove the images of deleted rich-text fields. Compare the two with
+manage.py profile_startup.
+"""
+from .settings import *  # noqa: F401,F403
+
+EDITOR_APPS = ['django.contrib.admin', 'django_ckeditor_5', 'crispy_forms', 'crispy_bootstrap5']
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in EDITOR_APPS]  # noqa: F405
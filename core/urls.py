@@ -14,7 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
@@ -22,10 +22,21 @@ from django.conf import settings
 urlpatterns = [
     path('', include('healthcenter.urls', namespace='healthcenter')),
     path('accounts/', include('accounts.urls', namespace='accounts')),
-    path('secure-admin/', admin.site.urls, name='secure-admin'),
     #path('admin/', include('admin_honeypot.urls', namespace='admin')),
-    path('ckeditor5/', include('django_ckeditor_5.urls')),
 ]
+# Left out by core.settings_lean
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('secure-admin/', admin.site.urls, name='secure-admin'))
+if apps.is_installed('django_ckeditor_5'):
+    from healthcenter.views import ckeditor_upload
+
+    urlpatterns += [
+        # Checked replacement for django_ckeditor_5's upload view (same name)
+        path('ckeditor5/image_upload/', ckeditor_upload, name='ck_editor_5_upload_file'),
+        path('ckeditor5/', include('django_ckeditor_5.urls')),
+    ]
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
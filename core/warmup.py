@@ -0,0 +1,146 @@
+"""
+Worker warmup.
+
+A fresh worker pays on its first requests for populating the URL resolver,
+compiling templates, loading the crispy-forms template pack and connecting
+to the database and caches. warmup() does all of that up front, then renders
+WARMUP_PATHS through the full middleware stack so view code, per-page state
+(asset manifests, preload hints) and the page cache are warm too.
+
+core/wsgi.py and core/asgi.py call it when the application is loaded, unless
+WARMUP_ON_STARTUP is off; manage.py warmup runs it by hand. A step that
+fails is logged and skipped: a cold worker is better than no worker.
+
+Every database connection is closed when the steps are done: one opened in
+the warmup thread under ASGI would otherwise never be closed, and one opened
+before a preloading server forks would be shared by its workers. The first
+request reconnects.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATES = [
+    'healthcenter/base_0.html',
+    'healthcenter/base.html',
+    'healthcenter/home.html',
+    'healthcenter/header.html',
+    'healthcenter/footer.html',
+    'healthcenter/user_menu.html',
+]
+
+
+def resolve_urls():
+    from django.urls import get_resolver, reverse
+
+    get_resolver()._populate()
+    reverse('healthcenter:home')
+
+
+def compile_templates():
+    from django.template.loader import get_template
+
+    for name in getattr(settings, 'WARMUP_TEMPLATES', DEFAULT_TEMPLATES):
+        get_template(name)
+
+
+def load_form_templates():
+    from django.apps import apps
+
+    if not apps.is_installed('crispy_forms'):
+        return
+    from crispy_forms.utils import render_crispy_form
+    from django.middleware.csrf import get_token
+    from django.test import RequestFactory
+
+    from healthcenter.forms import HomeForm
+
+    # Loads the template pack and the widget templates; the <form> tag wants
+    # a CSRF token, so it gets one from a throwaway request
+    request = RequestFactory().get('/')
+    render_crispy_form(HomeForm(), context={'request': request, 'csrf_token': get_token(request)})
+
+
+def connect_databases():
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def connect_caches():
+    from django.core.cache import caches
+
+    for cache in caches.all(initialized_only=False):
+        cache.get('warmup')
+
+
+def render_pages():
+    from healthcenter.publisher import Renderer
+
+    renderer = Renderer()
+    for path in getattr(settings, 'WARMUP_PATHS', ['/']):
+        response = renderer.render(path)
+        # Streamed pages do their work as they are read
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        if response.status_code >= 400:
+            raise RuntimeError(f'{path} returned {response.status_code}')
+
+
+STEPS = [
+    ('urls', resolve_urls),
+    ('templates', compile_templates),
+    ('forms', load_form_templates),
+    ('database', connect_databases),
+    ('caches', connect_caches),
+    ('pages', render_pages),
+]
+
+
+def run_steps():
+    """[(step, seconds, error or None)] for every step"""
+    timings = []
+    for name, step in STEPS:
+        start = time.perf_counter()
+        error = None
+        try:
+            step()
+        except Exception as exc:
+            error = exc
+            logger.warning('Warmup step %s failed', name, exc_info=True)
+        timings.append((name, time.perf_counter() - start, error))
+    from django.db import connections
+
+    connections.close_all()
+    return timings
+
+
+def warmup():
+    """Run every step; returns run_steps()' timings"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        timings = run_steps()
+    else:
+        # ASGI servers may load the application inside their event loop,
+        # where Django refuses to touch the database
+        result = []
+        thread = threading.Thread(target=lambda: result.extend(run_steps()))
+        thread.start()
+        thread.join()
+        timings = result
+    logger.info('Warmup: %s', ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds, _ in timings))
+    return timings
+
+
+def warmup_on_startup():
+    if getattr(settings, 'WARMUP_ON_STARTUP', True):
+        warmup()
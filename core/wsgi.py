@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Prime URLs, templates, connections and the main pages before taking
+# traffic (see core.warmup)
+from core.warmup import warmup_on_startup  # noqa: E402
+
+warmup_on_startup()
@@ -1,9 +1,36 @@
 from django.contrib import admin
 from .models import About, Content, Home, CategoryPortfolio, Portfolio
+from .projection import ProjectedAdminMixin
 # Register your models here.
 
-admin.site.register(About)
-admin.site.register(Content)
-admin.site.register(Home)
+# Changelists load only the columns they display (list_only); the rich text
+# bodies are read on the change form alone.
+
+
+@admin.register(About)
+class AboutAdmin(ProjectedAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'email', 'phone', 'is_active', 'updated_at')
+    list_filter = ('is_active',)
+    list_only = ('id', 'title', 'email', 'phone', 'is_active', 'updated_at')
+
+
+@admin.register(Content)
+class ContentAdmin(ProjectedAdminMixin, admin.ModelAdmin):
+    list_display = ('heading', 'updated_at')
+    list_only = ('id', 'heading', 'updated_at')
+
+
+@admin.register(Home)
+class HomeAdmin(ProjectedAdminMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'banner_title', 'updated_at')
+    list_only = ('id', 'banner_title', 'updated_at')
+
+
 admin.site.register(CategoryPortfolio)
-admin.site.register(Portfolio)
\ No newline at end of file
+
+
+@admin.register(Portfolio)
+class PortfolioAdmin(ProjectedAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'category', 'created_at')
+    list_select_related = ('category',)
+    list_only = ('id', 'title', 'created_at', 'category__id', 'category__name')
@@ -0,0 +1,253 @@
+"""
+Per-page JS/CSS bundles.
+
+A page lists the bundles it needs with {% bundle 'aos' 'isotope' %} in its
+{% block bundles %}; the base template then emits only those (plus 'site' and
+'main', which every page gets) with {% bundle_css %} in <head> and
+{% bundle_js %} before </body>. Bundles are always emitted in BUNDLES order,
+whatever order pages declare them in, so 'main' (main.js and main.css) comes
+after the vendor code it drives.
+
+manage.py build_assets concatenates and minifies each bundle into a
+content-hashed file under static/bundles/ and records them in
+manifest.json. With ASSET_BUNDLES_ENABLED off (the default under DEBUG), or
+before a build, the tags link the source files one by one instead.
+"""
+import hashlib
+import json
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+OUTPUT_PREFIX = 'bundles'
+MANIFEST = 'manifest.json'
+
+DEFAULT_BUNDLES = {
+    'site': {
+        'css': [
+            'assets/vendor/bootstrap/css/bootstrap.min.css',
+            'assets/vendor/bootstrap-icons/bootstrap-icons.css',
+        ],
+        'js': ['assets/vendor/bootstrap/js/bootstrap.bundle.min.js'],
+    },
+    'aos': {
+        'css': ['assets/vendor/aos/aos.css'],
+        'js': ['assets/vendor/aos/aos.js'],
+    },
+    'glightbox': {
+        'css': ['assets/vendor/glightbox/css/glightbox.min.css'],
+        'js': ['assets/vendor/glightbox/js/glightbox.min.js'],
+    },
+    'isotope': {
+        'js': [
+            'assets/vendor/imagesloaded/imagesloaded.pkgd.min.js',
+            'assets/vendor/isotope-layout/isotope.pkgd.min.js',
+        ],
+    },
+    'swiper': {
+        'css': ['assets/vendor/swiper/swiper-bundle.min.css'],
+        'js': ['assets/vendor/swiper/swiper-bundle.min.js'],
+    },
+    'forms': {
+        'js': ['assets/vendor/php-email-form/validate.js'],
+    },
+    'main': {
+        'css': ['assets/css/main.css'],
+        'js': ['assets/js/main.js'],
+    },
+}
+# Emitted on every page
+ALWAYS = ('site', 'main')
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+SOURCE_MAP = re.compile(r'^\s*(?://|/\*)[#@] sourceMappingURL=.*$', re.MULTILINE)
+CHARSET = re.compile(r'@charset\s+"[^"]*";\s*', re.IGNORECASE)
+
+
+def bundles():
+    return getattr(settings, 'ASSET_BUNDLES', DEFAULT_BUNDLES)
+
+
+def enabled():
+    return getattr(settings, 'ASSET_BUNDLES_ENABLED', not settings.DEBUG)
+
+
+def output_dir():
+    return Path(settings.STATICFILES_DIRS[0]) / OUTPUT_PREFIX
+
+
+def ordered(names):
+    """names (plus ALWAYS) in BUNDLES order; unknown names raise KeyError"""
+    config = bundles()
+    wanted = set(names) | set(ALWAYS)
+    unknown = wanted - set(config)
+    if unknown:
+        raise KeyError(f'Unknown asset bundle(s): {", ".join(sorted(unknown))}')
+    return [name for name in config if name in wanted]
+
+
+def rebase_css_urls(css, source, target):
+    """Rewrite relative url()s in css, read from static path source, for a file at target"""
+    source_dir = posixpath.dirname(source)
+    target_dir = posixpath.dirname(target)
+
+    def replace(match):
+        url = match.group(2).strip()
+        if url.startswith(('/', '#', 'data:')) or re.match(r'^[a-z][a-z0-9+.-]*:', url, re.IGNORECASE):
+            return match.group(0)
+        path, sep, rest = _split_url(url)
+        rebased = posixpath.relpath(posixpath.normpath(posixpath.join(source_dir, path)), target_dir)
+        return f'url("{rebased}{sep}{rest}")'
+
+    return CSS_URL.sub(replace, css)
+
+
+def absolute_css_urls(css, source):
+    """Rewrite relative url()s in css, read from static path source, to full static URLs for inlining"""
+    from django.templatetags.static import static
+
+    source_dir = posixpath.dirname(source)
+
+    def replace(match):
+        url = match.group(2).strip()
+        if url.startswith(('/', '#', 'data:')) or re.match(r'^[a-z][a-z0-9+.-]*:', url, re.IGNORECASE):
+            return match.group(0)
+        path, sep, rest = _split_url(url)
+        return f'url("{static(posixpath.normpath(posixpath.join(source_dir, path)))}{sep}{rest}")'
+
+    return CSS_URL.sub(replace, css)
+
+
+def _split_url(url):
+    match = re.match(r'([^?#]*)([?#]?)(.*)', url)
+    return match.group(1), match.group(2), match.group(3)
+
+
+def minify_css(css):
+    try:
+        import rcssmin
+    except ImportError:
+        css = re.sub(r'/\*(?!!).*?\*/', '', css, flags=re.DOTALL)
+        css = re.sub(r'\s+', ' ', css)
+        css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+        return css.replace(';}', '}').strip()
+    return rcssmin.cssmin(css)
+
+
+def minify_js(js):
+    # Without rjsmin, vendor files (already .min) are only concatenated
+    try:
+        import rjsmin
+    except ImportError:
+        return js
+    return rjsmin.jsmin(js)
+
+
+def _read(path):
+    found = finders.find(path)
+    if not found:
+        raise FileNotFoundError(f'Static file {path} not found')
+    return Path(found).read_text(encoding='utf-8')
+
+
+def build_bundle(name, kind, files, css_filter=None):
+    """
+    (static path, bytes) of one bundle, written to output_dir(); css_filter,
+    if given, is called as css_filter(css, path) on each stylesheet
+    """
+    parts = []
+    for path in files:
+        text = SOURCE_MAP.sub('', _read(path))
+        if kind == 'css':
+            text = CHARSET.sub('', rebase_css_urls(text, path, f'{OUTPUT_PREFIX}/{name}.css'))
+            if css_filter is not None:
+                text = minify_css(css_filter(text, path))
+            elif '.min.' not in path:
+                text = minify_css(text)
+        else:
+            text = text if '.min.' in path else minify_js(text)
+        parts.append(f'/* {path} */\n{text.strip()}\n')
+    content = (';\n' if kind == 'js' else '\n').join(parts).encode('utf-8')
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    filename = f'{name}.{digest}.{kind}'
+    output = output_dir()
+    output.mkdir(parents=True, exist_ok=True)
+    (output / filename).write_bytes(content)
+    return f'{OUTPUT_PREFIX}/{filename}', content
+
+
+def build(css_filter=None):
+    """Write every bundle and the manifest; returns the manifest"""
+    output = output_dir()
+    if output.is_dir():
+        for old in list(output.glob('*.css')) + list(output.glob('*.js')):
+            old.unlink()
+    manifest = {}
+    for name, config in bundles().items():
+        entry = {}
+        for kind in ('css', 'js'):
+            if config.get(kind):
+                path, content = build_bundle(name, kind, config[kind], css_filter)
+                entry[kind] = path
+                entry[f'{kind}_bytes'] = len(content)
+        manifest[name] = entry
+    (output / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return manifest
+
+
+_manifest = {}
+
+
+def load_manifest():
+    """The manifest written by build(), re-read when it changes; {} if there is none"""
+    path = output_dir() / MANIFEST
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _manifest.get('mtime') != mtime:
+        _manifest.update(mtime=mtime, data=json.loads(path.read_text(encoding='utf-8')))
+    return _manifest['data']
+
+
+def source_files(kind):
+    """Filesystem paths of every source file of the given kind, in bundle order"""
+    return [finders.find(path) for config in bundles().values() for path in config.get(kind, [])]
+
+
+def critical_path(page):
+    return output_dir() / 'critical' / f'{page}.css'
+
+
+_critical = {}
+
+
+def load_critical(page):
+    """Inlinable above-the-fold CSS for page from manage.py purge_css, or None"""
+    if not enabled():
+        return None
+    path = critical_path(page)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _critical.get(page)
+    if cached is None or cached[0] != mtime:
+        _critical[page] = cached = (mtime, path.read_text(encoding='utf-8'))
+    return cached[1]
+
+
+def files_for(names, kind):
+    """Static paths to link for the given bundles"""
+    manifest = load_manifest() if enabled() else {}
+    paths = []
+    for name in ordered(names):
+        built = manifest.get(name, {}).get(kind)
+        if built:
+            paths.append(built)
+        elif not manifest.get(name):
+            paths += bundles()[name].get(kind, [])
+    return paths
@@ -0,0 +1,184 @@
+"""
+HTML minification and response compression.
+
+HtmlMinifier collapses runs of whitespace and drops comments, but copies
+<pre>, <textarea>, <script> and <style> elements through untouched. It keeps
+conditional comments and the page cache's user-menu markers. It works
+chunk by chunk, remembering across chunks whether it is inside one of those
+elements and holding back a tag cut off at the end of a chunk, so streamed
+pages can be minified as they go out.
+
+encoding_for() picks br (when the brotli package is installed) or gzip from
+Accept-Encoding, and compress()/compress_stream() apply it.
+"""
+import gzip
+import re
+import zlib
+
+from .page_cache import HOLE_END, HOLE_START
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Elements whose content is copied verbatim, and comments
+RAW_START = re.compile(r'<!--|<(pre|textarea|script|style)\b', re.IGNORECASE)
+KEEP_COMMENTS = (HOLE_START.decode(), HOLE_END.decode(), '<!--[if', '<!--<![endif]')
+NEWLINE_RUN = re.compile(r'[ \t\r\f\v]*\n\s*')
+SPACE_RUN = re.compile(r'[ \t\r\f\v]{2,}')
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+MIN_SIZE = 200
+# Longest unfinished tag held back at the end of a chunk
+TAIL_LIMIT = 4096
+
+
+def collapse_whitespace(text):
+    return SPACE_RUN.sub(' ', NEWLINE_RUN.sub('\n', text))
+
+
+class HtmlMinifier:
+    """
+    Incremental minifier; feed() each chunk in order, then close(), and
+    join the results
+    """
+
+    def __init__(self):
+        self.raw_until = None
+        self.pending = ''
+        # Whether the output so far ends in collapsed whitespace
+        self.space = False
+
+    def feed(self, text):
+        text = self.pending + text
+        text, self.pending = self._split_tail(text)
+        return self._minify(text)
+
+    def close(self):
+        text, self.pending = self.pending, ''
+        return self._minify(text)
+
+    def _split_tail(self, text):
+        """
+        (ready, held back): the tail that may continue in the next chunk, an
+        unfinished tag or end of comment and trailing whitespace, waits for it
+        """
+        cut = len(text.rstrip())
+        start = text.rfind('<', 0, cut)
+        if start != -1 and text.find('>', start) == -1 and cut - start <= TAIL_LIMIT:
+            cut = start
+        elif self.raw_until == '-->':
+            cut = len(text[:cut].rstrip('-'))
+        return text[:cut], text[cut:]
+
+    def _minify(self, text):
+        out = []
+        pos = 0
+        lower = text.lower()
+        while pos < len(text):
+            if self.raw_until:
+                end = lower.find(self.raw_until, pos)
+                if end == -1:
+                    self._verbatim(out, text[pos:])
+                    break
+                end += len(self.raw_until)
+                self._verbatim(out, text[pos:end])
+                pos = end
+                self.raw_until = None
+                continue
+            match = RAW_START.search(text, pos)
+            if match is None:
+                self._collapse(out, text[pos:])
+                break
+            self._collapse(out, text[pos:match.start()])
+            if match.group(1):
+                self.raw_until = f'</{match.group(1).lower()}'
+                self._verbatim(out, text[match.start():match.end()])
+                pos = match.end()
+                continue
+            end = text.find('-->', match.end())
+            if end == -1:
+                # The comment carries on into the next chunk: keep it whole
+                self.raw_until = '-->'
+                self._verbatim(out, text[match.start():])
+                break
+            comment = text[match.start():end + 3]
+            if comment.startswith(KEEP_COMMENTS):
+                self._verbatim(out, comment)
+            pos = end + 3
+        return ''.join(out)
+
+    def _verbatim(self, out, text):
+        if text:
+            out.append(text)
+            self.space = False
+
+    def _collapse(self, out, text):
+        text = collapse_whitespace(text)
+        if self.space:
+            # Whitespace on both sides of a dropped comment
+            text = text.lstrip()
+        if text:
+            out.append(text)
+            self.space = text[-1].isspace()
+
+def minify_html(html):
+    minifier = HtmlMinifier()
+    return minifier.feed(html) + minifier.close()
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def encoding_for(header):
+    """'br', 'gzip' or None for an Accept-Encoding header"""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get('*', 0)
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def is_compressible(content_type):
+    return content_type.split(';')[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of bytes, flushing after every chunk so streamed output stays streamed"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -1,32 +1,32 @@
 from django import forms
 from .models import About, Content, Home, Portfolio
-from django_ckeditor_5.widgets import CKEditor5Widget
+from .widgets import LazyCKEditor5Widget
 import datetime
 
 class AboutForm(forms.ModelForm):
     mission = forms.CharField(
-        widget=CKEditor5Widget(config_name='default'),
+        widget=LazyCKEditor5Widget(config_name='default'),
         help_text="Mission statement"
     )
     vision = forms.CharField(
-        widget=CKEditor5Widget(config_name='default'),
+        widget=LazyCKEditor5Widget(config_name='default'),
         help_text="Vision statement"
     )
     history = forms.CharField(
         required=False,
-        widget=CKEditor5Widget(config_name='default'),
+        widget=LazyCKEditor5Widget(config_name='default'),
         help_text="Organization history (optional)"
     )
     description = forms.CharField(
-        widget=CKEditor5Widget(config_name='default'),
+        widget=LazyCKEditor5Widget(config_name='default'),
         help_text="General description"
     )
     address = forms.CharField(
-        widget=CKEditor5Widget(config_name='default'),
+        widget=LazyCKEditor5Widget(config_name='default'),
         help_text="Complete address"
     )
     working_hours = forms.CharField(
-        widget=CKEditor5Widget(config_name='default'),
+        widget=LazyCKEditor5Widget(config_name='default'),
         help_text="e.g., Mon-Fri: 8:00 AM - 4:30 PM"
     )
 
@@ -77,7 +77,7 @@ class AboutForm(forms.ModelForm):
     
 class ContentForm(forms.ModelForm):
     body = forms.CharField(
-        widget=CKEditor5Widget(config_name='default'),
+        widget=LazyCKEditor5Widget(config_name='default'),
         help_text="Content body"
     )
 
@@ -88,14 +88,23 @@ class ContentForm(forms.ModelForm):
             'heading': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter heading'}),
         }
 
-from crispy_forms.helper import FormHelper
-from crispy_forms.layout import Submit
+
+def save_helper():
+    """crispy-forms helper with a Save button; crispy is imported only when a form is built"""
+    from crispy_forms.helper import FormHelper
+    from crispy_forms.layout import Submit
+
+    helper = FormHelper()
+    helper.add_input(Submit('submit', 'Save', css_class='btn btn-primary mt-3'))
+    # The template adds form.media itself
+    helper.include_media = False
+    return helper
+
 
 class HomeForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.add_input(Submit('submit', 'Save', css_class='btn btn-primary mt-3'))
+        self.helper = save_helper()
 
     class Meta:
         model = Home
@@ -109,23 +118,23 @@ class HomeForm(forms.ModelForm):
             'banner_description_1': forms.Textarea(attrs={'class': 'form-control', 'placeholder': 'Banner description 1'}),
             'banner_description_2': forms.Textarea(attrs={'class': 'form-control', 'placeholder': 'Banner description 2'}),
             'banner_description_3': forms.Textarea(attrs={'class': 'form-control', 'placeholder': 'Banner description 3'}),
+            'welcome_message': LazyCKEditor5Widget(config_name='default'),
+            'short_description': LazyCKEditor5Widget(config_name='default'),
+            'vision': LazyCKEditor5Widget(config_name='default'),
+            'mission': LazyCKEditor5Widget(config_name='default'),
         }
 
-from crispy_forms.helper import FormHelper
-from crispy_forms.layout import Submit
-
 class PortFolioForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.add_input(Submit('submit', 'Save', css_class='btn btn-primary mt-3'))
+        self.helper = save_helper()
 
     class Meta:
         model = Portfolio
         fields = ['title', 'description', 'category', 'image']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter portfolio title'}),
-            'description': CKEditor5Widget(config_name='default')
+            'description': LazyCKEditor5Widget(config_name='default')
         }
         labels = {
             'title': 'Portfolio Title',
@@ -0,0 +1,100 @@
+"""
+Re-encoding of images uploaded through CKEditor.
+
+Every upload is decoded once, rotated upright from its EXIF orientation, and
+written back out without metadata at up to MAX_WIDTH pixels wide, plus a
+narrower copy for each of WIDTHS. Files are named after a hash of the
+upload, so uploading the same image twice reuses the stored copies.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django_ckeditor_5.storage_utils import get_django_storage_class
+from PIL import Image, ImageOps
+
+from .models import InlineImage
+from .uploads import open_image
+
+WIDTHS = (480, 960)
+MAX_WIDTH = 1600
+JPEG_QUALITY = 82
+
+
+def upload_path():
+    return getattr(settings, 'CKEDITOR_5_UPLOAD_PATH', 'uploads/')
+
+
+def _digest(file):
+    hasher = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(64 * 1024), b''):
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()[:24]
+
+
+def _resize(image, width):
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def _encode(image, fmt, icc_profile):
+    # Only the ICC profile is carried over: EXIF, XMP and comments are dropped
+    buffer = io.BytesIO()
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if fmt == 'JPEG':
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True, **options)
+    else:
+        image.save(buffer, 'PNG', optimize=True, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def process_upload(file):
+    """
+    Store file (already validated by validate_image_upload) as a set of
+    re-encoded widths and return its InlineImage
+    """
+    name_root = upload_path() + _digest(file)
+    existing = InlineImage.objects.filter(name__startswith=name_root + '.').first()
+    if existing:
+        return existing
+
+    image = open_image(file)
+    storage = get_django_storage_class()()
+    if getattr(image, 'is_animated', False):
+        # Re-encoding would keep only the first frame; GIFs carry no EXIF
+        file.seek(0)
+        name = storage.save(f'{name_root}.gif', file)
+        inline_image, _ = InlineImage.objects.get_or_create(
+            name=name, defaults={'width': image.width, 'height': image.height},
+        )
+        return inline_image
+
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    fmt, ext = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    full = _resize(image, MAX_WIDTH)
+    variants = []
+    for width in WIDTHS:
+        if width < full.width:
+            variant_name = storage.save(f'{name_root}-{width}w.{ext}', _encode(_resize(full, width), fmt, icc_profile))
+            variants.append([width, variant_name])
+    name = storage.save(f'{name_root}.{ext}', _encode(full, fmt, icc_profile))
+    inline_image, _ = InlineImage.objects.get_or_create(
+        name=name, defaults={'width': full.width, 'height': full.height, 'variants': variants},
+    )
+    return inline_image
+
+
+def process_stored(name):
+    """Re-encode a file already in storage (see optimize_inline_images)"""
+    storage = get_django_storage_class()()
+    with storage.open(name, 'rb') as fh:
+        return process_upload(fh)
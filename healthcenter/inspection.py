@@ -0,0 +1,139 @@
+"""
+Single-pass input inspection for user-submitted text.
+
+Every rule in a ruleset is compiled once, at import time, into one regular
+expression alternation with a named group per rule, so a value is scanned
+once no matter how many rules apply. Rules only use bounded quantifiers, which
+keeps the scan linear in the length of the input, and anything longer than
+INSPECTION_MAX_LENGTH is rejected without being scanned at all.
+
+Findings are reported as (rule id, offset) pairs. The security log gets those
+and the input length, never the submitted value itself.
+"""
+import logging
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger('security')
+
+Rule = namedtuple('Rule', 'id pattern')
+Finding = namedtuple('Finding', 'rule offset')
+
+# Reported when a value is over the length cap; it is not scanned further
+OVERSIZE = 'input_too_large'
+DEFAULT_MAX_LENGTH = 2 * 1024 * 1024
+
+# A SQL name: a column or table, possibly qualified or quoted
+SQL_NAME = r'[\w.`"\[\]]{1,64}'
+
+# Keywords only count in statement shapes ("select * from", "drop table",
+# "update x set y ="), and comment markers only after a closing quote or
+# parenthesis, so ordinary prose ("Select your appointment", "Clinic #1 --
+# open") passes
+SQL_RULES = (
+    Rule('sql_keyword', '|'.join([
+        r'\bunion\s{1,8}(?:all\s{1,8})?select\b',
+        rf'\bselect\s{{1,8}}(?:\*|{SQL_NAME}(?:\s{{0,8}},\s{{0,8}}{SQL_NAME}){{1,16}})\s{{1,8}}from\b',
+        rf'\bselect\s{{1,8}}{SQL_NAME}\s{{1,8}}from\s{{1,8}}{SQL_NAME}\s{{0,8}}(?:where\b|limit\b|order\s{{1,8}}by\b|;|--|/\*)',
+        rf'\binsert\s{{1,8}}into\s{{1,8}}{SQL_NAME}\s{{0,8}}(?:\(|values\b|select\b)',
+        rf'\bupdate\s{{1,8}}{SQL_NAME}\s{{1,8}}set\s{{1,8}}{SQL_NAME}\s{{0,8}}=',
+        rf'\bdelete\s{{1,8}}from\s{{1,8}}{SQL_NAME}\s{{0,8}}(?:where\b|;|--|/\*|$)',
+        r'\b(?:create|drop|alter|truncate)\s{1,8}(?:table|database|schema|view|index|procedure|function|trigger)\b',
+        r'\bexec(?:ute)?\s{0,8}(?:\(|(?:xp|sp)_\w)',
+    ])),
+    Rule('sql_comment', r'[\'"`)]\s{0,8}(?:--|#|/\*)|/\*.{0,256}?\*/'),
+    Rule('sql_tautology', r'''\b(?:or|and)\s{1,8}['"]?\w{1,32}['"]?\s{0,8}=\s{0,8}['"]?\w{1,32}'''),
+)
+
+SHELL_RULES = (
+    Rule('shell_metachar', r'[|&;$`\n()<>]'),
+)
+
+# Matched ahead of the rules in rich HTML and skipped: tags (with their
+# attributes) and character references are markup, not text the user typed
+HTML_MARKUP = r'<[!/?a-zA-Z][^<>]{0,2048}>|&(?:#\d{1,7}|#x[0-9a-fA-F]{1,6}|[a-zA-Z]\w{0,31});'
+
+
+class Ruleset:
+    """A set of rules compiled into a single case-insensitive alternation"""
+
+    def __init__(self, name, rules, skip=None):
+        self.name = name
+        self.rules = tuple(rules)
+        alternatives = [f'(?P<{rule.id}>{rule.pattern})' for rule in self.rules]
+        if skip:
+            alternatives.insert(0, f'(?:{skip})')
+        self.regex = re.compile('|'.join(alternatives), re.IGNORECASE)
+
+    def scan(self, value, max_length=None, limit=None):
+        """
+        Return the findings for value, in order of offset.
+
+        Stops after limit findings when limit is given; a value longer than
+        max_length yields a single OVERSIZE finding.
+        """
+        if max_length is None:
+            max_length = getattr(settings, 'INSPECTION_MAX_LENGTH', DEFAULT_MAX_LENGTH)
+        if len(value) > max_length:
+            return [Finding(OVERSIZE, max_length)]
+        findings = []
+        for match in self.regex.finditer(value):
+            rule = match.lastgroup
+            if rule is None:  # markup skipped by the ruleset
+                continue
+            findings.append(Finding(rule, match.start()))
+            if limit and len(findings) >= limit:
+                break
+        return findings
+
+
+RULESETS = {
+    'plain_text': Ruleset('plain_text', SQL_RULES),
+    'rich_html': Ruleset('rich_html', SQL_RULES, skip=HTML_MARKUP),
+    'shell': Ruleset('shell', SHELL_RULES),
+}
+
+
+def inspect(value, ruleset='plain_text', limit=None):
+    """Scan value with the named ruleset and return its findings"""
+    return RULESETS[ruleset].scan(str(value), limit=limit)
+
+
+@deconstructible
+class InspectionValidator:
+    """
+    Model/form field validator that rejects values with any finding.
+
+    Only the first few findings are collected and logged; one is enough to
+    reject the value.
+    """
+    max_findings = 5
+
+    def __init__(self, ruleset='plain_text', message='Invalid input', code='invalid'):
+        if ruleset not in RULESETS:
+            raise ValueError(f'Unknown inspection ruleset: {ruleset}')
+        self.ruleset = ruleset
+        self.message = message
+        self.code = code
+
+    def __call__(self, value):
+        value = str(value)
+        findings = inspect(value, self.ruleset, limit=self.max_findings)
+        if findings:
+            logger.warning(
+                'Input rejected by %s ruleset: %s (length %d)',
+                self.ruleset,
+                ', '.join(f'{finding.rule}@{finding.offset}' for finding in findings),
+                len(value),
+            )
+            raise ValidationError(self.message, code=self.code)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, InspectionValidator)
+            and (self.ruleset, self.message, self.code) == (other.ruleset, other.message, other.code)
+        )
@@ -0,0 +1,64 @@
+"""
+Fill in width/height/placeholder columns for images saved before they existed.
+
+SafeImageField only computes these when a new file is assigned, so rows that
+already had an image are read once here: the header for the dimensions and
+a 64px thumbnail for the dominant colour. Rows are written with
+QuerySet.update(), leaving updated_at alone; cached pages and static
+snapshots of the changed rows are still refreshed.
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from PIL import Image
+
+from healthcenter.signals import rows_updated
+from healthcenter.uploads import SafeImageField, dominant_color
+
+
+class Command(BaseCommand):
+    help = 'Compute stored width/height/dominant colour for existing SafeImageField files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Recompute rows that already have metadata')
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if isinstance(field, SafeImageField) and (field.width_field or field.placeholder_field):
+                    updated, missing = self.backfill(model, field, options['force'])
+                    self.stdout.write(
+                        f'{model._meta.label}.{field.name}: {updated} updated'
+                        + (f', {missing} files unreadable' if missing else '')
+                    )
+
+    def backfill(self, model, field, force):
+        columns = [name for name in (field.width_field, field.height_field, field.placeholder_field) if name]
+        queryset = model.objects.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+        if not force:
+            incomplete = Q()
+            for name in (field.width_field, field.height_field):
+                if name:
+                    incomplete |= Q(**{f'{name}__isnull': True})
+            if field.placeholder_field:
+                incomplete |= Q(**{field.placeholder_field: ''})
+            queryset = queryset.filter(incomplete)
+
+        updated, missing = [], 0
+        for pk, name in queryset.order_by('pk').values_list('pk', field.name).iterator():
+            try:
+                with field.storage.open(name, 'rb') as fh:
+                    with Image.open(fh) as image:
+                        width, height = image.size
+                    color = dominant_color(fh)
+            except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+                missing += 1
+                continue
+            values = dict(zip(
+                (field.width_field, field.height_field, field.placeholder_field),
+                (width, height, color),
+            ))
+            model.objects.filter(pk=pk).update(**{column: values[column] for column in columns})
+            updated.append(pk)
+        rows_updated(model, updated)
+        return len(updated), missing
@@ -0,0 +1,69 @@
+"""
+Micro-benchmarks for the input inspection engine on large inputs.
+
+Each case builds a document of --size bytes, scans it --repeat times with the
+rulesets it applies to, and reports the best time and throughput. --legacy
+also times the old four-pattern validator on the same input; its ".*" rules
+backtrack quadratically, so keep --size small when using it.
+"""
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from healthcenter.inspection import RULESETS
+
+LEGACY_PATTERNS = [r"(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC)", r"(--|#)", r"(OR.*=.*)", r"(AND.*=.*)"]
+
+PROSE = 'ผู้ป่วยควรมาตรวจสุขภาพประจำปี and bring the appointment card to reception. '
+HTML = '<p style="color:#333">ผู้ป่วยควรมาตรวจ <strong>สุขภาพ</strong> &nbsp;and <a href="/about/#map">see the map</a></p>\n'
+# Many "or"s and no "=": the worst case for the legacy (OR.*=.*) rule
+ADVERSARIAL = 'or and or and '
+
+
+def build(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def legacy_scan(value):
+    return [re.search(pattern, value, re.IGNORECASE) for pattern in LEGACY_PATTERNS]
+
+
+class Command(BaseCommand):
+    help = 'Time the inspection rulesets on large synthetic inputs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1024 * 1024, help='Input size in characters (default: 1 MiB)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case; the best is reported')
+        parser.add_argument('--legacy', action='store_true', help='Also time the old validator patterns')
+
+    def handle(self, *args, **options):
+        if options['size'] < 1 or options['repeat'] < 1:
+            raise CommandError('--size and --repeat must be positive')
+        size = options['size']
+        cases = [
+            ('plain prose', build(PROSE, size), ('plain_text',)),
+            ('rich html', build(HTML, size), ('plain_text', 'rich_html')),
+            ('adversarial', build(ADVERSARIAL, size), ('plain_text', 'rich_html')),
+        ]
+        for label, value, rulesets in cases:
+            for name in rulesets:
+                ruleset = RULESETS[name]
+                seconds, findings = self.time(lambda: ruleset.scan(value, max_length=size), options['repeat'])
+                self.report(label, name, size, seconds, f'{len(findings)} findings')
+            if options['legacy']:
+                seconds, _ = self.time(lambda: legacy_scan(value), options['repeat'])
+                self.report(label, 'legacy', size, seconds, '')
+
+    def time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def report(self, label, ruleset, size, seconds, extra):
+        rate = size / seconds / (1024 * 1024) if seconds else float('inf')
+        self.stdout.write(f'{label:<12} {ruleset:<11} {seconds * 1000:9.2f} ms {rate:8.1f} MiB/s  {extra}')
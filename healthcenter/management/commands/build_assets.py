@@ -0,0 +1,26 @@
+"""
+Concatenate and minify the asset bundles (see healthcenter.assets) into
+content-hashed files under static/bundles/, then run collectstatic as usual.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from healthcenter import assets
+
+
+class Command(BaseCommand):
+    help = 'Build the per-page JS/CSS bundles and their manifest'
+
+    def handle(self, *args, **options):
+        try:
+            manifest = assets.build()
+        except FileNotFoundError as exc:
+            raise CommandError(str(exc))
+        for name, entry in manifest.items():
+            for kind in ('css', 'js'):
+                if kind in entry:
+                    self.stdout.write(f'{name}: {entry[kind]} ({entry[kind + "_bytes"]:,} bytes)')
+        if not assets.enabled():
+            self.stdout.write(self.style.WARNING(
+                'ASSET_BUNDLES_ENABLED is off (DEBUG), so pages still link the source files'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'{len(manifest)} bundles built in {assets.output_dir()}'))
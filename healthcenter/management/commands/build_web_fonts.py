@@ -0,0 +1,54 @@
+"""
+Build self-hosted WOFF2 fonts for the families and weights the site uses
+(see healthcenter.webfonts).
+
+Put the source .ttf/.otf files (one per face, or variable fonts) in
+WEB_FONTS_SOURCE_DIR first. --dry-run only prints what the CSS and templates
+ask for and which source file would serve each face.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from healthcenter import webfonts
+
+
+class Command(BaseCommand):
+    help = 'Subset locally provided fonts to Latin + Thai WOFF2 and write fonts.css'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', help='Directory of source fonts (default: WEB_FONTS_SOURCE_DIR)')
+        parser.add_argument('--preload', type=int, default=2, help='Number of upright faces to preload')
+        parser.add_argument('--dry-run', action='store_true', help='Report usage and matches without writing files')
+
+    def handle(self, *args, **options):
+        try:
+            import brotli  # noqa: F401  (fontTools needs it for WOFF2)
+            from fontTools import subset  # noqa: F401
+        except ImportError:
+            raise CommandError('build_web_fonts needs fontTools and brotli: pip install -r requirements-build.txt')
+
+        source = options['source'] or webfonts.source_dir()
+        if not webfonts.Path(source).is_dir():
+            raise CommandError(f'{source} does not exist; add the .ttf/.otf files to subset there')
+
+        usage = webfonts.find_usage()
+        sources = webfonts.find_sources(source)
+        provided = {family for family, _ in sources}
+        for (family, weight, italic), count in sorted(usage.items()):
+            if family.lower() in provided:
+                match = webfonts.match_source(sources, family, weight, italic)
+                found = match[1].name if match else 'no source file'
+                self.stdout.write(f'{family} {weight}{" italic" if italic else ""} ({count} rules): {found}')
+        system = sorted({family for family, _, _ in usage if family.lower() not in provided})
+        if system:
+            self.stdout.write(f'Left to the system (no source files): {", ".join(system)}')
+        if options['dry_run']:
+            return
+
+        written, unmatched = webfonts.build(usage, sources, preload=options['preload'])
+        for face in written:
+            self.stdout.write(f'wrote {face["file"]} ({face["bytes"]:,} bytes)')
+        for family, weight, italic in unmatched:
+            self.stderr.write(self.style.WARNING(
+                f'No source for {family} {weight}{" italic" if italic else ""}; browsers will fall back'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'{len(written)} faces, {sum(f["bytes"] for f in written):,} bytes'))
@@ -0,0 +1,26 @@
+"""
+Fetch posters for home page videos that do not have one yet.
+
+Home.save() only parses the video, so the request that saves it never waits
+on the provider. Run this after saving a new video, or from cron; it uses
+VIDEO_POSTER_FETCHER (see healthcenter.video).
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from healthcenter.models import Home
+
+
+class Command(BaseCommand):
+    help = 'Fetch missing video posters for the home page'
+
+    def handle(self, *args, **options):
+        missing = Home.objects.exclude(video_provider='').filter(Q(video_poster='') | Q(video_poster__isnull=True))
+        fetched = failed = 0
+        for home in missing.order_by('pk'):
+            if home.fetch_video_poster():
+                fetched += 1
+                self.stdout.write(f'{home.video_provider} {home.video_id}: {home.video_poster.name}')
+            else:
+                failed += 1
+        self.stdout.write(f'{fetched} posters fetched' + (f', {failed} not available' if failed else ''))
@@ -0,0 +1,74 @@
+"""
+Reprocess images embedded in existing CKEditor HTML.
+
+Walks every model using ResponsiveImagesMixin. Each <img> pointing at a
+media file that is not yet an InlineImage is re-encoded into the standard
+widths, and the stored HTML is rewritten to use them. Rows are written with
+QuerySet.update(), so updated_at and other save() side effects are left
+alone; cached pages and static snapshots of the changed rows are still
+refreshed (see healthcenter.signals.rows_updated).
+"""
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+
+from healthcenter.inline_images import process_stored
+from healthcenter.models import InlineImage, ResponsiveImagesMixin
+from healthcenter.richtext import image_names, rewrite_images
+from healthcenter.signals import rows_updated
+
+
+class Command(BaseCommand):
+    help = 'Re-encode images embedded in rich text fields and add srcset/width/height/lazy loading to their <img> tags'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing anything')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        # storage name -> InlineImage, including images processed this run
+        self.images = {}
+        for model in apps.get_models():
+            if issubclass(model, ResponsiveImagesMixin):
+                changed = self.process_model(model)
+                self.stdout.write(f'{model._meta.label}: {changed} rows {"to update" if self.dry_run else "updated"}')
+
+    def process_model(self, model):
+        fields = [field.attname for field in model().rich_text_fields()]
+        changed = []
+        for row in model.objects.values('pk', *fields).iterator(chunk_size=200):
+            names = set()
+            for field in fields:
+                names |= image_names(row[field])
+            if not names:
+                continue
+            images = self.resolve(names)
+            updates = {}
+            for field in fields:
+                html = rewrite_images(row[field], images)
+                if html != row[field]:
+                    updates[field] = html
+            if updates:
+                changed.append(row['pk'])
+                if not self.dry_run:
+                    model.objects.filter(pk=row['pk']).update(**updates)
+        if not self.dry_run:
+            rows_updated(model, changed)
+        return len(changed)
+
+    def resolve(self, names):
+        """Map each storage name to its InlineImage, processing new files"""
+        missing = names - self.images.keys()
+        if missing:
+            self.images.update(InlineImage.objects.in_bulk(missing, field_name='name'))
+            for name in missing - self.images.keys():
+                if self.dry_run:
+                    self.stdout.write(f'  would process {name}')
+                    self.images[name] = None
+                    continue
+                try:
+                    self.images[name] = process_stored(name)
+                except (OSError, ValidationError) as exc:
+                    self.stderr.write(f'  skipped {name}: {exc}')
+                    self.images[name] = None
+        return {name: self.images[name] for name in names if self.images[name]}
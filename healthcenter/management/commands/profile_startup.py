@@ -0,0 +1,94 @@
+"""
+Startup profiling.
+
+Runs a fresh interpreter that sets Django up (--target setup) or also
+loads the URLconf the way a web worker does (--target urls, the default),
+--repeat times, and reports the best wall time. One more run under
+python -X importtime gives the cost of each imported module, reported as
+the slowest modules by cumulative time and as self time summed per
+top-level package.
+
+The child processes inherit DJANGO_SETTINGS_MODULE, so
+manage.py profile_startup --settings core.settings_lean profiles the lean
+settings.
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'setup': 'import django; django.setup()',
+    'urls': (
+        'import django; django.setup(); '
+        'from django.urls import get_resolver; get_resolver().url_patterns; get_resolver()._populate()'
+    ),
+}
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(output):
+    """[(module, self us, cumulative us, depth)] from -X importtime output"""
+    modules = []
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Report cold start time and per-module import cost of a fresh process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='urls', help='What the process loads')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs; the best is reported')
+        parser.add_argument('--top', type=int, default=25, help='Modules to list (0 for none)')
+        parser.add_argument('--package', help='Only list modules under this package, e.g. healthcenter')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['top'] < 0:
+            raise CommandError('--repeat must be positive and --top not negative')
+        code = TARGETS[options['target']]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+
+        best = None
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            self.run(code, env)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        modules = parse_importtime(self.run(code, env, importtime=True).stderr)
+
+        self.stdout.write(
+            f'{options["target"]} with {settings.SETTINGS_MODULE}: best {best * 1000:.1f} ms '
+            f'of {options["repeat"]} runs, {len(modules)} modules imported'
+        )
+        if options['top']:
+            listed = modules
+            if options['package']:
+                prefix = options['package']
+                listed = [entry for entry in modules if entry[0] == prefix or entry[0].startswith(prefix + '.')]
+            self.stdout.write('\n cumulative       self  module')
+            for module, self_us, cumulative_us, depth in sorted(listed, key=lambda entry: -entry[2])[:options['top']]:
+                self.stdout.write(f'{cumulative_us / 1000:8.1f} ms {self_us / 1000:7.1f} ms  {module}')
+
+            packages = defaultdict(int)
+            for module, self_us, _, _ in modules:
+                packages[module.split('.')[0]] += self_us
+            self.stdout.write('\n       self  package')
+            for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+                self.stdout.write(f'{self_us / 1000:8.1f} ms  {package}')
+
+    def run(self, code, env, importtime=False):
+        command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+        result = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Startup failed:\n{result.stderr[-2000:]}')
+        return result
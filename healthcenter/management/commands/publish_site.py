@@ -0,0 +1,60 @@
+"""
+Render the public pages to static snapshots (see healthcenter.publisher).
+
+--all rebuilds every page and removes snapshots of pages that no longer
+exist; --pending re-renders the paths queued by saves in the admin and staff
+views; otherwise only the given URL paths are re-rendered. Run --pending
+from cron every minute, or keep one process running with --pending --watch 5
+so the middleware stack is loaded once.
+"""
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from healthcenter import publisher
+
+
+class Command(BaseCommand):
+    help = 'Write static HTML snapshots of the public pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='URL paths to re-render, e.g. /about/3/')
+        parser.add_argument('--all', action='store_true', help='Rebuild every page and prune stale snapshots')
+        parser.add_argument('--pending', action='store_true', help='Re-render the paths queued by saves')
+        parser.add_argument('--watch', type=float, metavar='SECONDS',
+                            help='With --pending, keep polling the queue at this interval')
+        parser.add_argument('--root', help='Publish directory (default: STATIC_PUBLISH_ROOT)')
+
+    def handle(self, *args, **options):
+        root = Path(options['root']) if options['root'] else publisher.publish_root()
+        if root is None:
+            raise CommandError('STATIC_PUBLISH_ROOT is not set; pass --root')
+        if options['all'] + options['pending'] + bool(options['paths']) != 1:
+            raise CommandError('Pass one of --all, --pending or one or more URL paths')
+        if options['watch'] is not None and not options['pending']:
+            raise CommandError('--watch only applies to --pending')
+
+        if options['watch'] is not None:
+            renderer = publisher.Renderer()
+            while True:
+                close_old_connections()
+                written, removed = publisher.publish_pending(root, renderer)
+                if written or removed:
+                    self.report(root, written, removed)
+                time.sleep(options['watch'])
+        if options['all']:
+            written, removed = publisher.publish_site(root)
+        elif options['pending']:
+            written, removed = publisher.publish_pending(root)
+        else:
+            written, removed = publisher.publish(options['paths'], root)
+        self.report(root, written, removed)
+
+    def report(self, root, written, removed):
+        for path in written:
+            self.stdout.write(f'published {path}')
+        for path in removed:
+            self.stdout.write(f'removed {path}')
+        self.stdout.write(self.style.SUCCESS(f'{len(written)} published, {len(removed)} removed in {root}'))
@@ -0,0 +1,67 @@
+"""
+Build the asset bundles with unused CSS removed (see healthcenter.purge) and
+write the above-the-fold CSS for the pages given with --critical.
+
+Replaces build_assets when run: the bundles it writes are the purged ones.
+Rerun it whenever templates, scripts or stored rich text start using classes
+the last run did not see, or list them in CSS_PURGE_SAFELIST.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from healthcenter import assets, purge
+from healthcenter.publisher import Renderer
+
+
+class Command(BaseCommand):
+    help = 'Build purged, minified CSS bundles and critical CSS, with a size report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--critical', action='append', default=None, metavar='NAME=URL_NAME',
+            help='Page to extract critical CSS for (default: home=healthcenter:home)',
+        )
+        parser.add_argument('--no-database', action='store_true', help='Do not scan rich text stored in the database')
+
+    def handle(self, *args, **options):
+        used = purge.used_names(assets.source_files('js'), include_database=not options['no_database'])
+        report = []
+
+        def css_filter(css, path):
+            purged = purge.purge(css, used)
+            report.append((path, len(css.encode()), len(assets.minify_css(purged).encode())))
+            return purged
+
+        try:
+            manifest = assets.build(css_filter)
+        except FileNotFoundError as exc:
+            raise CommandError(str(exc))
+
+        width = max(len(path) for path, _, _ in report)
+        for path, before, after in report:
+            self.stdout.write(f'{path:<{width}}  {before:>9,} -> {after:>9,} bytes ({100 - after * 100 // max(before, 1)}% smaller)')
+        total_before = sum(before for _, before, _ in report)
+        total_after = sum(after for _, _, after in report)
+        self.stdout.write(f'{"total":<{width}}  {total_before:>9,} -> {total_after:>9,} bytes')
+
+        purged_css = '\n'.join(
+            assets.absolute_css_urls((assets.output_dir().parent / entry['css']).read_text(encoding='utf-8'), entry['css'])
+            for entry in manifest.values() if 'css' in entry
+        )
+        renderer = Renderer()
+        for spec in options['critical'] or ['home=healthcenter:home']:
+            page, _, url_name = spec.partition('=')
+            response = renderer.render(reverse(url_name or page))
+            if response.status_code != 200:
+                self.stderr.write(self.style.WARNING(f'{page}: got status {response.status_code}, no critical CSS'))
+                continue
+            critical = assets.minify_css(purge.critical_css(purged_css, response.content.decode(), used))
+            path = assets.critical_path(page)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(critical, encoding='utf-8')
+            self.stdout.write(f'critical CSS for {page}: {len(critical.encode()):,} bytes')
+
+        if not assets.enabled():
+            self.stdout.write(self.style.WARNING(
+                'ASSET_BUNDLES_ENABLED is off (DEBUG), so pages still link the unpurged source files'
+            ))
@@ -0,0 +1,21 @@
+"""
+Run the worker warmup (core.warmup) and report how long each step took.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warmup
+
+
+class Command(BaseCommand):
+    help = 'Prime URL resolution, templates, connections and pages, reporting per-step timing'
+
+    def handle(self, *args, **options):
+        timings = warmup()
+        failed = 0
+        for name, seconds, error in timings:
+            status = f'FAILED: {error}' if error else 'ok'
+            self.stdout.write(f'{name:<10} {seconds * 1000:9.1f} ms  {status}')
+            failed += error is not None
+        self.stdout.write(f'{"total":<10} {sum(seconds for _, seconds, _ in timings) * 1000:9.1f} ms')
+        if failed:
+            raise CommandError(f'{failed} warmup step(s) failed')
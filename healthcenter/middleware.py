@@ -0,0 +1,226 @@
+import codecs
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+
+from . import compression, page_cache, preload
+
+# Bytes of a streamed page read for preload hints; the hero comes well before this
+LEARN_LIMIT = 256 * 1024
+
+
+class PageCacheMiddleware:
+    """
+    Serve the pages listed in PAGE_CACHE_PAGES from a cache shared by all
+    visitors of the same audience, filling in the user menu per request.
+
+    Goes after AuthenticationMiddleware and MessageMiddleware. Requests with
+    pending flash messages, and responses that set cookies or use a CSRF
+    token, are neither served from nor stored in the cache.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not page_cache.enabled():
+            return None
+        match = request.resolver_match
+        labels = page_cache.cached_pages().get(match.view_name) if match else None
+        if labels is None or request.method not in ('GET', 'HEAD') or self._has_messages(request):
+            return None
+
+        request._page_cache_key = key = page_cache.page_key(request, labels)
+        page = page_cache.get_page(key)
+        if page is None:
+            return None
+        content, content_type = page
+        if page_cache.has_hole(content):
+            content = page_cache.fill_hole(content, self._user_menu(request))
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+    def process_response(self, request, response):
+        key = getattr(request, '_page_cache_key', None)
+        if key is None or response.has_header('X-Page-Cache'):
+            return response
+        response['X-Page-Cache'] = 'miss'
+        if (
+            response.status_code != 200 or response.cookies
+            or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            or self._has_messages(request)
+        ):
+            return response
+        if response.streaming:
+            response.streaming_content = self._store_when_complete(request, key, response, response.streaming_content)
+        else:
+            page_cache.set_page(key, (page_cache.punch_hole(response.content), response['Content-Type']))
+        return response
+
+    def _store_when_complete(self, request, key, response, chunks):
+        content = []
+        for chunk in chunks:
+            content.append(chunk)
+            yield chunk
+        # A token used while streaming never got its cookie; such a page is not cacheable
+        if not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+            page_cache.set_page(key, (page_cache.punch_hole(b''.join(content)), response['Content-Type']))
+
+    def _has_messages(self, request):
+        storage = getattr(request, '_messages', None)
+        return storage is not None and len(storage) > 0
+
+    def _user_menu(self, request):
+        return render_to_string('healthcenter/user_menu.html', request=request).encode('utf-8')
+
+
+class PreloadHintsMiddleware:
+    """
+    Add a Link header preloading the critical resources of the page, as
+    learned from its last full render (see healthcenter.preload).
+
+    Goes before PageCacheMiddleware so cached pages get the header too; only
+    freshly rendered pages are read to update the hints.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        match = request.resolver_match
+        if (
+            match is None or set(match.namespaces) & set(self.excluded_namespaces())
+            or request.method not in ('GET', 'HEAD') or response.status_code != 200
+            or not response.get('Content-Type', '').startswith('text/html')
+        ):
+            return response
+        page = preload.page_for(match, request.path_info)
+        if response.get('X-Page-Cache') == 'hit' or request.method == 'HEAD':
+            links = preload.hints_for(page)
+        elif response.streaming:
+            # Headers go out first: use what the last render taught, learn from this one as it streams
+            links = preload.hints_for(page)
+            response.streaming_content = self._learn_when_complete(page, response, response.streaming_content)
+        else:
+            links = preload.learn(page, response.content.decode(response.charset, 'replace'))
+        if links and not response.has_header('Link'):
+            response['Link'] = ', '.join(links)
+        return response
+
+    def _learn_when_complete(self, page, response, chunks):
+        head = []
+        size = 0
+        for chunk in chunks:
+            if size < LEARN_LIMIT:
+                head.append(chunk)
+                size += len(chunk)
+            yield chunk
+        preload.learn(page, b''.join(head).decode(response.charset, 'replace'))
+
+    def excluded_namespaces(self):
+        # The admin has its own assets and is not worth learning
+        return getattr(settings, 'PRELOAD_HINTS_EXCLUDE_NAMESPACES', ('admin',))
+
+
+class HtmlMinifyMiddleware:
+    """
+    Minify HTML responses (see healthcenter.compression.HtmlMinifier),
+    streamed ones chunk by chunk. Goes after PageCacheMiddleware so the
+    cached copies are stored minified, and hits are passed through as they are.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not response.get('Content-Type', '').startswith('text/html') or response.has_header('Content-Encoding')
+            or response.get('X-Page-Cache') == 'hit'
+        ):
+            return response
+        if response.streaming:
+            if not getattr(response, 'is_async', False):
+                response.streaming_content = self._minify_stream(response.streaming_content, response.charset)
+            return response
+        try:
+            html = response.content.decode(response.charset)
+        except UnicodeDecodeError:
+            return response
+        response.content = compression.minify_html(html).encode(response.charset)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        return response
+
+    def _minify_stream(self, chunks, charset):
+        decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        minifier = compression.HtmlMinifier()
+        for chunk in chunks:
+            text = minifier.feed(decoder.decode(chunk))
+            if text:
+                yield text.encode(charset)
+        tail = minifier.feed(decoder.decode(b'', final=True)) + minifier.close()
+        if tail:
+            yield tail.encode(charset)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, whichever the client accepts
+    (brotli only when installed); streamed responses are compressed as they
+    stream. Page cache hits for anonymous visitors are identical for everyone,
+    so their compressed bodies are cached next to the page. Goes near the
+    top of MIDDLEWARE, like GZipMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not compression.is_compressible(response.get('Content-Type', '')):
+            return response
+        if response.streaming:
+            if getattr(response, 'is_async', False):
+                return response
+        elif len(response.content) < compression.MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.encoding_for(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = self._compress(request, response, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def _compress(self, request, response, encoding):
+        key = getattr(request, '_page_cache_key', None)
+        user = getattr(request, 'user', None)
+        if key is None or response.get('X-Page-Cache') != 'hit' or user is None or user.is_authenticated:
+            return compression.compress(response.content, encoding)
+        body = page_cache.get_compressed(key, encoding)
+        if body is None:
+            body = compression.compress(response.content, encoding)
+            page_cache.set_compressed(key, encoding, body)
+        return body
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:02
+
+import django_ckeditor_5.fields
+import healthcenter.inspection
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcenter', '0005_categoryportfolio_portfolio'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='content',
+            name='body',
+            field=django_ckeditor_5.fields.CKEditor5Field(validators=[healthcenter.inspection.InspectionValidator('rich_html')], verbose_name='Body'),
+        ),
+    ]
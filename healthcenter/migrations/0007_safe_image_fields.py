@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:03
+
+import healthcenter.uploads
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcenter', '0006_content_body_rich_html'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='about',
+            name='banner_image_1',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='banner_images/'),
+        ),
+        migrations.AlterField(
+            model_name='about',
+            name='banner_image_2',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='banner_images/'),
+        ),
+        migrations.AlterField(
+            model_name='about',
+            name='banner_image_3',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='banner_images/'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='banner_image_1',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='home/'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='banner_image_2',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='home/'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='banner_image_3',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='home/'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='image',
+            field=healthcenter.uploads.SafeImageField(blank=True, null=True, upload_to='home/'),
+        ),
+        migrations.AlterField(
+            model_name='portfolio',
+            name='image',
+            field=healthcenter.uploads.SafeImageField(upload_to='portfolio/'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcenter', '0007_safe_image_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InlineImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name of the full-size image', max_length=255, unique=True)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('variants', models.JSONField(blank=True, default=list, help_text='[width, storage name] pairs, narrowest first')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Inline Image',
+                'verbose_name_plural': 'Inline Images',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:07
+
+import healthcenter.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcenter', '0008_inlineimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='home',
+            name='video_id',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='video_poster',
+            field=healthcenter.uploads.SafeImageField(blank=True, editable=False, null=True, upload_to='home/posters/'),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='video_provider',
+            field=models.CharField(blank=True, choices=[('youtube', 'YouTube'), ('vimeo', 'Vimeo'), ('facebook', 'Facebook')], editable=False, max_length=20),
+        ),
+    ]
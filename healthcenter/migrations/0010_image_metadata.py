@@ -0,0 +1,174 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:08
+
+import healthcenter.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcenter', '0009_home_video_facade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_1_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_1_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_1_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_2_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_2_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_2_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_3_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_3_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='banner_image_3_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_1_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_1_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_1_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_2_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_2_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_2_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_3_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_3_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='banner_image_3_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='image_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='home',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='image_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour, e.g. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='about',
+            name='banner_image_1',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='banner_image_1_height', null=True, placeholder_field='banner_image_1_placeholder', upload_to='banner_images/', width_field='banner_image_1_width'),
+        ),
+        migrations.AlterField(
+            model_name='about',
+            name='banner_image_2',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='banner_image_2_height', null=True, placeholder_field='banner_image_2_placeholder', upload_to='banner_images/', width_field='banner_image_2_width'),
+        ),
+        migrations.AlterField(
+            model_name='about',
+            name='banner_image_3',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='banner_image_3_height', null=True, placeholder_field='banner_image_3_placeholder', upload_to='banner_images/', width_field='banner_image_3_width'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='banner_image_1',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='banner_image_1_height', null=True, placeholder_field='banner_image_1_placeholder', upload_to='home/', width_field='banner_image_1_width'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='banner_image_2',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='banner_image_2_height', null=True, placeholder_field='banner_image_2_placeholder', upload_to='home/', width_field='banner_image_2_width'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='banner_image_3',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='banner_image_3_height', null=True, placeholder_field='banner_image_3_placeholder', upload_to='home/', width_field='banner_image_3_width'),
+        ),
+        migrations.AlterField(
+            model_name='home',
+            name='image',
+            field=healthcenter.uploads.SafeImageField(blank=True, height_field='image_height', null=True, placeholder_field='image_placeholder', upload_to='home/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='portfolio',
+            name='image',
+            field=healthcenter.uploads.SafeImageField(height_field='image_height', placeholder_field='image_placeholder', upload_to='portfolio/', width_field='image_width'),
+        ),
+    ]
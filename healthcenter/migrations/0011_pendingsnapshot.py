@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcenter', '0010_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('queued_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Pending Snapshot',
+                'verbose_name_plural': 'Pending Snapshots',
+            },
+        ),
+    ]
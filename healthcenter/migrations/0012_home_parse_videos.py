@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:12
+
+from django.db import migrations
+
+from healthcenter.video import parse_video
+
+
+def parse_existing_videos(apps, schema_editor):
+    """
+    Fill video_provider/video_id for rows saved before 0009, which otherwise
+    keep rendering the raw iframe until they are next edited
+    """
+    Home = apps.get_model('healthcenter', 'Home')
+    for home in Home.objects.filter(video_provider='', video_embed__gt='').only('pk', 'video_embed'):
+        provider, video_id = parse_video(home.video_embed)
+        if provider:
+            Home.objects.filter(pk=home.pk).update(video_provider=provider, video_id=video_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('healthcenter', '0011_pendingsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_existing_videos, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,100 @@
 from django.db import models
+from django.utils.functional import cached_property
 from django_ckeditor_5.fields import CKEditor5Field
-from healthcenter.validators import validate_no_sql_injection   
+from healthcenter.projection import ProjectedQuerySet, ProjectionMixin
+from healthcenter.richtext import image_names, rewrite_images
+from healthcenter.uploads import SafeImageField
+from healthcenter.validators import validate_rich_html
+from healthcenter.video import PROVIDERS, embed_url, get_poster, parse_video, poster_file
 # Create your models here.
-class About(models.Model):
+class InlineImage(models.Model):
+    """An image uploaded through CKEditor, re-encoded into several widths"""
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name of the full-size image")
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    variants = models.JSONField(default=list, blank=True, help_text="[width, storage name] pairs, narrowest first")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Inline Image"
+        verbose_name_plural = "Inline Images"
+
+    def __str__(self):
+        return self.name
+
+    @cached_property
+    def storage(self):
+        from django_ckeditor_5.storage_utils import get_django_storage_class
+
+        return get_django_storage_class()()
+
+    @property
+    def url(self):
+        return self.storage.url(self.name)
+
+    @property
+    def srcset(self):
+        if not self.variants:
+            return ''
+        candidates = [f'{self.storage.url(name)} {width}w' for width, name in self.variants]
+        return ', '.join(candidates + [f'{self.url} {self.width}w'])
+
+
+class PendingSnapshot(models.Model):
+    """A published URL path waiting to be re-rendered by publish_site --pending"""
+    path = models.CharField(max_length=255, unique=True)
+    queued_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Pending Snapshot"
+        verbose_name_plural = "Pending Snapshots"
+
+    def __str__(self):
+        return self.path
+
+
+class ResponsiveImagesMixin:
+    """
+    Rewrites the <img> tags in every CKEditor5Field on save, so stored HTML
+    carries srcset, width/height and loading="lazy" for uploaded images
+    """
+
+    def rich_text_fields(self):
+        return [field for field in self._meta.concrete_fields if isinstance(field, CKEditor5Field)]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        fields = [
+            field for field in self.rich_text_fields()
+            if field.attname not in deferred and (update_fields is None or field.name in update_fields)
+        ]
+        names = set()
+        for field in fields:
+            names |= image_names(getattr(self, field.attname))
+        if names:
+            images = InlineImage.objects.in_bulk(names, field_name='name')
+            for field in fields:
+                setattr(self, field.attname, rewrite_images(getattr(self, field.attname), images))
+        super().save(*args, **kwargs)
+
+
+class About(ProjectionMixin, ResponsiveImagesMixin, models.Model):
     """Information about the Public Health Center"""
     title = models.CharField(max_length=200)
     banner_title = models.CharField(max_length=200, blank=True, help_text="Banner title for homepage")
-    banner_image_1 = models.ImageField(upload_to='banner_images/', blank=True, null=True)
-    banner_image_2 = models.ImageField(upload_to='banner_images/', blank=True, null=True)
-    banner_image_3 = models.ImageField(upload_to='banner_images/', blank=True, null=True)
+    banner_image_1 = SafeImageField(upload_to='banner_images/', blank=True, null=True, width_field='banner_image_1_width', height_field='banner_image_1_height', placeholder_field='banner_image_1_placeholder')
+    banner_image_1_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_1_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_1_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
+    banner_image_2 = SafeImageField(upload_to='banner_images/', blank=True, null=True, width_field='banner_image_2_width', height_field='banner_image_2_height', placeholder_field='banner_image_2_placeholder')
+    banner_image_2_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_2_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_2_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
+    banner_image_3 = SafeImageField(upload_to='banner_images/', blank=True, null=True, width_field='banner_image_3_width', height_field='banner_image_3_height', placeholder_field='banner_image_3_placeholder')
+    banner_image_3_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_3_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_3_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
     banner_description_1 = models.CharField(max_length=300, blank=True, help_text="Banner description 1")
     banner_description_2 = models.CharField(max_length=300, blank=True, help_text="Banner description 2")
     banner_description_3 = models.CharField(max_length=300, blank=True, help_text="Banner description 3")
@@ -26,6 +112,8 @@ class About(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=False, help_text="Mark as active/published")
 
+    objects = ProjectedQuerySet.as_manager()
+
     class Meta:
         verbose_name = "About Us"
         verbose_name_plural = "About Us"
@@ -33,13 +121,15 @@ class About(models.Model):
     def __str__(self):
         return self.title
 
-class Content(models.Model):
+class Content(ProjectionMixin, ResponsiveImagesMixin, models.Model):
     """Additional content for the Health Center"""
     heading = models.CharField(max_length=200)
-    body = CKEditor5Field('Body', config_name='default', validators=[validate_no_sql_injection])
+    body = CKEditor5Field('Body', config_name='default', validators=[validate_rich_html])
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectedQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Content"
         verbose_name_plural = "Contents"
@@ -47,12 +137,21 @@ class Content(models.Model):
     def __str__(self):
         return self.heading
     
-class Home(models.Model):
+class Home(ProjectionMixin, ResponsiveImagesMixin, models.Model):
     """Home page content for the Health Center"""
     banner_title = models.CharField(max_length=200) 
-    banner_image_1 = models.ImageField(upload_to='home/', blank=True, null=True)    
-    banner_image_2 = models.ImageField(upload_to='home/', blank=True, null=True)    
-    banner_image_3 = models.ImageField(upload_to='home/', blank=True, null=True)
+    banner_image_1 = SafeImageField(upload_to='home/', blank=True, null=True, width_field='banner_image_1_width', height_field='banner_image_1_height', placeholder_field='banner_image_1_placeholder')
+    banner_image_1_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_1_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_1_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
+    banner_image_2 = SafeImageField(upload_to='home/', blank=True, null=True, width_field='banner_image_2_width', height_field='banner_image_2_height', placeholder_field='banner_image_2_placeholder')
+    banner_image_2_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_2_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_2_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
+    banner_image_3 = SafeImageField(upload_to='home/', blank=True, null=True, width_field='banner_image_3_width', height_field='banner_image_3_height', placeholder_field='banner_image_3_placeholder')
+    banner_image_3_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_3_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    banner_image_3_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
     banner_description_1 = models.CharField(max_length=500, blank=True, null=True)
     banner_description_2 = models.CharField(max_length=500, blank=True, null=True)
     banner_description_3 = models.CharField(max_length=500, blank=True, null=True)
@@ -61,8 +160,17 @@ class Home(models.Model):
     vision = CKEditor5Field('Vision', config_name='default')
     mission = CKEditor5Field('Mission', config_name='default')
     updated_at = models.DateTimeField(auto_now=True)
-    image = models.ImageField(upload_to='home/', blank=True, null=True)
+    image = SafeImageField(upload_to='home/', blank=True, null=True, width_field='image_width', height_field='image_height', placeholder_field='image_placeholder')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
     video_embed = models.TextField(blank=True, null=True, help_text="Paste embed code or video URL here")
+    # Parsed from video_embed on save; the home page shows a click-to-load facade
+    video_provider = models.CharField(max_length=20, choices=PROVIDERS, blank=True, editable=False)
+    video_id = models.CharField(max_length=100, blank=True, editable=False)
+    video_poster = SafeImageField(upload_to='home/posters/', blank=True, null=True, editable=False)
+
+    objects = ProjectedQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Home Page"
@@ -70,28 +178,66 @@ class Home(models.Model):
 
     def __str__(self):
         return "Home Page Content"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if 'video_embed' not in self.get_deferred_fields() and (update_fields is None or 'video_embed' in update_fields):
+            self.refresh_video()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'video_provider', 'video_id', 'video_poster'}
+        super().save(*args, **kwargs)
+
+    def refresh_video(self):
+        """Re-parse video_embed; a changed video has no poster until fetch_video_poster()"""
+        provider, video_id = parse_video(self.video_embed)
+        provider, video_id = provider or '', video_id or ''
+        if (provider, video_id) == (self.video_provider, self.video_id):
+            return
+        self.video_provider, self.video_id = provider, video_id
+        self.video_poster = None
+
+    def fetch_video_poster(self):
+        """Fetch and store the poster of the current video (see manage.py fetch_video_posters)"""
+        data = get_poster(self.video_provider, self.video_id) if self.video_provider else None
+        poster = poster_file(data, f'{self.video_provider}-{self.video_id}') if data else None
+        if poster is None:
+            return False
+        self.video_poster.save(poster.name, poster, save=False)
+        self.save(update_fields=['video_poster'])
+        return True
+
+    @property
+    def video_embed_url(self):
+        return embed_url(self.video_provider, self.video_id)
     
 
-class CategoryPortfolio(models.Model):
+class CategoryPortfolio(ProjectionMixin, models.Model):
     """Categories for Portfolio entries"""
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
 
+    objects = ProjectedQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Category Portfolio"
         verbose_name_plural = "Category Portfolios"
 
     def __str__(self):
         return self.name    
-class Portfolio(models.Model):
+class Portfolio(ProjectionMixin, ResponsiveImagesMixin, models.Model):
     """Portfolio entries for the Health Center"""
     title = models.CharField(max_length=200)
     category = models.ForeignKey(CategoryPortfolio, on_delete=models.SET_NULL, blank=True, null=True)
     description = CKEditor5Field('Description', config_name='default')
-    image = models.ImageField(upload_to='portfolio/')
+    image = SafeImageField(upload_to='portfolio/', width_field='image_width', height_field='image_height', placeholder_field='image_placeholder')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_placeholder = models.CharField(max_length=7, blank=True, editable=False, help_text="Dominant colour, e.g. #a1b2c3")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectedQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Portfolio"
         verbose_name_plural = "Portfolios"
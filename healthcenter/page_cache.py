@@ -0,0 +1,127 @@
+"""
+Whole-page cache for public pages, shared by every visitor of an audience.
+
+A cached page is keyed by URL, audience (anonymous, signed-in, staff) and the
+version tokens of the models it is built from. Saving or deleting any of those
+models replaces its token once the transaction commits, so the next request
+renders afresh. The per-user part of the header is cut out of the stored
+copy and rendered for each request (see PageCacheMiddleware).
+
+Version tokens only reach every worker through a shared cache; with a
+per-process backend outside DEBUG, enabled() is False and pages are always
+rendered.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from accounts.checks import per_process
+
+VERSION_KEY = 'healthcenter:model-version:{label}'
+PAGE_KEY = 'healthcenter:page:{audience}:{path}:{versions}'
+
+# Wrapped around the user menu by {% user_menu %}; stored pages keep an
+# empty pair, filled for each request on a hit
+HOLE_START = b'<!--user-menu-->'
+HOLE_END = b'<!--/user-menu-->'
+
+# URL name -> models the page is rendered from
+DEFAULT_PAGES = {
+    'healthcenter:home': ['healthcenter.Home', 'healthcenter.Portfolio', 'healthcenter.CategoryPortfolio'],
+    'healthcenter:content': ['healthcenter.Content'],
+    'healthcenter:about_list': ['healthcenter.About'],
+    'healthcenter:portfolio_list': ['healthcenter.Portfolio', 'healthcenter.CategoryPortfolio'],
+}
+
+
+def _alias():
+    return getattr(settings, 'PAGE_CACHE_ALIAS', 'default')
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def enabled():
+    """Whether a version bump in one worker is seen by all of them"""
+    return settings.DEBUG or not per_process(_alias())
+
+
+def cached_pages():
+    return getattr(settings, 'PAGE_CACHE_PAGES', DEFAULT_PAGES)
+
+
+def page_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+
+def bump_model_version(label):
+    """Invalidate every cached page built from the model with this label"""
+    _cache().set(VERSION_KEY.format(label=label), uuid.uuid4().hex, None)
+
+
+def model_versions(labels):
+    """Version tokens for labels, creating any that are missing"""
+    cache = _cache()
+    keys = [VERSION_KEY.format(label=label) for label in labels]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        versions.append(version)
+    return versions
+
+
+def audience(user):
+    if not user.is_authenticated:
+        return 'anon'
+    if user.is_staff or user.is_superuser:
+        return 'staff'
+    return 'auth'
+
+
+def page_key(request, labels):
+    path = hashlib.md5(request.get_full_path().encode('utf-8'), usedforsecurity=False).hexdigest()
+    versions = hashlib.md5('.'.join(model_versions(labels)).encode('ascii'), usedforsecurity=False).hexdigest()
+    return PAGE_KEY.format(audience=audience(request.user), path=path, versions=versions)
+
+
+def get_page(key):
+    return _cache().get(key)
+
+
+def set_page(key, page):
+    _cache().set(key, page, page_timeout())
+
+
+def get_compressed(key, encoding):
+    """Compressed body of an anonymous hit on the page stored under key"""
+    return _cache().get(f'{key}:{encoding}')
+
+
+def set_compressed(key, encoding, body):
+    _cache().set(f'{key}:{encoding}', body, page_timeout())
+
+
+def punch_hole(content):
+    """content with the user menu emptied out; pages without one are kept whole"""
+    start = content.find(HOLE_START)
+    end = content.find(HOLE_END, start)
+    if start == -1 or end == -1:
+        return content
+    return content[:start + len(HOLE_START)] + content[end:]
+
+
+def has_hole(content):
+    return HOLE_START in content
+
+
+def fill_hole(content, fragment):
+    start = content.find(HOLE_START) + len(HOLE_START)
+    return content[:start] + fragment + content[start:]
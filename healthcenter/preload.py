@@ -0,0 +1,163 @@
+"""
+Preload hints learned from rendered pages.
+
+After a page renders, learn() reads the critical resources out of its HTML:
+the stylesheets, preloads and preconnects in <head> (what {% bundle_css %}
+and {% web_fonts %} emitted) and the first image in <main> before the end of
+the first <section>, i.e. the hero/carousel image. The result is cached
+as ready-made Link header values, per URL name, or per path for URLs with
+arguments: each portfolio or about page has its own hero image.
+
+PreloadHintsMiddleware sends them as a Link header on every response for
+that page, which CDNs such as Cloudflare turn into 103 Early Hints.
+early_hints() wraps the ASGI application to send a real 103 itself, before
+the view runs, on servers that offer the http.response.early_hint
+extension (e.g. Hypercorn).
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+
+from .richtext import ATTRIBUTE
+
+HINTS_KEY = 'healthcenter:preload:{page}'
+MAX_HINTS = 8
+PRIORITY = {'preconnect': 0, 'style': 1, 'font': 2, 'image': 3, 'script': 4}
+
+LINK_TAG = re.compile(r'<link\b[^<>]{0,2048}>', re.IGNORECASE)
+IMG_TAG = re.compile(r'<img\b[^<>]{0,4096}>', re.IGNORECASE)
+MAIN_TAG = re.compile(r'<main\b', re.IGNORECASE)
+HEADER_UNSAFE = re.compile(r'[\r\n"<>]')
+
+
+def page_for(match, path):
+    """What hints are kept under for a resolved URL (see the module docstring)"""
+    if not match.args and not match.kwargs:
+        return match.view_name
+    return hashlib.md5(path.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def hints_timeout():
+    return getattr(settings, 'PRELOAD_HINTS_TIMEOUT', 24 * 60 * 60)
+
+
+def _attributes(tag):
+    body = re.sub(r'^<\w+', '', tag)[:-1].rstrip('/')
+    attributes = {}
+    for match in ATTRIBUTE.finditer(body):
+        value = next((group for group in match.groups()[1:] if group is not None), '')
+        attributes.setdefault(match.group(1).lower(), value.replace('&amp;', '&'))
+    return attributes
+
+
+def _local(url):
+    return url.startswith('/') and not url.startswith('//')
+
+
+def _link(url, **params):
+    """One Link header value; None if anything in it would need escaping"""
+    parts = [f'<{url}>']
+    for name, value in params.items():
+        if value is True:
+            parts.append(name)
+        elif value:
+            if HEADER_UNSAFE.search(value):
+                return None
+            parts.append(f'{name}={value}' if re.fullmatch(r'[\w/.+-]+', value) else f'{name}="{value}"')
+    value = '; '.join(parts)
+    return value if value.isascii() and not HEADER_UNSAFE.search(url) else None
+
+
+def extract(html):
+    """Link header values for the critical resources of a rendered page"""
+    head_end = html.find('</head>')
+    head = html[:head_end] if head_end != -1 else ''
+    links, seen = [], set()
+
+    def add(url, value):
+        if url not in seen and value:
+            seen.add(url)
+            links.append(value)
+
+    for tag in LINK_TAG.findall(head):
+        attributes = _attributes(tag)
+        rel, href = attributes.get('rel', '').lower(), attributes.get('href', '')
+        if not href:
+            continue
+        if rel == 'preconnect':
+            add(href, _link(href, rel='preconnect', crossorigin='crossorigin' in attributes))
+        elif rel == 'stylesheet' and _local(href):
+            add(href, _link(href, rel='preload', **{'as': 'style'}))
+        elif rel == 'preload' and _local(href):
+            add(href, _link(
+                href, rel='preload', type=attributes.get('type'), crossorigin='crossorigin' in attributes,
+                **{'as': attributes.get('as')},
+            ))
+
+    main = MAIN_TAG.search(html)
+    body = html[main.start():] if main else html[max(head_end, 0):]
+    section_end = body.find('</section>')
+    first_screen = body[:section_end] if section_end != -1 else body
+    img = IMG_TAG.search(first_screen)
+    if img:
+        attributes = _attributes(img.group(0))
+        src = attributes.get('src', '')
+        if _local(src) and attributes.get('loading') != 'lazy':
+            add(src, _link(
+                src, rel='preload', imagesrcset=attributes.get('srcset'), imagesizes=attributes.get('sizes'),
+                fetchpriority='high', **{'as': 'image'},
+            ))
+    # The hero image matters more than scripts, which are deferred anyway
+    links.sort(key=lambda value: PRIORITY.get(_kind(value), len(PRIORITY)))
+    return links[:MAX_HINTS]
+
+
+def _kind(value):
+    if 'rel=preconnect' in value:
+        return 'preconnect'
+    match = re.search(r'; as=(\w+)', value)
+    return match.group(1) if match else None
+
+
+def learn(page, html):
+    """Cache the hints for page from its rendered html; returns them"""
+    links = extract(html)
+    key = HINTS_KEY.format(page=page)
+    if cache.get(key) != links:
+        cache.set(key, links, hints_timeout())
+    return links
+
+
+def hints_for(page):
+    return cache.get(HINTS_KEY.format(page=page)) or []
+
+
+def early_hints(application):
+    """
+    Wrap an ASGI application to send 103 Early Hints with the learned hints
+    for the requested URL, on servers that support it
+    """
+    async def app(scope, receive, send):
+        if (
+            scope['type'] == 'http'
+            and scope.get('method') in ('GET', 'HEAD')
+            and 'http.response.early_hint' in scope.get('extensions', {})
+        ):
+            path = scope['path'][len(scope.get('root_path', '')):] or '/'
+            try:
+                match = resolve(path)
+            except Resolver404:
+                match = None
+            if match and match.view_name:
+                links = await cache.aget(HINTS_KEY.format(page=page_for(match, path)))
+                if links:
+                    await send({
+                        'type': 'http.response.early_hint',
+                        'links': [link.encode('latin-1') for link in links],
+                    })
+        await application(scope, receive, send)
+
+    return app
@@ -0,0 +1,77 @@
+"""
+Column projections for list pages.
+
+List views and admin changelists load only the columns their templates use,
+via ProjectedQuerySet.project() (an only() that remembers it was one). With
+DEBUG on, rows from a projection refuse to lazily load a deferred field: the
+template that touched it raises DeferredFieldError instead of quietly running
+one extra query per row.
+"""
+from functools import cache
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query import ModelIterable
+
+
+class DeferredFieldError(RuntimeError):
+    """A field left out of a projection was read from one of its rows"""
+
+
+class StrictModelIterable(ModelIterable):
+    def __iter__(self):
+        for obj in super().__iter__():
+            obj._strict_projection = True
+            yield obj
+
+
+class ProjectedQuerySet(models.QuerySet):
+    def project(self, *fields):
+        """only(*fields); in DEBUG, loading any other field lazily raises"""
+        queryset = self.only(*fields)
+        if settings.DEBUG:
+            queryset._iterable_class = StrictModelIterable
+        return queryset
+
+
+class ProjectionMixin:
+    """Model mixin that enforces ProjectedQuerySet.project() in DEBUG"""
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        if fields and getattr(self, '_strict_projection', False):
+            deferred = self.get_deferred_fields().intersection(fields)
+            if deferred:
+                raise DeferredFieldError(
+                    f"{type(self).__name__}.{', '.join(sorted(deferred))} is not in the projection "
+                    f"this row was loaded with; add it to the view's project()/list_only"
+                )
+        return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
+@cache
+def projected_changelist():
+    """
+    The ChangeList subclass, built on first use: the models import this
+    module, and the admin is slow to import where it is not installed
+    """
+    from django.contrib.admin.views.main import ChangeList
+
+    class ProjectedChangeList(ChangeList):
+        def get_results(self, request):
+            # Only the listed page is projected; admin actions call
+            # get_queryset() again and work on whole rows
+            self.queryset = self.queryset.project(*self.model_admin.list_only)
+            super().get_results(request)
+
+    return ProjectedChangeList
+
+
+class ProjectedAdminMixin:
+    """
+    ModelAdmin mixin: the changelist loads only list_only columns (which must
+    cover list_display and __str__); change forms still load whole rows
+    """
+    list_only = ()
+
+    def get_changelist(self, request, **kwargs):
+        return projected_changelist() if self.list_only else super().get_changelist(request, **kwargs)
@@ -0,0 +1,255 @@
+"""
+Static HTML snapshots of the public pages.
+
+Each published page is rendered as an anonymous visitor would see it and
+written to STATIC_PUBLISH_ROOT/<url path>/index.html, next to an
+index.html.gz (and index.html.br when the brotli package is installed). Files
+are written to a temporary name and renamed into place, so the web server
+never serves half a page. A page that no longer renders (a deleted or
+deactivated row) has its files removed.
+
+Saving or deleting the rows behind a page queues its path in the same
+transaction (see signals.py), so a rolled-back change queues nothing and the
+staff request never renders pages itself. manage.py publish_site --pending
+renders the queue, from cron or as a long-running --watch worker, and
+--all rebuilds everything. The front
+server serves them to requests without a session cookie and passes everything
+else, and every miss, to Django; with nginx, for example:
+
+    location / {
+        if ($cookie_sessionid) { proxy_pass http://django; }
+        gzip_static on;
+        try_files /publish$uri/index.html @django;
+    }
+"""
+import gzip
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+INDEX = 'index.html'
+
+
+def publish_root():
+    """Directory snapshots are written to, or None if publishing is off"""
+    root = getattr(settings, 'STATIC_PUBLISH_ROOT', None)
+    return Path(root) if root else None
+
+
+def site_paths():
+    """Every path the public site publishes"""
+    from .models import About, Portfolio
+
+    paths = [
+        reverse('healthcenter:home'),
+        reverse('healthcenter:content'),
+        reverse('healthcenter:about_list'),
+        reverse('healthcenter:portfolio_list'),
+    ]
+    paths += [
+        reverse('healthcenter:about_detail', args=[pk])
+        for pk in About.objects.filter(is_active=True).values_list('pk', flat=True)
+    ]
+    paths += [
+        reverse('healthcenter:portfolio_detail', args=[pk])
+        for pk in Portfolio.objects.values_list('pk', flat=True)
+    ]
+    return paths
+
+
+def affected_paths(instance):
+    """Published paths that show instance; empty for models that are not published"""
+    from .models import About, CategoryPortfolio, Content, Home, Portfolio
+
+    if isinstance(instance, Home):
+        return [reverse('healthcenter:home')]
+    if isinstance(instance, Content):
+        return [reverse('healthcenter:content')]
+    if isinstance(instance, About):
+        return [reverse('healthcenter:about_list'), reverse('healthcenter:about_detail', args=[instance.pk])]
+    if isinstance(instance, Portfolio):
+        return [
+            reverse('healthcenter:home'),
+            reverse('healthcenter:portfolio_list'),
+            reverse('healthcenter:portfolio_detail', args=[instance.pk]),
+        ]
+    if isinstance(instance, CategoryPortfolio):
+        # Deleting a category nulls Portfolio.category without signals, so
+        # every portfolio page is refreshed rather than just its members
+        return [
+            reverse('healthcenter:home'),
+            reverse('healthcenter:portfolio_list'),
+        ] + [
+            reverse('healthcenter:portfolio_detail', args=[pk])
+            for pk in Portfolio.objects.values_list('pk', flat=True)
+        ]
+    return []
+
+
+def snapshot_dir(path, root=None):
+    """Directory a URL path is published to"""
+    root = root or publish_root()
+    target = (root / path.strip('/')).resolve()
+    if target != root.resolve() and root.resolve() not in target.parents:
+        raise ValueError(f'{path} is outside the publish directory')
+    return target
+
+
+class Renderer:
+    """Runs requests through the full middleware stack, outside any real request"""
+
+    def __init__(self):
+        # Only needed when publishing; django.test is slow to import
+        from django.core.handlers.base import BaseHandler
+        from django.test import RequestFactory
+
+        self.handler = BaseHandler()
+        self.handler.load_middleware()
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*',) and not host.startswith('.')), 'localhost')
+        self.factory = RequestFactory(HTTP_HOST=getattr(settings, 'STATIC_PUBLISH_HOST', host))
+
+    def render(self, path):
+        return self.handler.get_response(self.factory.get(path))
+
+
+def is_publishable(response):
+    """Only pages that are the same for every anonymous visitor are written out"""
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and response.get('Content-Type', '').startswith('text/html')
+    )
+
+
+def _write_atomic(target, data):
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def variants(content):
+    """(suffix, bytes) for the page and each precompressed copy"""
+    yield '', content
+    yield '.gz', gzip.compress(content, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(content, quality=11)
+
+
+def write_snapshot(path, content, root=None):
+    directory = snapshot_dir(path, root)
+    directory.mkdir(parents=True, exist_ok=True)
+    for suffix, data in variants(content):
+        _write_atomic(directory / (INDEX + suffix), data)
+
+
+def remove_snapshot(path, root=None):
+    directory = snapshot_dir(path, root)
+    for suffix in ('', '.gz', '.br'):
+        try:
+            (directory / (INDEX + suffix)).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def publish(paths, root=None, renderer=None):
+    """
+    Render paths and write or remove their snapshots; returns
+    (written, removed) lists of paths
+    """
+    root = root or publish_root()
+    if root is None:
+        return [], []
+    renderer = renderer or Renderer()
+    written, removed = [], []
+    for path in dict.fromkeys(paths):
+        response = renderer.render(path)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        if is_publishable(response):
+            write_snapshot(path, content, root)
+            written.append(path)
+        elif response.status_code >= 500:
+            # Keep serving the last good snapshot
+            logger.error('Not publishing %s: status %s', path, response.status_code)
+        else:
+            if response.status_code != 404:
+                logger.warning('Not publishing %s: status %s or per-visitor response', path, response.status_code)
+            remove_snapshot(path, root)
+            removed.append(path)
+    return written, removed
+
+
+def published_paths(root=None):
+    """Paths that currently have a snapshot on disk"""
+    root = root or publish_root()
+    if root is None or not root.is_dir():
+        return []
+    paths = []
+    for index in root.rglob(INDEX):
+        relative = index.parent.relative_to(root).as_posix()
+        paths.append('/' if relative == '.' else f'/{relative}/')
+    return paths
+
+
+def publish_site(root=None, renderer=None):
+    """Rebuild every snapshot and remove those for pages that are gone"""
+    root = root or publish_root()
+    paths = site_paths()
+    written, removed = publish(paths, root, renderer)
+    stale = set(published_paths(root)) - set(paths)
+    for path in stale:
+        remove_snapshot(path, root)
+        try:
+            snapshot_dir(path, root).rmdir()
+        except OSError:
+            pass  # still holds other pages
+    return written, removed + sorted(stale)
+
+
+def schedule(paths):
+    """
+    Queue paths for publish_site --pending; the rows are part of the current
+    transaction, so they vanish with it on a rollback
+    """
+    from .models import PendingSnapshot
+
+    if publish_root() is None or not paths:
+        return
+    now = timezone.now()
+    PendingSnapshot.objects.bulk_create(
+        [PendingSnapshot(path=path, queued_at=now) for path in dict.fromkeys(paths)],
+        update_conflicts=True, unique_fields=['path'], update_fields=['queued_at'],
+    )
+
+
+def publish_pending(root=None, renderer=None):
+    """Publish the queued paths and dequeue them; returns (written, removed)"""
+    from .models import PendingSnapshot
+
+    pending = list(PendingSnapshot.objects.order_by('queued_at').values_list('pk', 'path', 'queued_at'))
+    if not pending:
+        return [], []
+    written, removed = publish([path for _, path, _ in pending], root, renderer)
+    for pk, _, queued_at in pending:
+        # A path queued again while it was rendering stays for the next run
+        PendingSnapshot.objects.filter(pk=pk, queued_at=queued_at).delete()
+    return written, removed
@@ -0,0 +1,266 @@
+"""
+Unused-CSS removal for the asset bundles.
+
+used_names() collects every class and id the site can produce: class/id
+attributes in templates/, class strings in the apps' Python code (form
+widget attrs), the HTML stored in CKEditor5Field columns, and every word in
+the bundled JavaScript, which is where classes added at runtime
+(show, collapsing, aos-animate...) come from. A class attribute built from a
+template variable, such as alert-{{ message.tags }}, keeps every class that
+starts with its literal part.
+
+purge() then drops the style rules whose selectors all need a class or id
+that is not in that set. Element, attribute and pseudo selectors, @font-face
+and @keyframes are always kept. CSS_PURGE_SAFELIST adds names (or regular
+expressions, written as re:pattern) that must survive anyway.
+
+critical_css() keeps only the rules that apply to the first screen of a
+rendered page (everything before the end of its first <section>), for
+inlining in <head>.
+"""
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+
+# Classes added by Django or by scripts the scan cannot see
+DEFAULT_SAFELIST = [
+    'active', 'show', 'showing', 'hiding', 'fade', 'collapsing', 'collapsed', 'was-validated', 'is-invalid',
+    'is-valid', 'scrolled', 'mobile-nav-active', 'dropdown-active', 'aos-animate', 'aos-init',
+    'filter-active', 'loaded', 'errorlist', 'helptext', 'required',
+]
+
+CLASS_ATTR = re.compile(r'''\bclass\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+ID_ATTR = re.compile(r'''\bid\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+PY_CLASS = re.compile(r'''['"]class['"]\s*:\s*['"]([^'"]+)['"]''')
+TEMPLATE_CODE = re.compile(r'\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}', re.DOTALL)
+WORD = re.compile(r'[A-Za-z_][\w-]*')
+SELECTOR_CLASS = re.compile(r'\.((?:[\w-]|\\.)+)')
+SELECTOR_ID = re.compile(r'#((?:[\w-]|\\.)+)')
+FUNCTIONAL_PSEUDO = re.compile(r':(?:not|is|where|has)\(')
+# At-rules whose block holds rules to purge; other blocks are kept whole
+GROUPING_AT_RULES = ('@media', '@supports', '@layer', '@container')
+
+
+class UsedNames:
+    """Classes and ids in use, with prefixes from dynamic class attributes"""
+
+    def __init__(self):
+        self.names = set()
+        self.prefixes = set()
+        self.patterns = []
+
+    def add_attribute(self, value):
+        # Words glued to template code (alert-{{ ... }}) are prefixes
+        for part in re.split(r'\s+', value):
+            if TEMPLATE_CODE.search(part) or '{{' in part or '{%' in part:
+                literal = TEMPLATE_CODE.split(part)[0]
+                if literal:
+                    self.prefixes.add(literal)
+            else:
+                self.names.add(part)
+        self.names.update(TEMPLATE_CODE.sub(' ', value).split())
+
+    def add_words(self, text):
+        self.names.update(WORD.findall(text))
+
+    def add_safelist(self, entries):
+        for entry in entries:
+            if entry.startswith('re:'):
+                self.patterns.append(re.compile(entry[3:]))
+            else:
+                self.names.add(entry)
+
+    def __contains__(self, name):
+        return (
+            name in self.names
+            or any(name.startswith(prefix) for prefix in self.prefixes)
+            or any(pattern.search(name) for pattern in self.patterns)
+        )
+
+
+def scan_html(used, html):
+    for match in CLASS_ATTR.finditer(html):
+        used.add_attribute(match.group(1) if match.group(1) is not None else match.group(2))
+    for match in ID_ATTR.finditer(html):
+        value = match.group(1) if match.group(1) is not None else match.group(2)
+        used.names.update(TEMPLATE_CODE.sub(' ', value).split())
+
+
+def stored_html():
+    """Values of every CKEditor5Field in the database"""
+    from django_ckeditor_5.fields import CKEditor5Field
+
+    for model in apps.get_models():
+        fields = [field.name for field in model._meta.concrete_fields if isinstance(field, CKEditor5Field)]
+        if fields:
+            for row in model._default_manager.values_list(*fields).iterator():
+                yield from (value for value in row if value)
+
+
+def used_names(js_files=(), include_database=True):
+    """UsedNames for the whole site; js_files are paths to the bundled scripts"""
+    used = UsedNames()
+    used.add_safelist(DEFAULT_SAFELIST + list(getattr(settings, 'CSS_PURGE_SAFELIST', [])))
+    # Project templates and those of installed apps (crispy-forms renders
+    # most form markup)
+    directories = [Path(directory) for directory in settings.TEMPLATES[0]['DIRS']]
+    directories += [Path(config.path) / 'templates' for config in apps.get_app_configs()]
+    for directory in directories:
+        for template in directory.rglob('*.html'):
+            scan_html(used, template.read_text(encoding='utf-8', errors='replace'))
+    for app in ('accounts', 'healthcenter', 'core'):
+        for module in (Path(settings.BASE_DIR) / app).rglob('*.py'):
+            for value in PY_CLASS.findall(module.read_text(encoding='utf-8', errors='replace')):
+                used.add_attribute(value)
+    for path in js_files:
+        used.add_words(Path(path).read_text(encoding='utf-8', errors='replace'))
+    if include_database:
+        for html in stored_html():
+            scan_html(used, html)
+    return used
+
+
+def _strip_comments(css):
+    return re.sub(r'/\*(?!!).*?\*/', '', css, flags=re.DOTALL)
+
+
+def split_blocks(css):
+    """Top-level (prelude, body) pairs of css; body is None for statements like @import"""
+    blocks = []
+    depth = 0
+    start = 0
+    prelude = None
+    quote = None
+    i = 0
+    while i < len(css):
+        char = css[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            if depth == 0:
+                prelude = css[start:i].strip()
+                start = i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            statement = css[start:i].strip()
+            if statement:
+                blocks.append((statement, None))
+            start = i + 1
+        i += 1
+    return blocks
+
+
+def split_selectors(prelude):
+    """Selector list split on top-level commas"""
+    selectors, depth, current = [], 0, []
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            selectors.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    selectors.append(''.join(current).strip())
+    return [selector for selector in selectors if selector]
+
+
+def _unescape(name):
+    return re.sub(r'\\(.)', r'\1', name)
+
+
+def _required(selector):
+    """Classes and ids a selector needs, ignoring those inside :not()/:is()/:where()/:has()"""
+    while True:
+        match = FUNCTIONAL_PSEUDO.search(selector)
+        if not match:
+            break
+        depth, end = 1, match.end()
+        while end < len(selector) and depth:
+            depth += {'(': 1, ')': -1}.get(selector[end], 0)
+            end += 1
+        selector = selector[:match.start()] + selector[end:]
+    selector = re.sub(r'\[[^\]]*\]', '', selector)
+    classes = [_unescape(name) for name in SELECTOR_CLASS.findall(selector)]
+    ids = [_unescape(name) for name in SELECTOR_ID.findall(selector)]
+    return classes + ids
+
+
+def selector_matches(selector, used):
+    return all(name in used for name in _required(selector))
+
+
+def purge(css, used, keep_selector=None, keep_at_rule=None):
+    """
+    css without the rules none of whose selectors can match; keep_selector
+    and keep_at_rule (called with the at-rule's prelude) add extra tests
+    """
+    out = []
+    for prelude, body in split_blocks(_strip_comments(css)):
+        if body is None:
+            out.append(prelude + ';')
+        elif prelude.startswith('@'):
+            if prelude.lower().startswith(GROUPING_AT_RULES):
+                inner = purge(body, used, keep_selector, keep_at_rule)
+                if inner.strip():
+                    out.append(f'{prelude}{{{inner}}}')
+            elif keep_at_rule is None or keep_at_rule(prelude):
+                out.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in split_selectors(prelude)
+                if selector_matches(selector, used) and (keep_selector is None or keep_selector(selector))
+            ]
+            if selectors:
+                out.append(f'{",".join(selectors)}{{{body}}}')
+    return '\n'.join(out)
+
+
+TAG = re.compile(r'<([a-zA-Z][\w-]*)')
+ATTRIBUTE_NAME = re.compile(r'\s([a-zA-Z][\w:-]*)(?=[\s=/>])')
+SELECTOR_ATTRIBUTE = re.compile(r'\[\s*([\w-]+)')
+SELECTOR_TAG = re.compile(r'(?:^|[\s>+~(,])([a-zA-Z][\w-]*)')
+
+
+def above_the_fold(html):
+    """The part of a rendered page shown before scrolling: up to the end of its first <section>"""
+    end = html.find('</section>')
+    return html if end == -1 else html[:end]
+
+
+def critical_css(css, html, used):
+    """Rules of (already purged) css that apply to the first screen of html"""
+    first_screen = above_the_fold(html)
+    fold = UsedNames()
+    scan_html(fold, first_screen)
+    tags = {tag.lower() for tag in TAG.findall(first_screen)} | {'html', 'body', 'main'}
+    attributes = {name.lower() for name in ATTRIBUTE_NAME.findall(first_screen)}
+
+    def on_first_screen(selector):
+        if not selector_matches(selector, fold):
+            return False
+        if any(name.lower() not in attributes for name in SELECTOR_ATTRIBUTE.findall(selector)):
+            return False
+        bare = re.sub(r'\[[^\]]*\]|::?[\w-]+(\([^)]*\))?|[.#](?:[\w-]|\\.)+', ' ', selector)
+        return all(tag.lower() in tags for tag in SELECTOR_TAG.findall(bare) if tag != '*')
+
+    def keep(selector):
+        # :root custom properties are needed by everything below
+        return selector.strip() in (':root', '*', '*::before', '*::after') or on_first_screen(selector)
+
+    # Animations can wait for the full stylesheet; fonts are worth starting early
+    return purge(css, used, keep, keep_at_rule=lambda prelude: not prelude.lower().startswith('@keyframes'))
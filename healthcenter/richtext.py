@@ -0,0 +1,170 @@
+"""
+Rewriting of <img> tags in stored CKEditor HTML.
+
+image_names() lists the media files an HTML fragment embeds, and
+rewrite_images() gives each known one a srcset, intrinsic width/height and
+lazy loading. Both work on the markup with bounded regular expressions, so
+they are cheap enough to run on every save.
+
+sanitize_html() reduces untrusted markup to the tags and attributes the
+editor produces, for echoing submitted HTML back (see LazyCKEditor5Widget).
+"""
+import re
+from html import unescape
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.utils.html import escape
+
+IMG_TAG = re.compile(r'<img\b[^<>]{0,4096}>', re.IGNORECASE)
+ATTRIBUTE = re.compile(r'''([^\s"'<>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?''')
+
+# Attributes rewrite_images() owns; anything else on the tag is kept
+MANAGED = ('src', 'srcset', 'sizes', 'width', 'height', 'loading', 'decoding')
+SIZES = '(max-width: 1200px) 100vw, 1200px'
+
+
+def parse_attributes(tag):
+    """Attributes of an <img ...> tag as an ordered {name: value} dict"""
+    body = tag[4:-1].rstrip('/')
+    attributes = {}
+    for match in ATTRIBUTE.finditer(body):
+        name = match.group(1).lower()
+        value = next((group for group in match.groups()[1:] if group is not None), '')
+        attributes.setdefault(name, unescape(value))
+    return attributes
+
+
+def media_name(src):
+    """Storage name for a src under MEDIA_URL, or None"""
+    path = unquote(urlsplit(src).path)
+    media_url = urlsplit(settings.MEDIA_URL).path
+    if not path.startswith(media_url):
+        return None
+    return path[len(media_url):] or None
+
+
+def image_names(html):
+    """Storage names of the media images embedded in html"""
+    names = set()
+    for tag in IMG_TAG.findall(html or ''):
+        name = media_name(parse_attributes(tag).get('src', ''))
+        if name:
+            names.add(name)
+    return names
+
+
+def rewrite_images(html, images):
+    """
+    Rewrite the <img> tags in html whose source is in images, a mapping of
+    storage name -> InlineImage; other tags are left alone.
+    """
+    if not html or not images:
+        return html
+
+    def replace(match):
+        attributes = parse_attributes(match.group(0))
+        image = images.get(media_name(attributes.get('src', '')) or '')
+        if image is None:
+            return match.group(0)
+        managed = {'src': image.url, 'width': image.width, 'height': image.height}
+        if image.srcset:
+            managed.update(srcset=image.srcset, sizes=SIZES)
+        managed.update(loading='lazy', decoding='async')
+        others = {name: value for name, value in attributes.items() if name not in MANAGED}
+        parts = [f'{name}="{escape(value)}"' for name, value in {**managed, **others}.items()]
+        return f'<img {" ".join(parts)}>'
+
+    return IMG_TAG.sub(replace, html)
+
+
+# What the editor toolbar can produce (core.settings.CKEDITOR_5_CONFIGS)
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'em', 'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'hr', 'i', 'img', 'li', 'oembed', 'ol', 'p', 'pre', 's', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td',
+    'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Dropped together with their content
+DROPPED_TAGS = {'script', 'style', 'template', 'iframe', 'object', 'noscript', 'textarea', 'title'}
+ALLOWED_ATTRIBUTES = {
+    'alt', 'class', 'colspan', 'decoding', 'height', 'href', 'loading', 'rel', 'rowspan', 'sizes', 'src',
+    'srcset', 'style', 'target', 'title', 'url', 'width',
+}
+URL_ATTRIBUTES = {'href', 'src', 'url'}
+# style is kept only for the font colour/size and alignment declarations
+STYLE = re.compile(
+    r'^\s*(?:(?:color|background-color|font-size|text-align|width|height)\s*:\s*[#\w\s.,%()-]{1,64}(?:;\s*|$))+$',
+    re.IGNORECASE,
+)
+SAFE_URL = re.compile(r'^(?:https?:|mailto:|tel:|[/#?.]|[^:/?#]*(?:[/?#]|$))', re.IGNORECASE)
+
+
+class _Sanitizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.open = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            value = value or ''
+            if name not in ALLOWED_ATTRIBUTES:
+                continue
+            if name in URL_ATTRIBUTES and not SAFE_URL.match(''.join(value.split())):
+                continue
+            if name == 'style' and (not STYLE.match(value) or re.search(r'url|expression', value, re.IGNORECASE)):
+                continue
+            if name == 'srcset' and not all(SAFE_URL.match(candidate.strip()) for candidate in value.split(',')):
+                continue
+            kept.append(f' {name}="{escape(value)}"')
+        self.parts.append(f'<{tag}{"".join(kept)}>')
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in DROPPED_TAGS:
+            self.dropping -= 1
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open:
+            return
+        # Close anything left open inside tag, so the output stays balanced
+        while self.open:
+            name = self.open.pop()
+            self.parts.append(f'</{name}>')
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.parts.append(escape(data))
+
+    def result(self):
+        self.close()
+        return ''.join(self.parts + [f'</{name}>' for name in reversed(self.open)])
+
+
+def sanitize_html(html):
+    """
+    html with everything outside ALLOWED_TAGS/ALLOWED_ATTRIBUTES removed:
+    scripts, event handlers, styles and javascript: URLs never survive
+    """
+    if not html:
+        return ''
+    sanitizer = _Sanitizer()
+    sanitizer.feed(html)
+    return sanitizer.result()
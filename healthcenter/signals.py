@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import publisher
+from .page_cache import bump_model_version, cached_pages
+
+
+def _tracked_labels():
+    return {label for labels in cached_pages().values() for label in labels}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_pages(sender, **kwargs):
+    """Drop cached pages built from sender once the change is committed"""
+    label = sender._meta.label
+    if label in _tracked_labels():
+        transaction.on_commit(lambda: bump_model_version(label))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def publish_snapshots(sender, instance, **kwargs):
+    """Queue the static snapshots that show instance for re-rendering"""
+    if kwargs.get('raw') or sender._meta.app_label != 'healthcenter' or publisher.publish_root() is None:
+        return
+    publisher.schedule(publisher.affected_paths(instance))
+
+
+def rows_updated(model, pks):
+    """
+    What post_save would have done for rows of model written with
+    QuerySet.update(): drop the cached pages and queue the snapshots that
+    show them
+    """
+    if not pks:
+        return
+    label = model._meta.label
+    if label in _tracked_labels():
+        transaction.on_commit(lambda: bump_model_version(label))
+    if model._meta.app_label != 'healthcenter' or publisher.publish_root() is None:
+        return
+    # affected_paths only looks at the type and pk
+    publisher.schedule([path for pk in pks for path in publisher.affected_paths(model(pk=pk))])
@@ -0,0 +1,104 @@
+"""
+Streamed template rendering for list pages.
+
+stream_template() renders a template one top-level node of its root
+template at a time, following {% extends %} the way ExtendsNode does.
+Everything up to and including {% block content %}, where the queries run,
+is rendered before it returns, so a failing query or template error is an
+ordinary 500 rather than a 200 cut off mid-page; the rest of the layout
+streams.
+
+Under ASGI a synchronous iterator is consumed in full by the handler anyway
+(with a warning), so render_streaming() only streams under WSGI.
+
+Middleware has finished with the request by the time the body streams. A
+stream therefore cannot set the CSRF cookie or mark flash messages as read.
+render_streaming() falls back to a normal response when messages are
+pending, and streamed pages must not need {% csrf_token %} unless the view
+calls get_token() first.
+"""
+import itertools
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode
+
+# Blocks that hold the data-dependent part of a page
+EAGER_BLOCKS = ('content',)
+
+
+def _first_node(nodelist):
+    return next((node for node in nodelist if not isinstance(node, TextNode)), None)
+
+
+def _contains_block(node, names):
+    return any(block.name in names for block in node.get_nodes_by_type(BlockNode))
+
+
+def _iter_nodes(template, context):
+    """(node, rendered str) for each top-level node of the root template"""
+    extends = _first_node(template.nodelist)
+    if not isinstance(extends, ExtendsNode):
+        for node in template.nodelist:
+            yield node, node.render_annotated(context)
+        return
+
+    parent = extends.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(extends.blocks)
+    if not isinstance(_first_node(parent.nodelist), ExtendsNode):
+        block_context.add_blocks({node.name: node for node in parent.nodelist.get_nodes_by_type(BlockNode)})
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _iter_nodes(parent, context)
+
+
+def stream_template(template_name, context=None, request=None, eager_blocks=EAGER_BLOCKS):
+    """
+    Iterator of str chunks of a rendered Django template; the nodes up to the
+    one holding eager_blocks are rendered before it returns
+    """
+    backend_template = loader.get_template(template_name)
+    nodes = _stream(backend_template, context, request)
+    head = []
+    for node, text in nodes:
+        head.append(text)
+        if _contains_block(node, eager_blocks):
+            break
+    return itertools.chain([''.join(head)], (text for _, text in nodes))
+
+
+def _stream(backend_template, context, request):
+    template = backend_template.template
+    context = make_context(context, request, autoescape=backend_template.backend.engine.autoescape)
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from _iter_nodes(template, context)
+
+
+def _has_messages(request):
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def render_streaming(request, template_name, context=None):
+    """
+    render() as a StreamingHttpResponse, unless flash messages are waiting or
+    the request came in over ASGI
+    """
+    if _has_messages(request) or isinstance(request, ASGIRequest):
+        return render(request, template_name, context)
+    return StreamingHttpResponse(stream_template(template_name, context, request), content_type='text/html; charset=utf-8')
+
+
+class StreamingListMixin:
+    """ListView mixin that streams the page (see render_streaming)"""
+
+    def render_to_response(self, context, **response_kwargs):
+        return render_streaming(self.request, self.get_template_names()[0], context)
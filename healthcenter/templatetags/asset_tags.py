@@ -0,0 +1,75 @@
+"""
+Per-page asset bundles (see healthcenter.assets).
+
+    {% block bundles %}{% bundle 'aos' 'isotope' %}{% endblock %}
+
+in a page, and {% bundle_css %} / {% bundle_js %} in the base template.
+{% critical_css 'home' %} in the same block inlines that page's
+above-the-fold CSS.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from healthcenter import assets
+
+register = template.Library()
+
+# Kept in the first render_context dict, which every template rendered for
+# the page (including {% include %}s) shares
+REQUESTED = 'asset_bundles'
+CRITICAL = 'asset_critical_css'
+
+
+def _requested(context):
+    return context.render_context.dicts[0].setdefault(REQUESTED, {})
+
+
+@register.simple_tag(takes_context=True)
+def bundle(context, *names):
+    """Ask for bundles on this page; must run before {% bundle_css %} for their CSS"""
+    assets.ordered(names)  # unknown names fail here, at the template that used them
+    _requested(context).update(dict.fromkeys(names))
+    return ''
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context, page):
+    """
+    Inline the above-the-fold CSS built for page by manage.py purge_css; the
+    page's stylesheets then load without blocking rendering
+    """
+    css = assets.load_critical(page)
+    if css is None:
+        return ''
+    context.render_context.dicts[0][CRITICAL] = True
+    return format_html('<style>{}</style>', mark_safe(css.replace('</', '<\\/')))
+
+
+@register.simple_tag(takes_context=True)
+def bundle_css(context):
+    """Stylesheets for the requested bundles, and preload hints for their scripts"""
+    names = list(_requested(context))
+    if context.render_context.dicts[0].get(CRITICAL):
+        link = (
+            '<link href="{0}" rel="preload" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            '<noscript><link href="{0}" rel="stylesheet"></noscript>'
+        )
+    else:
+        link = '<link href="{0}" rel="stylesheet">'
+    stylesheets = format_html_join('\n  ', link, ((static(path),) for path in assets.files_for(names, 'css')))
+    preloads = format_html_join(
+        '\n  ', '<link href="{}" rel="preload" as="script">', ((static(path),) for path in assets.files_for(names, 'js')),
+    )
+    return format_html('{}\n  {}', stylesheets, preloads)
+
+
+@register.simple_tag(takes_context=True)
+def bundle_js(context):
+    """Deferred scripts for the requested bundles, in bundle order"""
+    names = list(_requested(context))
+    return format_html_join(
+        '\n  ', '<script src="{}" defer></script>',
+        ((static(path),) for path in assets.files_for(names, 'js')),
+    )
@@ -0,0 +1,34 @@
+"""
+{% web_fonts %}: the self-hosted fonts built by manage.py build_web_fonts,
+or the Google Fonts stylesheet until they have been built.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from healthcenter.webfonts import load_manifest
+
+register = template.Library()
+
+GOOGLE_FONTS = mark_safe(
+    '<link href="https://fonts.googleapis.com" rel="preconnect">\n'
+    '  <link href="https://fonts.gstatic.com" rel="preconnect" crossorigin>\n'
+    '  <link href="https://fonts.googleapis.com/css2?family=Roboto:ital,wght@0,100;0,300;0,400;0,500;0,700;0,900;'
+    '1,100;1,300;1,400;1,500;1,700;1,900&family=Poppins:ital,wght@0,100;0,200;0,300;0,400;0,500;0,600;0,700;'
+    '0,800;0,900;1,100;1,200;1,300;1,400;1,500;1,600;1,700;1,800;1,900&family=Raleway:ital,wght@0,100;0,200;'
+    '0,300;0,400;0,500;0,600;0,700;0,800;0,900;1,100;1,200;1,300;1,400;1,500;1,600;1,700;1,800;1,900'
+    '&display=swap" rel="stylesheet">'
+)
+
+
+@register.simple_tag
+def web_fonts():
+    manifest = load_manifest()
+    if not manifest:
+        return GOOGLE_FONTS
+    preloads = format_html_join(
+        '\n  ', '<link rel="preload" href="{}" as="font" type="font/woff2" crossorigin>',
+        ((static(path),) for path in manifest['preload']),
+    )
+    return format_html('{}\n  <link href="{}" rel="stylesheet">', preloads, static(manifest['css']))
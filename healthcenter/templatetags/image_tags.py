@@ -0,0 +1,48 @@
+"""
+Template helpers for SafeImageField files, reading only the stored
+width/height/placeholder columns so rendering never opens the image.
+"""
+from math import gcd
+
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def _metadata(file):
+    field, instance = file.field, file.instance
+    width = getattr(instance, field.width_field, None) if field.width_field else None
+    height = getattr(instance, field.height_field, None) if field.height_field else None
+    placeholder_field = getattr(field, 'placeholder_field', None)
+    placeholder = getattr(instance, placeholder_field, '') if placeholder_field else ''
+    return width, height, placeholder
+
+
+@register.filter
+def img_attrs(file):
+    """
+    width/height attributes and a dominant colour background for an <img>:
+    <img src="{{ item.image.url }}" {{ item.image|img_attrs }}>
+    """
+    if not file:
+        return ''
+    width, height, placeholder = _metadata(file)
+    attrs = []
+    if width and height:
+        attrs.append(format_html('width="{}" height="{}"', width, height))
+    if placeholder:
+        attrs.append(format_html('style="background-color: {}"', placeholder))
+    return format_html(' '.join(['{}'] * len(attrs)), *attrs)
+
+
+@register.filter
+def aspect_ratio(file):
+    """Reduced 'w / h' for CSS aspect-ratio, or '' when unknown"""
+    if not file:
+        return ''
+    width, height, _ = _metadata(file)
+    if not (width and height):
+        return ''
+    divisor = gcd(width, height)
+    return f'{width // divisor} / {height // divisor}'
@@ -0,0 +1,16 @@
+"""
+{{ html|sanitize_html }}: untrusted rich text reduced to the markup the
+editor produces (see healthcenter.richtext.sanitize_html). The lazy editor
+preview uses it, since after an invalid submit it shows what was POSTed.
+"""
+from django import template
+from django.utils.safestring import mark_safe
+
+from healthcenter import richtext
+
+register = template.Library()
+
+
+@register.filter
+def sanitize_html(value):
+    return mark_safe(richtext.sanitize_html(value))
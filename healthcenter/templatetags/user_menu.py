@@ -0,0 +1,17 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from healthcenter.page_cache import HOLE_END, HOLE_START
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def user_menu(context):
+    """
+    The signed-in user's menu (or the login button), marked so that
+    PageCacheMiddleware can cache the page without it
+    """
+    fragment = render_to_string('healthcenter/user_menu.html', request=context.get('request'))
+    return mark_safe(HOLE_START.decode() + fragment + HOLE_END.decode())
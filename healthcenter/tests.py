@@ -1,3 +1,624 @@
-from django.test import TestCase
+import importlib
+import io
+import shutil
+import tempfile
+import warnings
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, modify_settings, override_settings
+from django.urls import Resolver404, clear_url_caches, resolve, reverse
+from PIL import Image
+
+from core import warmup
+
+from . import preload, publisher, urls
+from .compression import HtmlMinifier, minify_html
+from .inline_images import process_upload
+from .inspection import OVERSIZE, InspectionValidator, inspect
+from .models import CategoryPortfolio, Content, Home, InlineImage, PendingSnapshot, Portfolio
+from .richtext import IMG_TAG, parse_attributes, sanitize_html
+from .streaming import render_streaming
+from .uploads import MaxSizeUploadHandler, RejectedUpload, dominant_color, validate_image_upload
+from .widgets import LazyCKEditor5Widget
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def shared_cache_settings(location):
+    return {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+
+
+@override_settings(STATIC_PUBLISH_ROOT=None)
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+
+    def get_home(self):
+        return self.client.get(reverse('healthcenter:home')).get('X-Page-Cache')
+
+    def test_save_invalidates_shared_cache(self):
+        with self.settings(CACHES=shared_cache_settings(self.cache_dir)):
+            self.assertEqual(self.get_home(), 'miss')
+            self.assertEqual(self.get_home(), 'hit')
+            with self.captureOnCommitCallbacks(execute=True):
+                CategoryPortfolio.objects.create(name='Dental')
+            self.assertEqual(self.get_home(), 'miss')
+
+    def test_hits_are_not_minified_again(self):
+        with self.settings(CACHES=shared_cache_settings(self.cache_dir)):
+            self.get_home()
+            with mock.patch('healthcenter.compression.minify_html', wraps=minify_html) as minify:
+                self.assertEqual(self.get_home(), 'hit')
+            minify.assert_not_called()
+
+    @override_settings(DEBUG=False, CACHES=LOCMEM)
+    def test_per_process_cache_is_not_used(self):
+        self.assertIsNone(self.get_home())
+        self.assertIsNone(self.get_home())
+
+
+class PublishQueueTests(TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, True)
+        override = override_settings(STATIC_PUBLISH_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def queued(self):
+        return set(PendingSnapshot.objects.values_list('path', flat=True))
+
+    def test_save_queues_without_rendering(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryPortfolio.objects.create(name='Dental')
+        self.assertEqual(self.queued(), {reverse('healthcenter:home'), reverse('healthcenter:portfolio_list')})
+        self.assertEqual(publisher.published_paths(self.root), [])
+
+        written, removed = publisher.publish_pending(self.root)
+        self.assertIn(reverse('healthcenter:home'), written)
+        self.assertTrue((self.root / 'index.html').exists())
+        self.assertEqual(self.queued(), set())
+
+    def test_rollback_queues_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            CategoryPortfolio.objects.create(name='Dental')
+            raise RuntimeError
+        self.assertEqual(self.queued(), set())
+
+    def test_path_queued_again_while_rendering_is_kept(self):
+        publisher.schedule([reverse('healthcenter:home')])
+        renderer = publisher.Renderer()
+        render = renderer.render
+
+        def requeue(path):
+            publisher.schedule([path])
+            return render(path)
+        renderer.render = requeue
+        publisher.publish_pending(self.root, renderer)
+        self.assertEqual(self.queued(), {reverse('healthcenter:home')})
+
+
+class HtmlMinifierTests(SimpleTestCase):
+    HTML = (
+        '<!DOCTYPE html>\n<html>\n  <head>\n    <title>  Clinic   </title>\n'
+        '    <style>\n      body  {  margin: 0; }\n    </style>\n'
+        '    <!--[if lt IE 9]><script src="x.js"></script><![endif]-->\n  </head>\n'
+        '  <body class="a   b">\n    <!-- dropped -->\n    <!--user-menu--><a href="/">Sign in</a><!--/user-menu-->\n'
+        '    <p>Open\t\t daily,\n\n   9 to 5</p>\n'
+        '    <pre>  keep\n    this  </pre>\n'
+        '    <textarea name="t">  as   typed </textarea>\n'
+        '    <script>\n  if (a < b && b > c) {  x = "<!-- not a comment -->";  }\n    </script>\n'
+        '    <!-- a -- b -->\n  </body>\n</html>\n'
+    )
+
+    def minify_in_chunks(self, chunks):
+        minifier = HtmlMinifier()
+        return ''.join(minifier.feed(chunk) for chunk in chunks) + minifier.close()
+
+    def test_any_single_split_gives_the_same_output(self):
+        expected = minify_html(self.HTML)
+        for cut in range(len(self.HTML) + 1):
+            with self.subTest(cut=cut):
+                self.assertEqual(self.minify_in_chunks([self.HTML[:cut], self.HTML[cut:]]), expected)
+
+    def test_fixed_size_chunks_give_the_same_output(self):
+        expected = minify_html(self.HTML)
+        for size in (1, 2, 3, 5, 8, 13, 64):
+            with self.subTest(size=size):
+                chunks = [self.HTML[i:i + size] for i in range(0, len(self.HTML), size)]
+                self.assertEqual(self.minify_in_chunks(chunks), expected)
+
+    def test_verbatim_elements_and_kept_comments(self):
+        html = minify_html(self.HTML)
+        self.assertIn('<pre>  keep\n    this  </pre>', html)
+        self.assertIn('<textarea name="t">  as   typed </textarea>', html)
+        self.assertIn('x = "<!-- not a comment -->";', html)
+        self.assertIn('<!--[if lt IE 9]>', html)
+        self.assertIn('<!--user-menu--><a href="/">Sign in</a><!--/user-menu-->', html)
+        self.assertNotIn('dropped', html)
+        self.assertIn('<p>Open daily,\n9 to 5</p>', html)
+
+
+class Exploding:
+    def __iter__(self):
+        raise RuntimeError('query failed')
+
+
+class StreamingTests(TestCase):
+
+    def test_error_in_content_block_is_raised_before_the_response(self):
+        request = RequestFactory().get('/content/')
+        request.user = mock.Mock(is_authenticated=False, is_staff=False, is_superuser=False)
+        with self.assertRaisesMessage(RuntimeError, 'query failed'):
+            render_streaming(request, 'healthcenter/content.html', {'contents': Exploding()})
+
+    def test_streams_under_wsgi(self):
+        self.assertTrue(self.client.get(reverse('healthcenter:content')).streaming)
+
+    async def test_renders_in_full_under_asgi(self):
+        response = await self.async_client.get(reverse('healthcenter:content'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+
+
+class PreloadHintsTests(SimpleTestCase):
+    HERO = '<html><head></head><body><main><section><img src="/media/portfolio/{}.jpg"></section></main></body></html>'
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self, path):
+        return preload.page_for(resolve(path), path)
+
+    def test_detail_pages_learn_their_own_image(self):
+        preload.learn(self.page('/portfolio/1/'), self.HERO.format('one'))
+        preload.learn(self.page('/portfolio/2/'), self.HERO.format('two'))
+        self.assertEqual(preload.hints_for(self.page('/portfolio/1/')), [
+            '</media/portfolio/one.jpg>; rel=preload; fetchpriority=high; as=image',
+        ])
+        self.assertEqual(preload.hints_for(self.page('/portfolio/3/')), [])
+
+    def test_pages_without_arguments_share_hints_by_url_name(self):
+        self.assertEqual(self.page('/portfolio/'), 'healthcenter:portfolio_list')
+
+    async def test_early_hints_use_the_path_of_detail_pages(self):
+        preload.learn(self.page('/portfolio/1/'), self.HERO.format('one'))
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def application(scope, receive, send):
+            pass
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/portfolio/2/', 'extensions': {'http.response.early_hint': {}}}
+        await preload.early_hints(application)(scope, None, send)
+        self.assertEqual(sent, [])
+        await preload.early_hints(application)({**scope, 'path': '/portfolio/1/'}, None, send)
+        self.assertEqual(sent[0]['links'], [b'</media/portfolio/one.jpg>; rel=preload; fetchpriority=high; as=image'])
+
+
+def png_poster(provider, video_id):
+    data = io.BytesIO()
+    Image.new('RGB', (32, 18), '#336699').save(data, 'PNG')
+    return data.getvalue()
+
+
+def refuse_to_fetch(provider, video_id):
+    raise AssertionError('fetched on save')
+
+
+class VideoPosterTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        override = override_settings(MEDIA_ROOT=media, STATIC_PUBLISH_ROOT=None)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    @override_settings(VIDEO_POSTER_FETCHER='healthcenter.tests.refuse_to_fetch')
+    def create_home(self):
+        return Home.objects.create(
+            banner_title='Welcome', welcome_message='Hi', short_description='Clinic', vision='-', mission='-',
+            video_embed='https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+        )
+
+    def test_save_does_not_fetch(self):
+        home = self.create_home()
+        self.assertEqual((home.video_provider, home.video_id), ('youtube', 'dQw4w9WgXcQ'))
+        self.assertFalse(home.video_poster)
+
+    @override_settings(VIDEO_POSTER_FETCHER='healthcenter.tests.png_poster')
+    def test_command_fetches_missing_posters(self):
+        home = self.create_home()
+        call_command('fetch_video_posters', stdout=io.StringIO())
+        home.refresh_from_db()
+        self.assertEqual(home.video_poster.name, 'home/posters/youtube-dQw4w9WgXcQ.png')
+
+    def test_migration_parses_existing_videos(self):
+        home = self.create_home()
+        Home.objects.filter(pk=home.pk).update(video_provider='', video_id='')
+        migration = importlib.import_module('healthcenter.migrations.0012_home_parse_videos')
+        migration.parse_existing_videos(apps, None)
+        home.refresh_from_db()
+        self.assertEqual((home.video_provider, home.video_id), ('youtube', 'dQw4w9WgXcQ'))
+
+    def test_default_fetcher_stays_offline(self):
+        home = self.create_home()
+        out = io.StringIO()
+        call_command('fetch_video_posters', stdout=out)
+        self.assertIn('0 posters fetched, 1 not available', out.getvalue())
+
+
+@override_settings(STATIC_PUBLISH_ROOT=None)
+class LeanUrlTests(TestCase):
+    """Without the editing apps (core.settings_lean) the staff pages and editor uploads are not mounted"""
+
+    def setUp(self):
+        override = modify_settings(INSTALLED_APPS={'remove': ['django_ckeditor_5', 'crispy_forms', 'crispy_bootstrap5']})
+        override.enable()
+        self.addCleanup(self.reload_urls)
+        self.addCleanup(override.disable)
+        self.reload_urls()
+
+    def reload_urls(self):
+        importlib.reload(urls)
+        importlib.reload(importlib.import_module('core.urls'))
+        clear_url_caches()
+
+    def test_staff_pages_are_not_mounted(self):
+        with self.assertRaises(Resolver404):
+            resolve('/portfolio/create/')
+
+    def test_editor_upload_is_not_mounted(self):
+        with self.assertRaises(Resolver404):
+            resolve('/ckeditor5/image_upload/')
+
+    def test_pages_render_for_staff_without_edit_links(self):
+        staff = get_user_model().objects.create_user('admin', 'admin@example.com', 'x', is_staff=True)
+        self.client.force_login(staff)
+        for name in ('healthcenter:home', 'healthcenter:content', 'healthcenter:about_list'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                self.assertNotIn(b'/create/', content)
+
+
+class WarmupTests(SimpleTestCase):
+
+    def test_form_templates_load_without_warnings(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            warmup.load_form_templates()
+        self.assertEqual([str(warning.message) for warning in caught], [])
+
+
+class InspectionTests(SimpleTestCase):
+    PROSE = [
+        'Select your appointment',
+        'We will update the schedule soon',
+        'Clinic #1 -- open',
+        'Please select one from the list',
+        'Delete from the list when you are done.',
+        'We create tables of results every month',
+        "It's the doctor's day off",
+        'Open 9-5, Mon to Fri',
+    ]
+    INJECTIONS = [
+        "' UNION SELECT password FROM users--",
+        '1; DROP TABLE users',
+        "admin'--",
+        "admin' #",
+        "' OR '1'='1",
+        'SELECT * FROM users',
+        'select name, password from users',
+        'select password from users where id=1',
+        "x'; DELETE FROM users WHERE 1=1",
+        'INSERT INTO users VALUES (1)',
+        'UPDATE users SET is_staff=1',
+        "EXEC xp_cmdshell 'dir'",
+        'UN/**/ION SEL/**/ECT',
+    ]
+
+    def test_prose_is_accepted(self):
+        for ruleset in ('plain_text', 'rich_html'):
+            for value in self.PROSE:
+                with self.subTest(ruleset=ruleset, value=value):
+                    self.assertEqual(inspect(value, ruleset), [])
+                    self.assertEqual(inspect(f'<p>{value}</p>', 'rich_html'), [])
+
+    def test_injections_are_rejected(self):
+        for ruleset in ('plain_text', 'rich_html'):
+            for value in self.INJECTIONS:
+                with self.subTest(ruleset=ruleset, value=value):
+                    self.assertTrue(inspect(value, ruleset))
+                    self.assertTrue(inspect(f'<p>{value}</p>', 'rich_html'))
+
+    def test_rich_html_skips_markup_only(self):
+        self.assertEqual(inspect('<p><a href="/about/#team">Team</a> &amp; &#35;1 &mdash; open</p>', 'rich_html'), [])
+        self.assertEqual(inspect('<p>x</p><p>1; DROP TABLE users</p>', 'rich_html')[0].offset, 14)
+
+    def test_shell(self):
+        self.assertEqual(inspect('backup-2024.tar.gz', 'shell'), [])
+        for value in ('a; rm -rf /', '$(id)', '`id`', 'a | nc host 1', 'a > /etc/passwd', 'a\nb'):
+            with self.subTest(value=value):
+                self.assertTrue(inspect(value, 'shell'))
+
+    @override_settings(INSPECTION_MAX_LENGTH=10)
+    def test_oversized_input_is_not_scanned(self):
+        self.assertEqual(inspect('Select your appointment'), [(OVERSIZE, 10)])
+
+    def test_validator(self):
+        validator = InspectionValidator('rich_html')
+        validator('<p>Clinic #1 -- open</p>')
+        with self.assertRaises(ValidationError), self.assertLogs('security', 'WARNING') as logs:
+            validator('<p>1; DROP TABLE users</p>')
+        self.assertNotIn('DROP', logs.output[0])
+
+
+def png_bytes(size=(32, 18)):
+    data = io.BytesIO()
+    Image.new('RGB', size, '#336699').save(data, 'PNG')
+    return data.getvalue()
+
+
+class UploadValidationTests(SimpleTestCase):
+
+    def assertRejected(self, name, content, code):
+        with self.assertRaises(ValidationError) as caught:
+            validate_image_upload(SimpleUploadedFile(name, content))
+        self.assertEqual(caught.exception.code, code)
+
+    def test_valid_image_is_accepted(self):
+        image = validate_image_upload(SimpleUploadedFile('photo.png', png_bytes()))
+        self.assertEqual(image.size, (32, 18))
+
+    def test_extension_must_match_content(self):
+        self.assertRejected('photo.jpg', png_bytes(), 'extension_mismatch')
+        self.assertRejected('photo', png_bytes(), 'extension_mismatch')
+
+    def test_content_type_is_sniffed_not_trusted(self):
+        upload = SimpleUploadedFile('photo.png', b'<script>alert(1)</script>', content_type='image/png')
+        with self.assertRaises(ValidationError) as caught:
+            validate_image_upload(upload)
+        self.assertEqual(caught.exception.code, 'invalid_image')
+        self.assertRejected('report.png', b'%PDF-1.7\n', 'invalid_image')
+
+    def test_corrupt_image_is_rejected(self):
+        self.assertRejected('photo.png', png_bytes()[:16], 'invalid_image')
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=100)
+    def test_oversized_file_is_rejected(self):
+        self.assertRejected('photo.png', png_bytes() + b'\0' * 200, 'file_too_large')
+
+    @override_settings(UPLOAD_MAX_IMAGE_DIMENSION=16)
+    def test_oversized_dimensions_are_rejected(self):
+        self.assertRejected('photo.png', png_bytes(), 'image_too_large')
+
+    @override_settings(UPLOAD_MAX_IMAGE_PIXELS=500)
+    def test_too_many_pixels_are_rejected(self):
+        self.assertRejected('photo.png', png_bytes(), 'image_too_large')
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=100)
+    def test_handler_stops_storing_oversized_files(self):
+        handler = MaxSizeUploadHandler()
+        handler.new_file('upload', 'photo.png', 'image/png', None)
+        self.assertEqual(handler.receive_data_chunk(b'x' * 60, 0), b'x' * 60)
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 60, 60))
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 10, 120))
+        upload = handler.file_complete(130)
+        self.assertIsInstance(upload, RejectedUpload)
+        self.assertEqual(upload.read(), b'')
+        with self.assertRaises(ValidationError):
+            validate_image_upload(upload)
+
+
+@skipUnless(apps.is_installed('django_ckeditor_5'), 'django_ckeditor_5 is not installed')
+class EditorUploadTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        staff = get_user_model().objects.create_user('editor', 'editor@example.com', 'x', is_staff=True)
+        self.client.force_login(staff)
+
+    def upload(self, name, content):
+        return self.client.post(reverse('ck_editor_5_upload_file'), {'upload': SimpleUploadedFile(name, content)})
+
+    def test_spoofed_upload_is_rejected(self):
+        self.assertEqual(self.upload('photo.png', b'GIF89a<script>alert(1)</script>').status_code, 400)
+        self.assertEqual(self.upload('photo.gif', png_bytes()).status_code, 400)
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=1024)
+    def test_oversized_upload_is_stopped(self):
+        response = self.upload('photo.png', png_bytes() + b'\0' * 4096)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('too large', response.json()['error']['message'])
+
+    @override_settings(CKEDITOR_5_UPLOAD_FILE_TYPES=['jpg', 'gif'])
+    def test_editor_file_types_are_checked_on_the_sniffed_format(self):
+        response = self.upload('photo.png', png_bytes())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('png', response.json()['error']['message'])
+
+    @override_settings(CKEDITOR_5_MAX_FILE_SIZE=1)
+    def test_editor_max_file_size_is_enforced(self):
+        with mock.patch('healthcenter.inline_images.process_upload') as process:
+            response = self.upload('photo.png', png_bytes() + b'\0' * (1024 * 1024))
+        self.assertEqual(response.status_code, 413)
+        process.assert_not_called()
+
+    def test_valid_upload_is_stored(self):
+        response = self.upload('photo.png', png_bytes())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('url', response.json())
+
+
+def jpeg_bytes(size, orientation=None):
+    data = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new('RGB', size, '#336699').save(data, 'JPEG', exif=exif)
+    return data.getvalue()
+
+
+class InlineImageTests(TestCase):
+
+    def setUp(self):
+        self.media = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.media, True)
+        override = override_settings(MEDIA_ROOT=self.media, STATIC_PUBLISH_ROOT=None)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_upload_is_reencoded_upright_without_metadata(self):
+        image = process_upload(io.BytesIO(jpeg_bytes((2000, 1000), orientation=6)))
+        self.assertEqual((image.width, image.height), (1000, 2000))
+        self.assertEqual([width for width, name in image.variants], [480, 960])
+        with Image.open(self.media / image.name) as stored:
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertEqual(dict(stored.getexif()), {})
+        for width, name in image.variants:
+            with Image.open(self.media / name) as variant:
+                self.assertEqual(variant.width, width)
+
+    def test_same_upload_is_stored_once(self):
+        first = process_upload(io.BytesIO(jpeg_bytes((2000, 1000))))
+        second = process_upload(io.BytesIO(jpeg_bytes((2000, 1000))))
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(InlineImage.objects.count(), 1)
+
+    def test_wide_upload_is_capped(self):
+        image = process_upload(io.BytesIO(jpeg_bytes((3200, 1600))))
+        self.assertEqual((image.width, image.height), (1600, 800))
+
+    def test_save_rewrites_known_images(self):
+        image = process_upload(io.BytesIO(jpeg_bytes((2000, 1000))))
+        content = Content.objects.create(
+            heading='Clinic',
+            body=f'<p><img alt="Ward" src="{image.url}"><img src="https://example.com/a.jpg"></p>',
+        )
+        tag = parse_attributes(IMG_TAG.findall(content.body)[0])
+        self.assertEqual(tag['srcset'], image.srcset)
+        self.assertEqual((tag['width'], tag['height']), ('1600', '800'))
+        self.assertEqual((tag['loading'], tag['alt']), ('lazy', 'Ward'))
+        self.assertIn('<img src="https://example.com/a.jpg">', content.body)
+
+    def test_command_rewrites_stored_html_and_refreshes_pages(self):
+        (self.media / 'uploads').mkdir()
+        (self.media / 'uploads' / 'old.jpg').write_bytes(jpeg_bytes((1200, 600)))
+        content = Content.objects.create(heading='Clinic', body='<p>-</p>')
+        Content.objects.filter(pk=content.pk).update(body='<p><img src="/media/uploads/old.jpg"></p>')
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        with self.settings(STATIC_PUBLISH_ROOT=root), \
+                mock.patch('healthcenter.signals.bump_model_version') as bump, \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command('optimize_inline_images', stdout=io.StringIO())
+        content.refresh_from_db()
+        self.assertIn('srcset=', content.body)
+        bump.assert_called_once_with('healthcenter.Content')
+        self.assertEqual(set(PendingSnapshot.objects.values_list('path', flat=True)), {reverse('healthcenter:content')})
+
+
+class ImageMetadataTests(TestCase):
+
+    def setUp(self):
+        self.media = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.media, True)
+        override = override_settings(MEDIA_ROOT=self.media, STATIC_PUBLISH_ROOT=None)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def create_portfolio(self, size=(40, 20)):
+        return Portfolio.objects.create(
+            title='Ward', description='<p>-</p>', image=SimpleUploadedFile('ward.png', png_bytes(size)),
+        )
+
+    def test_dominant_color(self):
+        image = Image.new('RGB', (64, 64), '#cc0000')
+        image.paste('#0000cc', (0, 0, 16, 16))
+        data = io.BytesIO()
+        image.save(data, 'PNG')
+        self.assertEqual(dominant_color(data), '#cc0000')
+        self.assertEqual(data.tell(), 0)
+        self.assertEqual(dominant_color(io.BytesIO(b'not an image')), '')
+
+    def test_new_file_fills_dimensions_and_placeholder(self):
+        portfolio = self.create_portfolio()
+        self.assertEqual(
+            (portfolio.image_width, portfolio.image_height, portfolio.image_placeholder), (40, 20, '#336699'),
+        )
+
+    def test_loaded_rows_do_not_reopen_the_file(self):
+        pk = self.create_portfolio().pk
+        (self.media / Portfolio.objects.get(pk=pk).image.name).unlink()
+        with mock.patch('healthcenter.uploads.dominant_color') as color:
+            portfolio = Portfolio.objects.get(pk=pk)
+        color.assert_not_called()
+        self.assertEqual((portfolio.image_width, portfolio.image_height), (40, 20))
+
+    def test_backfill_fills_missing_columns_and_refreshes_pages(self):
+        portfolio = self.create_portfolio()
+        broken = self.create_portfolio()
+        (self.media / broken.image.name).unlink()
+        Portfolio.objects.update(image_width=None, image_height=None, image_placeholder='')
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        out = io.StringIO()
+        with self.settings(STATIC_PUBLISH_ROOT=root), \
+                mock.patch('healthcenter.signals.bump_model_version') as bump, \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_image_metadata', stdout=out)
+        self.assertIn('healthcenter.Portfolio.image: 1 updated, 1 files unreadable', out.getvalue())
+        portfolio.refresh_from_db()
+        self.assertEqual(
+            (portfolio.image_width, portfolio.image_height, portfolio.image_placeholder), (40, 20, '#336699'),
+        )
+        bump.assert_called_once_with('healthcenter.Portfolio')
+        self.assertIn(
+            reverse('healthcenter:portfolio_detail', args=[portfolio.pk]),
+            PendingSnapshot.objects.values_list('path', flat=True),
+        )
+
+
+@skipUnless(apps.is_installed('django_ckeditor_5'), 'django_ckeditor_5 is not installed')
+class LazyEditorWidgetTests(SimpleTestCase):
+
+    def test_sanitize_html_keeps_editor_markup_only(self):
+        self.assertEqual(
+            sanitize_html('<p class="lead" onclick="x()">Hi <a href="javascript:alert(1)">a</a>'
+                          '<a href="/about/">b</a></p><script>alert(1)</script><img src=x onerror=alert(1)>'),
+            '<p class="lead">Hi <a>a</a><a href="/about/">b</a></p><img src="x">',
+        )
+        self.assertEqual(sanitize_html('<ul><li><b>open</ul>&lt;tag&gt;'), '<ul><li><b>open</b></li></ul>&lt;tag&gt;')
+        self.assertEqual(
+            sanitize_html('<span style="color:#c00;font-size:14px">a</span><span style="background:url(x)">b</span>'),
+            '<span style="color:#c00;font-size:14px">a</span><span>b</span>',
+        )
+
+    def test_submitted_value_is_sanitized_in_the_preview(self):
+        html = LazyCKEditor5Widget().render(
+            'body', '<p>Ward</p><img src=x onerror=alert(1)></textarea><script>alert(1)</script>', {'id': 'id_body'},
+        )
+        preview = html.split('<textarea', 1)[0]
+        self.assertIn('<p>Ward</p><img src="x">', preview)
+        self.assertNotIn('onerror', preview)
+        self.assertNotIn('<script>alert', html)
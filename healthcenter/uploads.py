@@ -0,0 +1,241 @@
+"""
+Upload validation that never holds more of a file than it needs.
+
+* MaxSizeUploadHandler counts bytes as chunks arrive and stops storing a file
+  as soon as it passes UPLOAD_MAX_FILE_SIZE.
+* sniff() identifies a file from its first few KB of magic bytes, whatever
+  its name or declared content type says.
+* open_image() lets Pillow parse just the image header and checks the pixel
+  dimensions before anything decodes the image data.
+
+SafeImageField (model) / SafeImageFormField (form) put these together for
+ImageFields; the CKEditor upload view in healthcenter.views uses them too.
+"""
+import os
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import models
+from django.db.models import signals
+from django.template.defaultfilters import filesizeformat
+
+SNIFF_BYTES = 4096
+
+# kind -> (magic bytes prefixes, extensions allowed for that kind)
+SIGNATURES = {
+    'jpeg': ((b'\xff\xd8\xff',), ('.jpg', '.jpeg')),
+    'png': ((b'\x89PNG\r\n\x1a\n',), ('.png',)),
+    'gif': ((b'GIF87a', b'GIF89a'), ('.gif',)),
+    'webp': ((), ('.webp',)),  # RIFF container, see sniff()
+    'bmp': ((b'BM',), ('.bmp',)),
+    'tiff': ((b'II*\x00', b'MM\x00*'), ('.tif', '.tiff')),
+    'pdf': ((b'%PDF-',), ('.pdf',)),
+}
+IMAGE_KINDS = ('jpeg', 'png', 'gif', 'webp', 'bmp', 'tiff')
+
+
+def max_file_size():
+    return getattr(settings, 'UPLOAD_MAX_FILE_SIZE', 10 * 1024 * 1024)
+
+
+class RejectedUpload(UploadedFile):
+    """Stands in for a file that MaxSizeUploadHandler stopped storing"""
+    too_large = True
+
+    def __init__(self, name, content_type, size, charset, content_type_extra):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+
+    def read(self, *args, **kwargs):
+        return b''
+
+    def seek(self, *args, **kwargs):
+        return 0
+
+    def chunks(self, chunk_size=None):
+        return iter(())
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    First handler in FILE_UPLOAD_HANDLERS: passes chunks on to the memory and
+    temporary file handlers until a file goes over UPLOAD_MAX_FILE_SIZE, then
+    swallows the rest and hands back a RejectedUpload for forms to report.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.too_large = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.too_large or self.received > max_file_size():
+            self.too_large = True
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.too_large:
+            return None
+        return RejectedUpload(self.file_name, self.content_type, self.received, self.charset, self.content_type_extra)
+
+
+def sniff(file):
+    """Return the kind of file from its leading bytes, or None"""
+    position = file.tell() if hasattr(file, 'tell') else 0
+    file.seek(0)
+    head = file.read(SNIFF_BYTES)
+    file.seek(position)
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    for kind, (prefixes, _) in SIGNATURES.items():
+        if head.startswith(prefixes):
+            return kind
+    return None
+
+
+def check_size(file):
+    if getattr(file, 'too_large', False) or (file.size or 0) > max_file_size():
+        raise ValidationError(
+            'File is too large (maximum %(limit)s).',
+            code='file_too_large', params={'limit': filesizeformat(max_file_size())},
+        )
+
+
+def check_extension(file, kind):
+    ext = os.path.splitext(file.name or '')[1].lower()
+    if ext not in SIGNATURES[kind][1]:
+        raise ValidationError(
+            'File content does not match its %(ext)s extension.',
+            code='extension_mismatch', params={'ext': ext or 'missing'},
+        )
+
+
+def open_image(file):
+    """
+    Open file with Pillow, reading only its header, and enforce the pixel
+    limits. Returns the (not yet decoded) Image.
+    """
+    from PIL import Image
+
+    max_pixels = getattr(settings, 'UPLOAD_MAX_IMAGE_PIXELS', 40_000_000)
+    max_side = getattr(settings, 'UPLOAD_MAX_IMAGE_DIMENSION', 10000)
+    file.seek(0)
+    try:
+        image = Image.open(file)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as exc:
+        raise ValidationError('Upload a valid image.', code='invalid_image') from exc
+    width, height = image.size
+    if width > max_side or height > max_side or width * height > max_pixels:
+        raise ValidationError(
+            'Image is %(width)s×%(height)s pixels, larger than allowed.',
+            code='image_too_large', params={'width': width, 'height': height},
+        )
+    return image
+
+
+def validate_image_upload(file):
+    """Size, magic bytes, extension and pixel dimensions of an image upload"""
+    check_size(file)
+    kind = sniff(file)
+    if kind not in IMAGE_KINDS:
+        raise ValidationError('Upload a valid image.', code='invalid_image')
+    check_extension(file, kind)
+    image = open_image(file)
+    file.seek(0)
+    return image
+
+
+def validate_upload_content(file):
+    """Size, magic bytes and extension of any allowed upload"""
+    check_size(file)
+    kind = sniff(file)
+    if kind is None:
+        raise ValidationError('Unsupported file type.', code='invalid_file')
+    check_extension(file, kind)
+    if kind in IMAGE_KINDS:
+        open_image(file)
+    file.seek(0)
+
+
+class SafeImageFormField(forms.ImageField):
+    """
+    ImageField that validates the upload in place: no copy of the file into
+    memory and no verify() pass over the image data, just the header checks
+    """
+
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+        from PIL import Image
+
+        image = validate_image_upload(f)
+        f.image = image
+        f.content_type = Image.MIME.get(image.format)
+        return f
+
+
+def dominant_color(file):
+    """
+    Most common colour of an image as '#rrggbb', from a 64px thumbnail, or ''
+    if the file cannot be read as an image
+    """
+    from PIL import Image
+
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            image.draft('RGB', (64, 64))  # JPEG: decode at a reduced scale
+            image = image.convert('RGB')
+            image.thumbnail((64, 64))
+            paletted = image.quantize(colors=4)
+            _, index = max(paletted.getcolors())
+            red, green, blue = paletted.getpalette()[index * 3:index * 3 + 3]
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return ''
+    finally:
+        file.seek(0)
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+class SafeImageField(models.ImageField):
+    """
+    models.ImageField whose form field is SafeImageFormField.
+
+    width_field/height_field and the optional placeholder_field (dominant
+    colour) are filled in only when a new file is assigned. Rows loaded from
+    the database keep their stored values and never reopen the file;
+    backfill_image_metadata fills in rows saved before the columns existed.
+    """
+
+    def __init__(self, *args, placeholder_field=None, **kwargs):
+        self.placeholder_field = placeholder_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.placeholder_field:
+            kwargs['placeholder_field'] = self.placeholder_field
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract and self.placeholder_field and not (self.width_field or self.height_field):
+            signals.post_init.connect(self.update_dimension_fields, sender=cls)
+
+    def update_dimension_fields(self, instance, force=False, *args, **kwargs):
+        if self.attname not in instance.__dict__:
+            return
+        file = getattr(instance, self.attname)
+        if file and file._committed:
+            return
+        super().update_dimension_fields(instance, force=True)
+        if self.placeholder_field:
+            setattr(instance, self.placeholder_field, dominant_color(file) if file else '')
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': SafeImageFormField, **kwargs})
@@ -1,22 +1,20 @@
 from django.core.exceptions import ValidationError
-import logging
-import re
 
-logger = logging.getLogger('security')
+from healthcenter.inspection import InspectionValidator
+from healthcenter.uploads import validate_upload_content
+
+# Field validators backed by the single-pass inspection engine; use the
+# rich_html one for CKEditor fields so markup is not mistaken for input
+validate_plain_text = InspectionValidator('plain_text')
+validate_rich_html = InspectionValidator('rich_html')
+validate_shell_safe = InspectionValidator('shell', message='Invalid characters')
+
 
 def validate_no_sql_injection(value):
-    patterns = [r"(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC)", r"(--|#)", r"(OR.*=.*)", r"(AND.*=.*)"]
-    for pattern in patterns:
-        if re.search(pattern, str(value), re.IGNORECASE):
-            logger.warning(f'SQL injection attempt: {value}')
-            raise ValidationError('Invalid input')
+    validate_plain_text(value)
 
 def validate_no_command_injection(value):
-    dangerous = ['|', '&', ';', '$', '`', '\n', '(', ')', '<', '>']
-    for char in dangerous:
-        if char in str(value):
-            logger.warning(f'Command injection attempt: {value}')
-            raise ValidationError('Invalid characters')
+    validate_shell_safe(value)
 
 def validate_file_extension(value):
     import os
@@ -26,4 +24,4 @@ def validate_file_extension(value):
         raise ValidationError(f'Extension {ext} not allowed')
 
 def validate_file_content(value):
-    return True  # Simplified - would use python-magic in production
+    validate_upload_content(value)
@@ -0,0 +1,146 @@
+"""
+Video embeds rendered as click-to-load facades.
+
+parse_video() reduces whatever was pasted into Home.video_embed (an iframe
+snippet or a plain URL) to a provider and video id. The home page then shows
+a locally stored poster with a play button, and only swaps in the provider's
+iframe, with all of its scripts, when the visitor clicks it.
+
+Saving never fetches anything: a new video has no poster until manage.py
+fetch_video_posters runs, off the request path. It calls the callable named
+in VIDEO_POSTER_FETCHER, which takes (provider, video_id) and returns image
+bytes or None. The default, no_poster, stays offline; point it at
+fetch_poster where outbound requests are allowed.
+"""
+import json
+import logging
+import re
+import urllib.request
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.utils.module_loading import import_string
+
+from .uploads import IMAGE_KINDS, SIGNATURES, open_image, sniff
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = (
+    ('youtube', 'YouTube'),
+    ('vimeo', 'Vimeo'),
+    ('facebook', 'Facebook'),
+)
+
+MAX_POSTER_BYTES = 2 * 1024 * 1024
+FETCH_TIMEOUT = 5  # seconds
+
+IFRAME_SRC = re.compile(r'''<iframe\b[^>]{0,2048}?\bsrc\s*=\s*["']([^"']{1,2048})["']''', re.IGNORECASE)
+YOUTUBE_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+NUMERIC_ID = re.compile(r'^\d{1,30}$')
+
+
+def _source_url(embed):
+    """The URL inside an embed snippet, or the value itself if it is a URL"""
+    embed = (embed or '').strip()
+    match = IFRAME_SRC.search(embed)
+    url = match.group(1) if match else embed
+    if url.startswith('//'):
+        url = 'https:' + url
+    return url.replace('&amp;', '&')
+
+
+def parse_video(embed):
+    """(provider, video_id) for a supported embed or URL, else (None, None)"""
+    parts = urlsplit(_source_url(embed))
+    host = (parts.hostname or '').lower().removeprefix('www.').removeprefix('m.')
+    segments = [segment for segment in parts.path.split('/') if segment]
+    query = parse_qs(parts.query)
+
+    if host in ('youtube.com', 'youtube-nocookie.com', 'youtu.be'):
+        if host == 'youtu.be':
+            candidate = segments[0] if segments else ''
+        elif segments[:1] == ['watch']:
+            candidate = query.get('v', [''])[0]
+        elif len(segments) >= 2 and segments[0] in ('embed', 'shorts', 'live', 'v'):
+            candidate = segments[1]
+        else:
+            candidate = ''
+        if YOUTUBE_ID.match(candidate):
+            return 'youtube', candidate
+
+    elif host in ('vimeo.com', 'player.vimeo.com'):
+        candidate = segments[-1] if segments else ''
+        if NUMERIC_ID.match(candidate):
+            return 'vimeo', candidate
+
+    elif host in ('facebook.com', 'fb.watch'):
+        if segments[:2] == ['plugins', 'video.php'] and 'href' in query:
+            return parse_video(unquote(query['href'][0]))
+        if segments[:1] == ['watch'] and NUMERIC_ID.match(query.get('v', [''])[0]):
+            return 'facebook', query['v'][0]
+        if 'videos' in segments:
+            candidate = segments[-1]
+            if NUMERIC_ID.match(candidate):
+                return 'facebook', candidate
+
+    return None, None
+
+
+def embed_url(provider, video_id):
+    """Autoplaying player URL loaded when the facade is clicked"""
+    if provider == 'youtube':
+        return f'https://www.youtube-nocookie.com/embed/{video_id}?autoplay=1'
+    if provider == 'vimeo':
+        return f'https://player.vimeo.com/video/{video_id}?autoplay=1'
+    if provider == 'facebook':
+        href = quote(f'https://www.facebook.com/watch/?v={video_id}', safe='')
+        return f'https://www.facebook.com/plugins/video.php?href={href}&autoplay=true'
+    return ''
+
+
+def _download(url):
+    request = urllib.request.Request(url, headers={'User-Agent': 'saireecmpo-poster-fetcher'})
+    with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+        data = response.read(MAX_POSTER_BYTES + 1)
+    return data if len(data) <= MAX_POSTER_BYTES else None
+
+
+def fetch_poster(provider, video_id):
+    """Default fetcher: the provider's public thumbnail, where there is one"""
+    try:
+        if provider == 'youtube':
+            return _download(f'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg')
+        if provider == 'vimeo':
+            info = json.loads(_download(f'https://vimeo.com/api/oembed.json?url=https://vimeo.com/{video_id}') or b'{}')
+            return _download(info['thumbnail_url']) if info.get('thumbnail_url') else None
+    except (OSError, ValueError) as exc:
+        logger.warning('Could not fetch %s poster for %s: %s', provider, video_id, exc)
+    # Facebook thumbnails need an app access token
+    return None
+
+
+def no_poster(provider, video_id):
+    """Default fetcher, for offline use: never fetches anything"""
+    return None
+
+
+def get_poster(provider, video_id):
+    fetcher = import_string(getattr(settings, 'VIDEO_POSTER_FETCHER', 'healthcenter.video.no_poster'))
+    return fetcher(provider, video_id)
+
+
+def poster_file(data, stem):
+    """Fetched poster bytes as a ContentFile named stem.<ext>, or None if they are not a usable image"""
+    poster = ContentFile(data)
+    kind = sniff(poster)
+    if kind not in IMAGE_KINDS:
+        return None
+    try:
+        open_image(poster)
+    except ValidationError:
+        return None
+    poster.seek(0)
+    poster.name = f'{stem}{SIGNATURES[kind][1][0]}'
+    return poster
@@ -1,17 +1,29 @@
 from django.shortcuts import redirect, render
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.core.exceptions import ValidationError
+from django.views.decorators.http import require_POST
+from django.conf import settings
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from .models import About, Content, Home, Portfolio
 from .forms import AboutForm, ContentForm, HomeForm, PortFolioForm
+from .streaming import StreamingListMixin, render_streaming
+from .uploads import validate_image_upload
 
 # Create your views here.
 
+# Columns each list template reads; see healthcenter.projection
+PORTFOLIO_CARD_FIELDS = ('id', 'title', 'description', 'image', 'image_width', 'image_height', 'image_placeholder')
+ABOUT_LIST_FIELDS = ('id', 'title', 'email', 'phone', 'established_year', 'updated_at')
+
+# django_ckeditor_5's defaults for CKEDITOR_5_UPLOAD_FILE_TYPES
+EDITOR_FILE_TYPES = ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'tiff']
+
 def home(request):
     posts = Home.objects.all().order_by('-id')
-    portfolio_items = Portfolio.objects.all().order_by('-id')
+    portfolio_items = Portfolio.objects.project(*PORTFOLIO_CARD_FIELDS).order_by('-id')
     context = {'posts': posts, 'portfolio_items': portfolio_items}
     return render(request, 'healthcenter/home.html', context)
 
@@ -40,7 +52,7 @@ class HomeCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
 def content(request):
     """Display all content entries"""
     contents = Content.objects.all().order_by('-updated_at')
-    return render(request, 'healthcenter/content.html', {'contents': contents})
+    return render_streaming(request, 'healthcenter/content.html', {'contents': contents})
 
 class ContentCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     """Create new Content - requires admin/staff login"""
@@ -103,7 +115,7 @@ class ContentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         messages.success(self.request, 'Content deleted successfully!')
         return super().delete(request, *args, **kwargs)
 # About CRUD Views
-class AboutListView(ListView):
+class AboutListView(StreamingListMixin, ListView):
     """Display list of all About Us entries"""
     model = About
     template_name = 'healthcenter/about_list.html'
@@ -113,9 +125,10 @@ class AboutListView(ListView):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = About.objects.project(*ABOUT_LIST_FIELDS).order_by('-updated_at')
         if user.is_staff or user.is_superuser:
-            return About.objects.all().order_by('-updated_at')
-        return About.objects.filter(is_active=True).order_by('-updated_at')
+            return queryset
+        return queryset.filter(is_active=True)
 
 class AboutDetailView(DetailView):
     """Display detailed information about a specific About Us entry"""
@@ -217,7 +230,7 @@ class PortfolioCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
         messages.error(self.request, 'Please correct the errors below.')
         return super().form_invalid(form)
     
-class PortfolioListView(ListView):
+class PortfolioListView(StreamingListMixin, ListView):
     """Display list of all Portfolio entries"""
     model = Portfolio
     template_name = 'healthcenter/portfolio_list.html'
@@ -225,6 +238,9 @@ class PortfolioListView(ListView):
     ordering = ['-id']
     paginate_by = 10  # Optional: Add pagination if needed
 
+    def get_queryset(self):
+        return Portfolio.objects.project(*PORTFOLIO_CARD_FIELDS).order_by(*self.ordering)
+
 class PortfolioUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     """Update existing Portfolio entry - requires admin/staff login"""
     model = Portfolio
@@ -268,4 +284,44 @@ class PortfolioDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def delete(self, request, *args, **kwargs):
         """Handle deletion with success message"""
         messages.success(self.request, 'Portfolio entry deleted successfully!')
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+        return super().delete(request, *args, **kwargs)
+
+
+@require_POST
+def ckeditor_upload(request):
+    """
+    CKEditor image upload, replacing django_ckeditor_5's view so editor
+    uploads get the same size, magic byte and pixel checks as ImageFields and
+    are stored re-encoded in several widths. Only mounted with
+    django_ckeditor_5 installed (see core.urls).
+    """
+    from django_ckeditor_5.permissions import check_upload_permission
+
+    return check_upload_permission(_store_editor_upload)(request)
+
+
+def _store_editor_upload(request):
+    from .inline_images import process_upload
+
+    upload = request.FILES.get('upload')
+    if upload is None:
+        return JsonResponse({'error': {'message': 'No file was uploaded.'}}, status=400)
+    try:
+        image = validate_image_upload(upload)
+    except ValidationError as exc:
+        status = 413 if exc.code == 'file_too_large' else 400
+        return JsonResponse({'error': {'message': exc.messages[0]}}, status=status)
+
+    # django_ckeditor_5's form checks, on the sniffed format rather than the
+    # name (validate_image_upload already matched the two up)
+    allowed = {kind.lower() for kind in getattr(settings, 'CKEDITOR_5_UPLOAD_FILE_TYPES', EDITOR_FILE_TYPES)}
+    kind = image.format.lower()
+    if kind not in allowed and not (kind == 'jpeg' and 'jpg' in allowed):
+        return JsonResponse({'error': {'message': f'Image type {kind} is not allowed.'}}, status=400)
+    max_size = getattr(settings, 'CKEDITOR_5_MAX_FILE_SIZE', 0)
+    if max_size and upload.size > max_size * 1024 * 1024:
+        return JsonResponse({'error': {'message': f'File should be at most {max_size} MB.'}}, status=413)
+    image = process_upload(upload)
+    urls = {'default': image.url}
+    urls.update((str(width), image.storage.url(name)) for width, name in image.variants)
+    return JsonResponse({'url': image.url, 'urls': urls})
@@ -0,0 +1,293 @@
+"""
+Self-hosted, subsetted web fonts.
+
+find_usage() reads main.css and the <style> blocks and style attributes in
+templates/ for the font families, weights and styles the site actually asks
+for. Rules that set a weight without a family are counted against the family
+they inherit: the heading font for h1-h6 selectors, the body font otherwise.
+The body font's regular, bold and (if templates use <em>) italic faces are
+always included.
+
+build() matches that usage against the .ttf/.otf files in
+WEB_FONTS_SOURCE_DIR and writes one WOFF2 per face, cut down to Latin plus
+Thai, together with fonts.css (@font-face rules with unicode-range, so a face
+is only downloaded for text it covers) and manifest.json, which the
+{% web_fonts %} tag reads. Building needs fontTools and brotli (see
+requirements-build.txt); serving the generated files needs neither.
+"""
+import hashlib
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+OUTPUT_PREFIX = 'fonts/web'
+MANIFEST = 'manifest.json'
+STYLESHEET = 'fonts.css'
+
+# Google Fonts' "latin" and "thai" subsets
+LATIN = [
+    (0x0000, 0x00FF), (0x0131, 0x0131), (0x0152, 0x0153), (0x02BB, 0x02BC), (0x02C6, 0x02C6),
+    (0x02DA, 0x02DA), (0x02DC, 0x02DC), (0x0304, 0x0304), (0x0308, 0x0308), (0x0329, 0x0329),
+    (0x2000, 0x206F), (0x20AC, 0x20AC), (0x2122, 0x2122), (0x2191, 0x2191), (0x2193, 0x2193),
+    (0x2212, 0x2212), (0x2215, 0x2215), (0xFEFF, 0xFEFF), (0xFFFD, 0xFFFD),
+]
+THAI = [(0x02D7, 0x02D7), (0x0303, 0x0303), (0x0331, 0x0331), (0x0E01, 0x0E5B), (0x200C, 0x200D), (0x25CC, 0x25CC)]
+
+GENERIC_FAMILIES = {
+    'serif', 'sans-serif', 'monospace', 'cursive', 'fantasy', 'system-ui', 'ui-serif', 'ui-sans-serif',
+    'ui-monospace', 'ui-rounded', 'emoji', 'math', 'fangsong', 'inherit', 'initial', 'unset', '-apple-system',
+}
+WEIGHT_KEYWORDS = {'normal': 400, 'bold': 700, 'bolder': 700, 'lighter': 300}
+
+CSS_RULE = re.compile(r'([^{}]*)\{([^{}]*)\}')
+DECLARATION = re.compile(r'(--[\w-]+|font-family|font-weight|font-style)\s*:\s*([^;]+)', re.IGNORECASE)
+CSS_VAR = re.compile(r'var\(\s*(--[\w-]+)\s*(?:,[^)]*)?\)')
+STYLE_BLOCK = re.compile(r'<style\b[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+STYLE_ATTR = re.compile(r'''\bstyle\s*=\s*"([^"]*)"''', re.IGNORECASE)
+HEADING = re.compile(r'(^|[\s,>+~])h[1-6]\b', re.IGNORECASE)
+COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def output_dir():
+    return Path(settings.STATICFILES_DIRS[0]) / OUTPUT_PREFIX
+
+
+def source_dir():
+    return Path(getattr(settings, 'WEB_FONTS_SOURCE_DIR', settings.BASE_DIR / 'fonts'))
+
+
+def default_css_files():
+    return [Path(settings.STATICFILES_DIRS[0]) / 'assets' / 'css' / 'main.css']
+
+
+def default_template_dirs():
+    return [Path(directory) for directory in settings.TEMPLATES[0]['DIRS']]
+
+
+def _families(value, variables):
+    value = CSS_VAR.sub(lambda match: variables.get(match.group(1), ''), value)
+    families = []
+    for name in value.split(','):
+        name = name.strip().strip('"\'').strip()
+        if name and name.lower() not in GENERIC_FAMILIES and not name.startswith('var('):
+            families.append(name)
+    return families
+
+
+def _weight(value):
+    value = value.strip().lower().replace('!important', '').strip()
+    if value.isdigit():
+        return int(value)
+    return WEIGHT_KEYWORDS.get(value)
+
+
+def _rules(css):
+    """(selector, {property: value}) for every innermost rule in css"""
+    for selector, body in CSS_RULE.findall(COMMENT.sub('', css)):
+        yield selector.strip(), {name.lower(): value.strip() for name, value in DECLARATION.findall(body)}
+
+
+def find_usage(css_files=None, template_dirs=None):
+    """Counter of (family, weight, italic) -> number of rules that use it"""
+    sources = [Path(path).read_text(encoding='utf-8', errors='replace') for path in css_files or default_css_files()]
+    uses_em = False
+    for directory in template_dirs or default_template_dirs():
+        for template in sorted(Path(directory).rglob('*.html')):
+            text = template.read_text(encoding='utf-8', errors='replace')
+            sources += STYLE_BLOCK.findall(text)
+            sources += [f'[style] {{{attr}}}' for attr in STYLE_ATTR.findall(text)]
+            uses_em = uses_em or '<em>' in text
+
+    rules = [rule for css in sources for rule in _rules(css)]
+    variables = {}
+    for _, declarations in rules:
+        variables.update({name: value for name, value in declarations.items() if name.startswith('--')})
+
+    body_families, heading_families = [], []
+    for selector, declarations in rules:
+        if 'font-family' not in declarations:
+            continue
+        if re.search(r'(^|,)\s*body\s*(,|$)', selector) and not body_families:
+            body_families = _families(declarations['font-family'], variables)
+        if HEADING.search(selector) and not heading_families:
+            heading_families = _families(declarations['font-family'], variables)
+
+    usage = Counter()
+    for selector, declarations in rules:
+        weight = _weight(declarations.get('font-weight', '')) or 400
+        italic = declarations.get('font-style', '').lower().startswith(('italic', 'oblique'))
+        if 'font-family' in declarations:
+            families = _families(declarations['font-family'], variables)
+        elif 'font-weight' in declarations or italic:
+            families = heading_families if HEADING.search(selector) else body_families
+        else:
+            continue
+        for family in families:
+            usage[(family, weight, italic)] += 1
+
+    for family in body_families:
+        usage[(family, 400, False)] += 1
+        usage[(family, 700, False)] += 0
+        if uses_em:
+            usage[(family, 400, True)] += 0
+    return usage
+
+
+def describe_font(path):
+    """(family, weight range, italic) read from a font file's own tables"""
+    from fontTools.ttLib import TTFont
+
+    with TTFont(path, lazy=True) as font:
+        names = font['name']
+        family = str(names.getDebugName(16) or names.getDebugName(1))
+        weight = font['OS/2'].usWeightClass
+        italic = bool(font['OS/2'].fsSelection & 1) or bool(font['head'].macStyle & 2)
+        weights = (weight, weight)
+        if 'fvar' in font:
+            for axis in font['fvar'].axes:
+                if axis.axisTag == 'wght':
+                    weights = (int(axis.minValue), int(axis.maxValue))
+    return family, weights, italic
+
+
+def find_sources(directory=None):
+    """{(family lowercased, italic): [(weights, path)]} for the fonts in directory"""
+    sources = {}
+    for path in sorted(Path(directory or source_dir()).glob('*')):
+        if path.suffix.lower() not in ('.ttf', '.otf', '.woff', '.woff2'):
+            continue
+        family, weights, italic = describe_font(path)
+        sources.setdefault((family.lower(), italic), []).append((weights, path))
+    return sources
+
+
+def match_source(sources, family, weight, italic):
+    """(weights, path) of the closest face, as a browser would pick it, or None"""
+    faces = sources.get((family.lower(), italic))
+    if not faces:
+        return None
+    for weights, path in faces:
+        if weights[0] <= weight <= weights[1]:
+            return weights, path
+    return min(faces, key=lambda face: min(abs(weight - face[0][0]), abs(weight - face[0][1])))
+
+
+def _codepoints(ranges):
+    return [point for start, end in ranges for point in range(start, end + 1)]
+
+
+def _unicode_range(codepoints):
+    """CSS unicode-range for a set of code points"""
+    ranges = []
+    for point in sorted(codepoints):
+        if ranges and point == ranges[-1][1] + 1:
+            ranges[-1][1] = point
+        else:
+            ranges.append([point, point])
+    return ', '.join(f'U+{start:04X}' if start == end else f'U+{start:04X}-{end:04X}' for start, end in ranges)
+
+
+def subset_font(path, codepoints):
+    """WOFF2 bytes of path cut down to codepoints, and the code points it kept"""
+    import io
+
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.desubroutinize = True
+    with TTFont(path) as font:
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        kept = set(font.getBestCmap() or ())
+        buffer = io.BytesIO()
+        font.flavor = 'woff2'
+        font.save(buffer)
+    return buffer.getvalue(), kept
+
+
+def _slug(family):
+    return re.sub(r'[^a-z0-9]+', '-', family.lower()).strip('-')
+
+
+def build(usage, sources, preload=2, output=None):
+    """
+    Write the subsetted faces, fonts.css and manifest.json to output; returns
+    (written faces, unmatched (family, weight, italic) entries)
+    """
+    output = Path(output or output_dir())
+    output.mkdir(parents=True, exist_ok=True)
+    codepoints = _codepoints(LATIN + THAI)
+
+    faces = {}
+    unmatched = []
+    provided = {family for family, _ in sources}
+    for (family, weight, italic), count in usage.most_common():
+        if family.lower() not in provided:
+            continue  # a system fallback such as Arial or Segoe UI
+        match = match_source(sources, family, weight, italic)
+        if match is None:
+            unmatched.append((family, weight, italic))
+            continue
+        weights, path = match
+        face = faces.setdefault((family, weights, italic), {'path': path, 'count': 0})
+        face['count'] += count
+
+    for old in output.glob('*.woff2'):
+        old.unlink()
+
+    css, written = [], []
+    for (family, weights, italic), face in faces.items():
+        data, kept = subset_font(face['path'], codepoints)
+        if not kept:
+            continue
+        style = 'italic' if italic else 'normal'
+        weight = str(weights[0]) if weights[0] == weights[1] else f'{weights[0]} {weights[1]}'
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        name = f'{_slug(family)}-{weight.replace(" ", "-")}{"-italic" if italic else ""}.{digest}.woff2'
+        (output / name).write_bytes(data)
+        css.append(
+            '@font-face {\n'
+            f'  font-family: "{family}";\n'
+            f'  font-style: {style};\n'
+            f'  font-weight: {weight};\n'
+            '  font-display: swap;\n'
+            f'  src: url("{name}") format("woff2");\n'
+            f'  unicode-range: {_unicode_range(kept)};\n'
+            '}\n'
+        )
+        written.append({
+            'file': f'{OUTPUT_PREFIX}/{name}', 'family': family, 'weight': weight,
+            'style': style, 'bytes': len(data), 'count': face['count'],
+        })
+
+    (output / STYLESHEET).write_text('\n'.join(css), encoding='utf-8')
+    upright = sorted((face for face in written if face['style'] == 'normal'), key=lambda face: -face['count'])
+    manifest = {
+        'css': f'{OUTPUT_PREFIX}/{STYLESHEET}',
+        'preload': [face['file'] for face in upright[:preload]],
+        'faces': written,
+    }
+    (output / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return written, unmatched
+
+
+_manifest = {}
+
+
+def load_manifest():
+    """The manifest written by build(), re-read when it changes; None if there is none"""
+    path = output_dir() / MANIFEST
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _manifest.get('mtime') != mtime:
+        _manifest.update(mtime=mtime, data=json.loads(path.read_text(encoding='utf-8')))
+    return _manifest['data']
@@ -0,0 +1,54 @@
+"""
+Form widgets.
+
+LazyCKEditor5Widget renders a rich-text field as a read-only HTML preview
+and starts CKEditor only when the preview is focused or clicked
+(static/assets/js/ckeditor-lazy.js). The editor bundle is downloaded once,
+on the first activation, and only one editor is live at a time: activating
+another field hands the first one's content back to its preview. A form
+page costs the same to load however many rich-text fields it has.
+"""
+import json
+
+from django.templatetags.static import static
+from django_ckeditor_5.widgets import CKEditor5Widget
+
+LAZY_CLASS = 'django_ckeditor_5_lazy'
+
+
+def editor_assets():
+    """Static URLs of the CKEditor scripts and stylesheets, in load order"""
+    return (
+        [static(path) for path in CKEditor5Widget.Media.js],
+        [static(path) for path in CKEditor5Widget.Media.css['all']],
+    )
+
+
+class LazyCKEditor5Widget(CKEditor5Widget):
+    """CKEditor5Widget that starts the editor on first focus"""
+    template_name = 'healthcenter/widgets/lazy_ckeditor5.html'
+
+    def __init__(self, config_name='default', attrs=None):
+        super().__init__(config_name, attrs)
+        # The editor bundle starts every .django_ckeditor_5 it finds
+        classes = self.attrs['class'].split()
+        self.attrs['class'] = ' '.join(LAZY_CLASS if name == 'django_ckeditor_5' else name for name in classes)
+
+    class Media:
+        extend = False
+        css = {'all': ['assets/css/ckeditor-lazy.css']}
+        js = ['assets/js/ckeditor-lazy.js']
+
+    def use_required_attribute(self, initial):
+        # The textarea stays hidden, and browsers refuse to submit a form
+        # with an invalid control they cannot focus
+        return False
+
+    def render(self, name, value, attrs=None, renderer=None):
+        scripts, stylesheets = editor_assets()
+        attrs = {
+            **(attrs or {}),
+            'data-editor-js': json.dumps(scripts),
+            'data-editor-css': json.dumps(stylesheets),
+        }
+        return super().render(name, value, attrs, renderer)
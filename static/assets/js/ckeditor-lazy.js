@@ -0,0 +1,141 @@
+/**
+ * Lazy CKEditor 5 for healthcenter.widgets.LazyCKEditor5Widget.
+ *
+ * Each rich-text field is rendered as a preview. Focusing or clicking one
+ * (or its label) downloads the editor bundle, once, and starts CKEditor on
+ * the field's textarea, the way django_ckeditor_5's own app.js does. Only
+ * one editor is live at a time: starting another writes the first one's
+ * content back to its textarea and preview and destroys it.
+ */
+(function() {
+  "use strict";
+
+  let loading = null;
+  let active = null;
+  let queue = Promise.resolve();
+
+  function getCookie(name) {
+    const cookie = document.cookie.split(';').map(part => part.trim()).find(part => part.startsWith(name + '='));
+    return cookie ? decodeURIComponent(cookie.substring(name.length + 1)) : null;
+  }
+
+  function loadScript(src) {
+    return new Promise((resolve, reject) => {
+      const script = document.createElement('script');
+      script.src = src;
+      script.onload = resolve;
+      script.onerror = reject;
+      document.head.appendChild(script);
+    });
+  }
+
+  /**
+   * Load the editor bundle and its stylesheets, once for the whole page
+   */
+  function loadEditor(textarea) {
+    if (window.ClassicEditor) return Promise.resolve();
+    if (!loading) {
+      JSON.parse(textarea.dataset.editorCss).forEach(href => {
+        const link = document.createElement('link');
+        link.rel = 'stylesheet';
+        link.href = href;
+        document.head.appendChild(link);
+      });
+      loading = JSON.parse(textarea.dataset.editorJs).reduce((chain, src) => chain.then(() => loadScript(src)), Promise.resolve());
+      loading.catch(() => { loading = null; });
+    }
+    return loading;
+  }
+
+  function editorConfig(textarea) {
+    const scriptId = `${textarea.id}_script`;
+    const upload = document.getElementById(`${scriptId}-ck-editor-5-upload-url`);
+    const config = JSON.parse(document.getElementById(`${scriptId}-span`).textContent, (key, value) => {
+      const match = value.toString().match(new RegExp('^/(.*?)/([gimy]*)$'));
+      return match ? new RegExp(match[1], match[2]) : value;
+    });
+    config.simpleUpload = {
+      'uploadUrl': upload.getAttribute('data-upload-url'),
+      'headers': {
+        'X-CSRFToken': getCookie(upload.getAttribute('data-csrf_cookie_name')),
+      },
+    };
+    config.fileUploader = {
+      'fileTypes': JSON.parse(upload.getAttribute('data-upload-file-types'))
+    };
+    config.licenseKey = 'GPL';
+    return config;
+  }
+
+  /**
+   * Hand the live editor's content back to its textarea and preview
+   */
+  function deactivate() {
+    if (!active) return Promise.resolve();
+    const { editor, textarea, preview } = active;
+    active = null;
+    const data = editor.getData();
+    textarea.value = data;
+    preview.innerHTML = data || '<p class="ck-lazy-placeholder">Click to edit</p>';
+    preview.hidden = false;
+    const wordCount = document.getElementById(`${textarea.id}_script-word-count`);
+    if (wordCount) wordCount.innerHTML = '';
+    return editor.destroy();
+  }
+
+  function activate(preview) {
+    const textarea = document.getElementById(preview.dataset.editor);
+    if (!textarea) return;
+    // One start at a time, so a quick second click cannot leave two editors
+    queue = queue
+      .then(() => {
+        if (active && active.textarea === textarea) return;
+        return loadEditor(textarea)
+          .then(deactivate)
+          .then(() => window.ClassicEditor.create(textarea, editorConfig(textarea)))
+          .then(editor => {
+            editor.model.document.on('change:data', () => {
+              textarea.value = editor.getData();
+            });
+            if (editor.plugins.has('WordCount')) {
+              const wordCount = document.getElementById(`${textarea.id}_script-word-count`);
+              wordCount.innerHTML = '';
+              wordCount.appendChild(editor.plugins.get('WordCount').wordCountContainer);
+            }
+            preview.hidden = true;
+            active = { editor, textarea, preview };
+            window.editors = window.editors || {};
+            window.editors[textarea.id] = editor;
+            editor.editing.view.focus();
+          });
+      })
+      .catch(error => console.error(error));
+  }
+
+  function previewFor(target) {
+    const preview = target.closest('.ck-lazy-preview');
+    if (preview) return preview;
+    const label = target.closest('label[for]');
+    return label ? document.getElementById(`${label.htmlFor}_preview`) : null;
+  }
+
+  document.addEventListener('focusin', event => {
+    const preview = previewFor(event.target);
+    if (preview) activate(preview);
+  });
+
+  document.addEventListener('click', event => {
+    const preview = previewFor(event.target);
+    if (preview) {
+      event.preventDefault();
+      activate(preview);
+    }
+  });
+
+  // Start downloading the bundle as soon as the pointer heads for a field
+  document.addEventListener('pointerover', event => {
+    const preview = event.target.closest && event.target.closest('.ck-lazy-preview');
+    if (preview) loadEditor(document.getElementById(preview.dataset.editor)).catch(() => {});
+  });
+
+})();
@@ -93,6 +93,8 @@
    * Animation on scroll function and init
    */
   function aosInit() {
+    // Pages load the AOS bundle only when they use it
+    if (typeof AOS === 'undefined') return;
     AOS.init({
       duration: 600,
       easing: 'ease-in-out',
@@ -118,9 +120,9 @@
   /**
    * Initiate glightbox
    */
-  const glightbox = GLightbox({
+  const glightbox = typeof GLightbox === 'function' ? GLightbox({
     selector: '.glightbox'
-  });
+  }) : null;
 
   /**
    * Init isotope layout and filters